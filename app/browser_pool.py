@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from run import open_persistent_context
+
+
+logger = logging.getLogger("buntzen_pass_bot.app.browser_pool")
+
+
+@dataclass
+class WarmContext:
+    key: str
+    signature: tuple
+    context: Any
+    last_used: float = field(default_factory=time.monotonic)
+    closed: bool = False
+
+
+class BrowserPool:
+    """Warm persistent browser contexts shared by every job on one event loop.
+
+    Contexts are keyed by profile directory and reused by the next job for the
+    same profile. Chromium locks a persistent profile, so jobs for the same
+    profile take turns through a per-profile lock held from acquire to release.
+    """
+
+    def __init__(
+        self,
+        idle_seconds: float,
+        max_idle: int,
+        playwright_factory=None,
+        launcher=open_persistent_context,
+    ) -> None:
+        self.idle_seconds = idle_seconds
+        self.max_idle = max_idle
+        self.playwright_factory = playwright_factory
+        self.launcher = launcher
+        self.playwright = None
+        self.contexts: dict[str, WarmContext] = {}
+        self.in_use: set[str] = set()
+        self.locks: dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, config, claim_timeout_seconds: float = 30.0):
+        key = profile_key(config)
+        lock = self.locks.setdefault(key, asyncio.Lock())
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout=claim_timeout_seconds)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"Browser profile {key} is still in use by another job.") from None
+
+        try:
+            context = await self._open(key, config)
+        except BaseException:
+            lock.release()
+            raise
+        self.in_use.add(key)
+        return context
+
+    async def release(self, config, healthy: bool = True) -> None:
+        key = profile_key(config)
+        try:
+            self.in_use.discard(key)
+            warm = self.contexts.get(key)
+            if warm is None:
+                return
+            if not healthy or warm.closed:
+                await self._close(warm)
+                return
+            await self._reset_pages(warm)
+            warm.last_used = time.monotonic()
+            await self._enforce_limit()
+        finally:
+            lock = self.locks.get(key)
+            if lock is not None and lock.locked():
+                lock.release()
+
+    async def maintain(self) -> None:
+        now = time.monotonic()
+        for warm in list(self.contexts.values()):
+            if warm.key in self.in_use:
+                continue
+            if warm.closed or now - warm.last_used >= self.idle_seconds:
+                logger.info("Evicting idle browser context for profile %s.", warm.key)
+                await self._close(warm)
+
+    async def close_all(self) -> None:
+        for warm in list(self.contexts.values()):
+            await self._close(warm)
+        if self.playwright is not None:
+            try:
+                await self.playwright.stop()
+            except Exception as exc:
+                logger.debug("Playwright driver stop failed: %s", exc)
+            self.playwright = None
+
+    async def _open(self, key: str, config):
+        signature = launch_signature(config)
+        warm = self.contexts.get(key)
+        if warm is not None and (warm.signature != signature or not await self._healthy(warm)):
+            logger.info("Discarding warm browser for %s; relaunching.", key)
+            await self._close(warm)
+            warm = None
+
+        if warm is not None:
+            logger.info("Reusing warm browser context for profile %s.", key)
+            return warm.context
+
+        started = time.monotonic()
+        context = await self.launcher(await self._driver(), config)
+        warm = WarmContext(key=key, signature=signature, context=context)
+        context.on("close", lambda *_: setattr(warm, "closed", True))
+        self.contexts[key] = warm
+        logger.info("Launched browser context for profile %s in %.2fs.", key, time.monotonic() - started)
+        return context
+
+    async def _driver(self):
+        if self.playwright is None:
+            factory = self.playwright_factory
+            if factory is None:
+                from playwright.async_api import async_playwright
+
+                factory = async_playwright
+            self.playwright = await factory().start()
+        return self.playwright
+
+    async def _healthy(self, warm: WarmContext) -> bool:
+        if warm.closed:
+            return False
+        try:
+            page = warm.context.pages[0] if warm.context.pages else await warm.context.new_page()
+            await page.evaluate("() => document.readyState")
+            return True
+        except Exception as exc:
+            logger.info("Warm browser for %s failed health check: %s", warm.key, exc)
+            return False
+
+    async def _reset_pages(self, warm: WarmContext) -> None:
+        try:
+            for page in list(warm.context.pages)[1:]:
+                await page.close()
+        except Exception as exc:
+            logger.debug("Could not close extra pages for %s: %s", warm.key, exc)
+
+    async def _enforce_limit(self) -> None:
+        idle = sorted(
+            (warm for warm in self.contexts.values() if warm.key not in self.in_use),
+            key=lambda warm: warm.last_used,
+        )
+        while len(idle) > self.max_idle:
+            await self._close(idle.pop(0))
+
+    async def _close(self, warm: WarmContext) -> None:
+        self.contexts.pop(warm.key, None)
+        try:
+            if not warm.closed:
+                await warm.context.close()
+        except Exception as exc:
+            logger.debug("Closing browser context for %s failed: %s", warm.key, exc)
+        finally:
+            warm.closed = True
+
+
+def profile_key(config) -> str:
+    return str(config.user_data_dir)
+
+
+def launch_signature(config) -> tuple:
+    return (config.headless, config.browser_channel, config.timezone_name)
@@ -1,15 +1,50 @@
 from __future__ import annotations
 
+import threading
 from datetime import datetime
 from pathlib import Path
 
-from src.env_utils import BotConfig, _validate
+from src.env_utils import BotConfig, ConfigError, _validate, parse_list
 
 from .db import Instance
 from .settings import profiles_dir
 
 
+# instance id -> (updated_at, {command: BotConfig or its validation error message})
+_CACHE: dict[int, tuple[str, dict[str, BotConfig | str]]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
 def build_config(instance: Instance, command: str) -> BotConfig:
+    """Return the validated config for an instance, cached until it is saved again.
+
+    Validation errors are cached as their message and raised as a new
+    ConfigError each time.
+    """
+    with _CACHE_LOCK:
+        updated_at, entries = _CACHE.get(instance.id, (None, {}))
+        if updated_at != instance.updated_at:
+            entries = {}
+            _CACHE[instance.id] = (instance.updated_at, entries)
+        cached = entries.get(command)
+    if cached is None:
+        try:
+            cached = _compile_config(instance, command)
+        except ValueError as exc:
+            cached = str(exc)
+        with _CACHE_LOCK:
+            entries[command] = cached
+    if isinstance(cached, str):
+        raise ConfigError(cached)
+    return cached
+
+
+def invalidate_config(instance_id: int) -> None:
+    with _CACHE_LOCK:
+        _CACHE.pop(instance_id, None)
+
+
+def _compile_config(instance: Instance, command: str) -> BotConfig:
     config = BotConfig(
         user_data_dir=profiles_dir() / instance.profile_name,
         target_date=datetime.strptime(instance.target_date, "%Y-%m-%d").date(),
@@ -21,6 +56,11 @@ def build_config(instance: Instance, command: str) -> BotConfig:
         poll_deadline_seconds=instance.poll_deadline_seconds,
         poll_min_seconds=instance.poll_min_seconds,
         poll_max_seconds=instance.poll_max_seconds,
+        poll_dense_seconds=instance.poll_dense_seconds,
+        poll_dense_min_seconds=instance.poll_dense_min_seconds,
+        poll_dense_max_seconds=instance.poll_dense_max_seconds,
+        sold_out_stop_attempts=instance.sold_out_stop_attempts,
+        soft_refresh_limit=instance.soft_refresh_limit,
         run_mode=instance.run_mode,
         headless=instance.headless,
         browser_channel=instance.browser_channel or None,
@@ -41,7 +81,12 @@ def build_config(instance: Instance, command: str) -> BotConfig:
         twilio_alerts_enabled=instance.twilio_alerts_enabled,
         otp_timeout_seconds=instance.otp_timeout_seconds,
         otp_poll_interval_seconds=instance.otp_poll_interval_seconds,
+        blocked_resource_types=parse_list(instance.blocked_resource_types),
+        blocked_url_patterns=parse_list(instance.blocked_url_patterns),
+        allowed_url_patterns=parse_list(instance.allowed_url_patterns),
+        parallel_preferences=instance.parallel_preferences,
     )
     Path(config.user_data_dir).mkdir(parents=True, exist_ok=True)
     _validate(config, command=command)
+    config.resolve_times()
     return config
@@ -51,6 +51,15 @@ class Instance:
     poll_max_seconds: float
     otp_timeout_seconds: int
     otp_poll_interval_seconds: float
+    blocked_resource_types: str
+    blocked_url_patterns: str
+    allowed_url_patterns: str
+    parallel_preferences: bool
+    poll_dense_seconds: int
+    poll_dense_min_seconds: float
+    poll_dense_max_seconds: float
+    sold_out_stop_attempts: int
+    soft_refresh_limit: int
     created_at: str
     updated_at: str
 
@@ -71,6 +80,7 @@ class Job:
     started_at: str | None
     finished_at: str | None
     exit_code: int | None
+    metadata: dict[str, Any]
 
 
 INSTANCE_FIELDS = (
@@ -105,6 +115,15 @@ INSTANCE_FIELDS = (
     "poll_max_seconds",
     "otp_timeout_seconds",
     "otp_poll_interval_seconds",
+    "blocked_resource_types",
+    "blocked_url_patterns",
+    "allowed_url_patterns",
+    "parallel_preferences",
+    "poll_dense_seconds",
+    "poll_dense_min_seconds",
+    "poll_dense_max_seconds",
+    "sold_out_stop_attempts",
+    "soft_refresh_limit",
     "created_at",
     "updated_at",
 )
@@ -140,6 +159,28 @@ DEFAULT_INSTANCE = {
     "poll_max_seconds": 3.6,
     "otp_timeout_seconds": 120,
     "otp_poll_interval_seconds": 3.0,
+    "blocked_resource_types": "",
+    "blocked_url_patterns": "",
+    "allowed_url_patterns": "",
+    "parallel_preferences": 0,
+    "poll_dense_seconds": 30,
+    "poll_dense_min_seconds": 0.5,
+    "poll_dense_max_seconds": 1.2,
+    "sold_out_stop_attempts": 0,
+    "soft_refresh_limit": 5,
+}
+
+
+INSTANCE_COLUMN_MIGRATIONS = {
+    "blocked_resource_types": "TEXT NOT NULL DEFAULT ''",
+    "blocked_url_patterns": "TEXT NOT NULL DEFAULT ''",
+    "allowed_url_patterns": "TEXT NOT NULL DEFAULT ''",
+    "parallel_preferences": "INTEGER NOT NULL DEFAULT 0",
+    "poll_dense_seconds": "INTEGER NOT NULL DEFAULT 30",
+    "poll_dense_min_seconds": "REAL NOT NULL DEFAULT 0.5",
+    "poll_dense_max_seconds": "REAL NOT NULL DEFAULT 1.2",
+    "sold_out_stop_attempts": "INTEGER NOT NULL DEFAULT 0",
+    "soft_refresh_limit": "INTEGER NOT NULL DEFAULT 5",
 }
 
 
@@ -189,6 +230,15 @@ def init_db() -> None:
                 poll_max_seconds REAL NOT NULL DEFAULT 3.6,
                 otp_timeout_seconds INTEGER NOT NULL DEFAULT 120,
                 otp_poll_interval_seconds REAL NOT NULL DEFAULT 3.0,
+                blocked_resource_types TEXT NOT NULL DEFAULT '',
+                blocked_url_patterns TEXT NOT NULL DEFAULT '',
+                allowed_url_patterns TEXT NOT NULL DEFAULT '',
+                parallel_preferences INTEGER NOT NULL DEFAULT 0,
+                poll_dense_seconds INTEGER NOT NULL DEFAULT 30,
+                poll_dense_min_seconds REAL NOT NULL DEFAULT 0.5,
+                poll_dense_max_seconds REAL NOT NULL DEFAULT 1.2,
+                sold_out_stop_attempts INTEGER NOT NULL DEFAULT 0,
+                soft_refresh_limit INTEGER NOT NULL DEFAULT 5,
                 created_at TEXT NOT NULL,
                 updated_at TEXT NOT NULL
             );
@@ -212,6 +262,14 @@ def init_db() -> None:
             );
             """
         )
+        _migrate_columns(conn, "instances", INSTANCE_COLUMN_MIGRATIONS)
+
+
+def _migrate_columns(conn: sqlite3.Connection, table: str, columns: dict[str, str]) -> None:
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
 
 
 def instance_from_row(row: sqlite3.Row) -> Instance:
@@ -224,6 +282,7 @@ def instance_from_row(row: sqlite3.Row) -> Instance:
         "check_morning",
         "check_afternoon",
         "twilio_alerts_enabled",
+        "parallel_preferences",
     ):
         data[key] = bool(data[key])
     return Instance(**data)
@@ -245,6 +304,7 @@ def job_from_row(row: sqlite3.Row) -> Job:
         started_at=row["started_at"],
         finished_at=row["finished_at"],
         exit_code=row["exit_code"],
+        metadata=json.loads(row["metadata_json"] or "{}"),
     )
 
 
@@ -275,6 +335,7 @@ def save_instance(values: dict[str, Any], instance_id: int | None = None) -> int
         "check_morning",
         "check_afternoon",
         "twilio_alerts_enabled",
+        "parallel_preferences",
     }
     for field in bool_fields:
         data[field] = 1 if truthy(data.get(field)) else 0
@@ -359,6 +420,60 @@ def list_jobs(limit: int = 50) -> list[Job]:
     return [job_from_row(row) for row in rows]
 
 
+def typical_job_seconds(command: str, limit: int = 20) -> float | None:
+    """Median run time of recent finished jobs for a command, if any."""
+    with _LOCK, connect() as conn:
+        rows = conn.execute(
+            """
+            SELECT started_at, finished_at FROM jobs
+            WHERE command = ? AND started_at IS NOT NULL AND finished_at IS NOT NULL
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (command, limit),
+        ).fetchall()
+    durations = sorted(
+        (datetime.fromisoformat(row["finished_at"]) - datetime.fromisoformat(row["started_at"])).total_seconds()
+        for row in rows
+    )
+    if not durations:
+        return None
+    return durations[len(durations) // 2]
+
+
+def unfinished_jobs() -> list[Job]:
+    with _LOCK, connect() as conn:
+        rows = conn.execute(
+            """
+            SELECT jobs.*, instances.name AS instance_name
+            FROM jobs
+            JOIN instances ON instances.id = jobs.instance_id
+            WHERE jobs.status IN ('queued', 'parked', 'running')
+            ORDER BY jobs.id
+            """
+        ).fetchall()
+    return [job_from_row(row) for row in rows]
+
+
+def otp_deliveries(limit: int = 200) -> list[dict[str, Any]]:
+    """OTP latency records from the most recent jobs that waited for a code."""
+    with _LOCK, connect() as conn:
+        rows = conn.execute(
+            """
+            SELECT id, metadata_json FROM jobs
+            WHERE metadata_json LIKE '%"otp"%'
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+    deliveries = []
+    for row in rows:
+        for delivery in json.loads(row["metadata_json"]).get("otp", []):
+            deliveries.append({**delivery, "job_id": row["id"]})
+    return deliveries
+
+
 def active_job_exists(instance_id: int) -> bool:
     with _LOCK, connect() as conn:
         row = conn.execute(
@@ -366,7 +481,7 @@ def active_job_exists(instance_id: int) -> bool:
             SELECT 1 FROM jobs
             WHERE instance_id = ?
               AND command = 'book'
-              AND status IN ('queued', 'running')
+              AND status IN ('queued', 'parked', 'running')
             LIMIT 1
             """,
             (instance_id,),
@@ -382,7 +497,7 @@ def scheduled_job_exists(instance_id: int, target_date: str) -> bool:
             WHERE instance_id = ?
               AND command = 'book'
               AND target_date = ?
-              AND status IN ('queued', 'running', 'succeeded')
+              AND status IN ('queued', 'parked', 'running', 'succeeded', 'cancelled')
             LIMIT 1
             """,
             (instance_id, target_date),
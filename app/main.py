@@ -1,22 +1,35 @@
 from __future__ import annotations
 
+import heapq
+import math
 from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from urllib.parse import parse_qs
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import PlainTextResponse, RedirectResponse
+from fastapi.responses import PlainTextResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from src.env_utils import BLOCKABLE_RESOURCE_TYPES, parse_list
+from src.otp_inbox import InboundSms, inbox as otp_inbox
+from src.twilio_utils import valid_webhook_signature
+
 from . import db
+from .config_builder import invalidate_config
 from .db import DEFAULT_INSTANCE
-from .runner import enqueue_job, scheduler
+from .runner import alert_outbox, enqueue_job, recover_jobs, scheduler, worker_pool
+from .settings import twilio_webhook_url
 
 
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
+ACTIVE_STATUSES = {"queued", "parked", "running"}
+EMPTY_TWIML = '<?xml version="1.0" encoding="UTF-8"?><Response></Response>'
+# Upper edges, in seconds, of the OTP latency histogram buckets.
+OTP_LATENCY_BUCKETS = (2, 5, 10, 20, 30, 60, 120)
 
 app = FastAPI(title="Buntzen Pass Bot")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
@@ -27,6 +40,8 @@ templates = Jinja2Templates(directory=TEMPLATES_DIR)
 @app.on_event("startup")
 def startup() -> None:
     db.init_db()
+    alert_outbox.start(db.db_location())
+    recover_jobs()
     scheduler.start()
 
 
@@ -34,7 +49,7 @@ def startup() -> None:
 def index(request: Request):
     instances = db.list_instances()
     jobs = db.list_jobs(limit=8)
-    active_jobs = [job for job in jobs if job.status in {"queued", "running"}]
+    active_jobs = [job for job in jobs if job.status in ACTIVE_STATUSES]
     scheduled_instances = [item for item in instances if item.enabled and item.schedule_enabled]
     return render(
         request,
@@ -66,7 +81,10 @@ def new_instance(request: Request):
 @app.post("/instances")
 async def create_instance(request: Request):
     values = await read_form(request)
-    db.save_instance(values)
+    check_instance_values(values)
+    instance_id = db.save_instance(values)
+    invalidate_config(instance_id)
+    scheduler.notify(instance_id)
     return RedirectResponse("/", status_code=303)
 
 
@@ -96,13 +114,18 @@ async def update_instance(instance_id: int, request: Request):
     for secret in ("yodel_password", "twilio_auth_token"):
         if not values.get(secret):
             values[secret] = getattr(instance, secret)
+    check_instance_values(values)
     db.save_instance(values, instance_id=instance_id)
+    invalidate_config(instance_id)
+    scheduler.notify(instance_id)
     return RedirectResponse("/", status_code=303)
 
 
 @app.post("/instances/{instance_id}/delete")
 def delete_instance(instance_id: int):
     db.delete_instance(instance_id)
+    invalidate_config(instance_id)
+    scheduler.notify(instance_id)
     return RedirectResponse("/", status_code=303)
 
 
@@ -119,12 +142,14 @@ def run_instance(instance_id: int, command: str):
 
 @app.get("/jobs")
 def jobs(request: Request):
+    jobs = db.list_jobs(limit=100)
     return render(
         request,
         "jobs.html",
         {
             "active_page": "jobs",
-            "jobs": db.list_jobs(limit=100),
+            "jobs": jobs,
+            "queue": queue_info(jobs),
             "refresh_seconds": 10,
         },
     )
@@ -141,11 +166,42 @@ def job_detail(job_id: int, request: Request):
         {
             "active_page": "jobs",
             "job": job,
-            "refresh_seconds": 10 if job.status in {"queued", "running"} else None,
+            "timeline": timeline_rows(job.metadata.get("timeline")),
+            "refresh_seconds": 10 if job.status in ACTIVE_STATUSES else None,
         },
     )
 
 
+@app.get("/otp")
+def otp_latency(request: Request):
+    return render(
+        request,
+        "otp.html",
+        {"active_page": "otp", "numbers": otp_latency_stats(db.otp_deliveries())},
+    )
+
+
+@app.get("/api/otp-latency")
+def api_otp_latency() -> dict:
+    return {"numbers": otp_latency_stats(db.otp_deliveries())}
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: int):
+    if db.get_job(job_id) is None:
+        raise HTTPException(status_code=404)
+    worker_pool.cancel(job_id, "Cancelled from the dashboard.")
+    return RedirectResponse(f"/jobs/{job_id}", status_code=303)
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+def api_cancel_job(job_id: int) -> dict:
+    if db.get_job(job_id) is None:
+        raise HTTPException(status_code=404)
+    cancelled = worker_pool.cancel(job_id, "Cancelled through the API.")
+    return {"job_id": job_id, "cancelled": cancelled, "status": db.get_job(job_id).status}
+
+
 @app.get("/jobs/{job_id}/log", response_class=PlainTextResponse)
 def job_log(job_id: int) -> str:
     job = db.get_job(job_id)
@@ -157,9 +213,40 @@ def job_log(job_id: int) -> str:
     return path.read_text(encoding="utf-8", errors="replace")[-20000:]
 
 
-async def read_form(request: Request) -> dict[str, str]:
+@app.post("/twilio/sms")
+async def twilio_sms(request: Request):
+    """Inbound SMS webhook; hands OTP messages straight to waiting jobs."""
+    parsed = await read_params(request)
+    params = {key: items[-1] if items else "" for key, items in parsed.items()}
+    signature = request.headers.get("X-Twilio-Signature", "")
+    url = twilio_webhook_url() or str(request.url)
+    tokens = {
+        instance.twilio_auth_token
+        for instance in db.list_instances()
+        if instance.twilio_auth_token and instance.twilio_account_sid == params.get("AccountSid")
+    }
+    if not any(valid_webhook_signature(token, url, params, signature) for token in tokens):
+        raise HTTPException(status_code=403, detail="Invalid Twilio signature")
+    otp_inbox.deliver(
+        InboundSms(
+            sid=params.get("MessageSid") or params.get("SmsSid"),
+            to=params.get("To", ""),
+            from_=params.get("From"),
+            body=params.get("Body", ""),
+            date_sent=datetime.now(timezone.utc),
+            source="webhook",
+        )
+    )
+    return Response(EMPTY_TWIML, media_type="application/xml")
+
+
+async def read_params(request: Request) -> dict[str, list[str]]:
     body = (await request.body()).decode("utf-8")
-    parsed = parse_qs(body, keep_blank_values=True)
+    return parse_qs(body, keep_blank_values=True)
+
+
+async def read_form(request: Request) -> dict[str, str]:
+    parsed = await read_params(request)
     values = {key: items[-1] if items else "" for key, items in parsed.items()}
     for checkbox in (
         "enabled",
@@ -169,11 +256,25 @@ async def read_form(request: Request) -> dict[str, str]:
         "check_morning",
         "check_afternoon",
         "twilio_alerts_enabled",
+        "parallel_preferences",
     ):
         values[checkbox] = "1" if checkbox in parsed else "0"
     return values
 
 
+def check_instance_values(values: dict[str, str]) -> None:
+    """Reject instance settings that would only fail once a job starts."""
+    blocked_types = parse_list(values.get("blocked_resource_types"))
+    unknown = sorted(set(blocked_types) - BLOCKABLE_RESOURCE_TYPES)
+    if unknown:
+        valid = ", ".join(sorted(BLOCKABLE_RESOURCE_TYPES))
+        raise HTTPException(
+            status_code=400,
+            detail=f"Blocked Request Types has unsupported types {', '.join(unknown)}; use: {valid}.",
+        )
+    values["blocked_resource_types"] = ",".join(blocked_types)
+
+
 def render(request: Request, template: str, context: dict):
     return templates.TemplateResponse(request, template, context)
 
@@ -183,3 +284,119 @@ def instance_values(instance: db.Instance | None) -> dict:
     if instance is not None:
         values.update(asdict(instance))
     return values
+
+
+def timeline_rows(timeline: dict | None) -> list[dict]:
+    """Lay out recorded step spans as bars scaled to the span of the run."""
+    spans = sorted((timeline or {}).get("spans", []), key=lambda span: span["start_ms"])
+    if not spans:
+        return []
+    first = spans[0]["start_ms"]
+    total = max(span["start_ms"] + span["duration_ms"] for span in spans) - first or 1.0
+    return [
+        {
+            **span,
+            "left": (span["start_ms"] - first) / total * 100,
+            "width": max(span["duration_ms"] / total * 100, 0.4),
+        }
+        for span in spans
+    ]
+
+
+def otp_latency_stats(deliveries: list[dict]) -> list[dict]:
+    """Per-number histogram and percentiles of OTP delivery latency.
+
+    Delivery latency is the time from requesting a code to Twilio receiving
+    the SMS; seen latency adds the time until the waiting job picked it up.
+    """
+    by_number: dict[str, list[dict]] = {}
+    for delivery in deliveries:
+        if delivery.get("delivery_seconds") is not None:
+            by_number.setdefault(delivery.get("number") or "unknown", []).append(delivery)
+    stats = []
+    for number, items in sorted(by_number.items()):
+        delivered = sorted(item["delivery_seconds"] for item in items)
+        seen = sorted(item["seen_seconds"] for item in items if item.get("seen_seconds") is not None)
+        counts = [0] * (len(OTP_LATENCY_BUCKETS) + 1)
+        for value in delivered:
+            counts[next((i for i, edge in enumerate(OTP_LATENCY_BUCKETS) if value < edge), len(OTP_LATENCY_BUCKETS))] += 1
+        labels = [f"< {edge}s" for edge in OTP_LATENCY_BUCKETS] + [f"≥ {OTP_LATENCY_BUCKETS[-1]}s"]
+        stats.append(
+            {
+                "number": number,
+                "count": len(delivered),
+                "p50": _percentile(delivered, 0.5),
+                "p90": _percentile(delivered, 0.9),
+                "max": delivered[-1],
+                "seen_p50": _percentile(seen, 0.5) if seen else None,
+                "buckets": [
+                    {"label": label, "count": count, "width": count / len(delivered) * 100}
+                    for label, count in zip(labels, counts)
+                ],
+            }
+        )
+    return stats
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    return values[min(len(values) - 1, math.ceil(fraction * len(values)) - 1)]
+
+
+def queue_info(jobs: list[db.Job]) -> dict[int, dict]:
+    """Queue position and expected start for jobs that are not running yet.
+
+    Parked bookings start at their prep time. A job waiting for a slot starts
+    once the jobs holding the pool's slots and the jobs queued ahead of it have
+    run, each taking the median run time of recent jobs of its own command.
+    """
+    positions = worker_pool.queue_positions()
+    holders = worker_pool.slot_holders()
+    commands = {job.id: job.command for job in jobs}
+    typical: dict[str, float | None] = {}
+
+    def run_seconds(job_id: int) -> float | None:
+        if job_id not in commands:
+            job = db.get_job(job_id)
+            commands[job_id] = job.command if job else ""
+        command = commands[job_id]
+        if command not in typical:
+            typical[command] = db.typical_job_seconds(command) if command else None
+        return typical[command]
+
+    now = datetime.now(timezone.utc)
+    info: dict[int, dict] = {}
+    for job in jobs:
+        if job.status == "parked":
+            info[job.id] = {"position": "Parked", "expected": job.metadata.get("parked_until")}
+        elif job.id in positions:
+            pool, position, size = positions[job.id]
+            ahead = [
+                run_seconds(other)
+                for other, (other_pool, other_position, _) in positions.items()
+                if other_pool == pool and other_position < position
+            ]
+            remaining = []
+            for holder, admitted_at in holders.get(pool, {}).items():
+                seconds = run_seconds(holder)
+                remaining.append(None if seconds is None else max(seconds - (now.timestamp() - admitted_at), 0.0))
+            wait = estimate_wait(ahead, remaining, size)
+            expected = None
+            if wait is not None:
+                expected = (now + timedelta(seconds=wait)).isoformat(timespec="seconds")
+            info[job.id] = {"position": f"#{position} for a {pool} slot", "expected": expected}
+    return info
+
+
+def estimate_wait(ahead: list[float | None], remaining: list[float | None], size: int) -> float | None:
+    """Seconds until a slot frees for the next job in a pool of ``size`` slots.
+
+    ``remaining`` is the time left on each running job and ``ahead`` the run
+    time of each job queued before this one; None if any of them is unknown.
+    """
+    if None in ahead or None in remaining:
+        return None
+    free = sorted(remaining)[:size] + [0.0] * max(size - len(remaining), 0)
+    heapq.heapify(free)
+    for seconds in ahead:
+        heapq.heapreplace(free, free[0] + seconds)
+    return free[0]
@@ -1,69 +1,323 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import itertools
 import logging
-import queue
 import threading
+import time
 import os
 from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
 
-from playwright.sync_api import sync_playwright
-
-from run import open_persistent_context, run_auth_check, run_book, run_dry_run
+from run import run_auth_check, run_book, run_dry_run
+from src.alert_outbox import AlertOutbox
 from src.booking import BookingError, BookingBot
+from src.cancellation import CancelToken, JobCancelled
 from src.diagnostics import Diagnostics
+from src.scheduler import sleep_until
 from src.twilio_utils import TwilioService
 
 from . import db
+from .browser_pool import BrowserPool
 from .config_builder import build_config
-from .settings import artifacts_dir, max_concurrent_jobs
+from .settings import (
+    artifacts_dir,
+    browser_idle_seconds,
+    browser_pool_size,
+    job_budget_seconds,
+    max_concurrent_jobs,
+    max_firing_jobs,
+    max_prepping_jobs,
+)
 
 
 logger = logging.getLogger("buntzen_pass_bot.app.runner")
+WORKER_TICK_SECONDS = 1.0
+# Re-check a scheduled instance this long after its booking job ends, so a
+# failed run is retried within the release window without a tight loop.
+SCHEDULE_RETRY_SECONDS = 20.0
+# Upper bound on one scheduler sleep, to recover from wall-clock steps.
+SCHEDULER_MAX_SLEEP_SECONDS = 300.0
+CURRENT_JOB: ContextVar[int | None] = ContextVar("current_job", default=None)
+
+
+# Admission order under contention: bookings (by release time), then auth
+# checks, then dry runs.
+LANES = {"book": 0, "auth-check": 1, "dry-run": 2}
+
+
+class PrioritySlots:
+    """A counting semaphore that admits waiters in priority order, not FIFO.
+
+    A released slot is handed straight to the best waiter, so a later,
+    lower-priority arrival cannot take it first. The waiting list is guarded
+    by a thread lock so the web UI can read queue positions.
+    """
+
+    def __init__(self, name: str, size: int) -> None:
+        self.name = name
+        self.size = size
+        self.in_use = 0
+        # job id -> wall-clock time it was admitted, for jobs holding a slot.
+        self.holders: dict[int, float] = {}
+        self.waiters: list[tuple[tuple, int, int | None, asyncio.Future]] = []
+        self.lock = threading.Lock()
+        self._order = itertools.count()
+
+    def locked(self) -> bool:
+        return self.in_use >= self.size
+
+    async def acquire(self, priority: tuple = (), job_id: int | None = None) -> None:
+        with self.lock:
+            if self.in_use < self.size and not self.waiters:
+                self.in_use += 1
+                if job_id is not None:
+                    self.holders[job_id] = time.time()
+                return
+            entry = (priority, next(self._order), job_id, asyncio.get_running_loop().create_future())
+            heapq.heappush(self.waiters, entry)
+        try:
+            await entry[3]
+        except asyncio.CancelledError:
+            with self.lock:
+                if entry in self.waiters:
+                    self.waiters.remove(entry)
+                    heapq.heapify(self.waiters)
+            if entry[3].done() and not entry[3].cancelled():
+                self.release(job_id)
+            raise
+
+    def release(self, job_id: int | None = None) -> None:
+        with self.lock:
+            self.holders.pop(job_id, None)
+            while self.waiters:
+                _, _, waiter_id, future = heapq.heappop(self.waiters)
+                if not future.done():
+                    future.set_result(None)
+                    if waiter_id is not None:
+                        self.holders[waiter_id] = time.time()
+                    return
+            self.in_use -= 1
+
+    def queue(self) -> list[int]:
+        """Waiting job ids, next to be admitted first."""
+        with self.lock:
+            return [entry[2] for entry in sorted(self.waiters) if entry[2] is not None]
+
+
+class Capacity:
+    """Admission pools for jobs that hold a browser.
+
+    Auth checks and dry runs take a work slot. Booking jobs take a prepping
+    slot once their prep window opens and trade it for a firing slot just
+    before release. Parked bookings, still waiting for prep, hold nothing.
+    """
+
+    def __init__(self, work: int, prepping: int, firing: int) -> None:
+        self.work = PrioritySlots("work", work)
+        self.prepping = PrioritySlots("prepping", prepping)
+        self.firing = PrioritySlots("firing", firing)
+
+    def pools(self) -> tuple[PrioritySlots, ...]:
+        return (self.firing, self.prepping, self.work)
+
+
+class Admission:
+    """The capacity slot a single job currently holds."""
+
+    def __init__(self, job_id: int | None = None, priority: tuple = ()) -> None:
+        self.job_id = job_id
+        self.priority = priority
+        self.held: PrioritySlots | None = None
+
+    async def enter(self, pool: PrioritySlots) -> None:
+        await pool.acquire(self.priority, self.job_id)
+        self.leave()
+        self.held = pool
+
+    def leave(self) -> None:
+        if self.held is not None:
+            self.held.release(self.job_id)
+            self.held = None
 
 
 class WorkerPool:
+    """Runs every booking job as a task on one background event loop."""
+
     def __init__(self) -> None:
-        self.queue: queue.Queue[int] = queue.Queue()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.queue: asyncio.Queue[int] | None = None
         self.started = False
-        self.workers: list[threading.Thread] = []
+        self.ready = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.tasks: set[asyncio.Task] = set()
+        self.capacity: Capacity | None = None
+        self.tokens: dict[int, CancelToken] = {}
 
     def start(self) -> None:
         if self.started:
             return
         self.started = True
-        for index in range(max_concurrent_jobs()):
-            thread = threading.Thread(target=self._worker, name=f"booking-worker-{index + 1}", daemon=True)
-            thread.start()
-            self.workers.append(thread)
+        self.thread = threading.Thread(target=asyncio.run, args=(self._main(),), name="booking-engine", daemon=True)
+        self.thread.start()
+        self.ready.wait()
 
     def enqueue(self, job_id: int) -> None:
         self.start()
-        self.queue.put(job_id)
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, job_id)
+
+    async def _main(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        browsers = BrowserPool(idle_seconds=browser_idle_seconds(), max_idle=browser_pool_size())
+        capacity = Capacity(work=max_concurrent_jobs(), prepping=max_prepping_jobs(), firing=max_firing_jobs())
+        self.capacity = capacity
+        maintenance = asyncio.create_task(self._maintain(browsers), name="browser-maintenance")
+        self.ready.set()
+        try:
+            while True:
+                job_id = await self.queue.get()
+                token = CancelToken()
+                task = asyncio.create_task(self._run(job_id, browsers, capacity, token), name=f"booking-job-{job_id}")
+                token.bind(task)
+                self.tokens[job_id] = token
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+                task.add_done_callback(lambda _, job_id=job_id: self.tokens.pop(job_id, None))
+        finally:
+            maintenance.cancel()
+
+    def queue_positions(self) -> dict[int, tuple[str, int, int]]:
+        """Map waiting job ids to (pool name, 1-based position, pool size)."""
+        positions: dict[int, tuple[str, int, int]] = {}
+        if self.capacity is None:
+            return positions
+        for pool in self.capacity.pools():
+            for index, job_id in enumerate(pool.queue(), start=1):
+                positions.setdefault(job_id, (pool.name, index, pool.size))
+        return positions
+
+    def slot_holders(self) -> dict[str, dict[int, float]]:
+        """Map pool names to {job id: admitted at} for the jobs holding their slots."""
+        if self.capacity is None:
+            return {}
+        return {pool.name: dict(pool.holders) for pool in self.capacity.pools()}
 
-    def _worker(self) -> None:
+    async def _maintain(self, browsers: BrowserPool) -> None:
         while True:
-            job_id = self.queue.get()
-            try:
-                run_job(job_id)
-            except Exception:
-                logger.exception("Unhandled job failure for job %s", job_id)
-                db.update_job(
-                    job_id,
-                    status="failed",
-                    message="Unhandled worker failure. Check application logs.",
-                    finished_at=db.utc_now(),
-                    exit_code=99,
-                )
-            finally:
-                self.queue.task_done()
+            await asyncio.sleep(WORKER_TICK_SECONDS)
+            await browsers.maintain()
+
+    def cancel(self, job_id: int, reason: str) -> bool:
+        """Cancel a queued, parked or running job; returns False if it is not active."""
+        token = self.tokens.get(job_id)
+        if token is not None:
+            return token.cancel(reason)
+        job = db.get_job(job_id)
+        if job is None or job.status not in {"queued", "parked", "running"}:
+            return False
+        # Not started in this process: it is still in the queue or was orphaned.
+        db.update_job(job_id, status="cancelled", message=reason, finished_at=db.utc_now(), exit_code=130)
+        return True
+
+    async def _run(self, job_id: int, browsers: BrowserPool, capacity: Capacity, token: CancelToken) -> None:
+        try:
+            await run_job(job_id, browsers=browsers, capacity=capacity, cancel_token=token)
+        except Exception:
+            logger.exception("Unhandled job failure for job %s", job_id)
+            db.update_job(
+                job_id,
+                status="failed",
+                message="Unhandled worker failure. Check application logs.",
+                finished_at=db.utc_now(),
+                exit_code=99,
+            )
+        finally:
+            self.queue.task_done()
 
 
 worker_pool = WorkerPool()
 
 
+def twilio_client_for(account_sid: str):
+    """A Twilio client for alerts queued by an earlier process."""
+    for instance in db.list_instances():
+        if instance.twilio_account_sid == account_sid and instance.twilio_auth_token:
+            from twilio.rest import Client
+
+            return Client(instance.twilio_account_sid, instance.twilio_auth_token)
+    return None
+
+
+alert_outbox = AlertOutbox(client_factory=twilio_client_for)
+
+
+def recover_jobs() -> None:
+    """Settle jobs a previous process left queued, parked or running.
+
+    Running jobs lost their browser mid-step, so they are marked interrupted;
+    the scheduler retries a scheduled booking while its window is open.
+    Queued and parked jobs are queued again, bookings first in release order,
+    unless their release window has already closed.
+    """
+    started = time.perf_counter()
+    now = time.time()
+    bookings: list[tuple[float, int]] = []
+    others: list[int] = []
+    interrupted = 0
+    for job in db.unfinished_jobs():
+        if job.status == "running":
+            _interrupt(job.id, "Interrupted by an app restart.")
+            interrupted += 1
+        elif job.command != "book":
+            others.append(job.id)
+        else:
+            release_at = _recoverable_release(job, now)
+            if release_at is None:
+                _interrupt(job.id, "Release window closed while the app was down.")
+                interrupted += 1
+            else:
+                bookings.append((release_at, job.id))
+    requeued = [job_id for _, job_id in sorted(bookings)] + others
+    for job_id in requeued:
+        worker_pool.enqueue(job_id)
+    logger.info(
+        "Job recovery took %.1f ms: %s re-queued, %s interrupted.",
+        (time.perf_counter() - started) * 1000,
+        len(requeued),
+        interrupted,
+    )
+
+
+def _recoverable_release(job: db.Job, now: float) -> float | None:
+    """Release timestamp of a booking job that can still run, else None."""
+    instance = db.get_instance(job.instance_id)
+    if instance is None or instance.target_date != job.target_date:
+        return None
+    try:
+        config = build_config(instance, command="book")
+    except Exception as exc:
+        logger.warning("Cannot recover job %s: %s", job.id, exc)
+        return None
+    if now > release_window_end(config):
+        return None
+    return config.release_at.timestamp()
+
+
+def _interrupt(job_id: int, message: str) -> None:
+    logger.warning("Job %s: %s", job_id, message)
+    db.update_job(job_id, status="interrupted", message=message, finished_at=db.utc_now())
+
+
+def release_window_end(config) -> float:
+    """When a booking for this release is no longer worth starting."""
+    return config.release_at.timestamp() + config.poll_deadline_seconds + 300
+
+
 def enqueue_job(instance_id: int, command: str, run_mode: str | None = None) -> int:
     instance = db.get_instance(instance_id)
     if instance is None:
@@ -76,10 +330,15 @@ def enqueue_job(instance_id: int, command: str, run_mode: str | None = None) ->
     return job_id
 
 
-def run_job(job_id: int) -> None:
+async def run_job(
+    job_id: int,
+    browsers: BrowserPool | None = None,
+    capacity: Capacity | None = None,
+    cancel_token: CancelToken | None = None,
+) -> None:
     os.environ.setdefault("APPDATA_DIR", str(Path("appdata").resolve()))
     job = db.get_job(job_id)
-    if job is None:
+    if job is None or job.status == "cancelled":
         return
     instance = db.get_instance(job.instance_id)
     if instance is None:
@@ -91,7 +350,6 @@ def run_job(job_id: int) -> None:
     log_path = job_dir / "job.log"
     db.update_job(
         job_id,
-        status="running",
         started_at=db.utc_now(),
         log_path=str(log_path),
         artifact_dir=str(job_dir),
@@ -101,7 +359,7 @@ def run_job(job_id: int) -> None:
     exit_code = 1
     message = "Job did not finish."
     try:
-        with job_logging(log_path):
+        with job_logging(log_path, job_id):
             logging.info("Starting %s job %s for %s", job.command, job_id, instance.name)
             config = build_config(instance, command=job.command)
             if job.command == "dry-run":
@@ -110,12 +368,31 @@ def run_job(job_id: int) -> None:
                 config = replace(config, run_mode=job.run_mode)
 
             diagnostics = Diagnostics(base_dir=job_dir)
-            twilio = TwilioService.from_config(config)
-            with sync_playwright() as playwright:
-                context = open_persistent_context(playwright, config)
+            twilio = TwilioService.from_config(config, outbox=alert_outbox)
+            own_pool = browsers is None
+            if own_pool:
+                browsers = BrowserPool(idle_seconds=0, max_idle=0)
+            if capacity is None:
+                capacity = Capacity(work=1, prepping=1, firing=1)
+            release_key = config.release_at.timestamp() if job.command == "book" else 0.0
+            admission = Admission(job_id, priority=(LANES.get(job.command, len(LANES)), release_key, job_id))
+            context = None
+            healthy = False
+            try:
+                if job.command == "book":
+                    await park_until_prep(job_id, config)
+                    await enter_phase(job_id, admission, capacity.prepping, "prepping")
+                else:
+                    await enter_phase(job_id, admission, capacity.work, "running")
+                if cancel_token is not None:
+                    budget = job_budget_seconds(job.command)
+                    if job.command == "book":
+                        budget += max(0.0, (config.release_at - datetime.now(config.timezone)).total_seconds())
+                    cancel_token.start_budget(budget)
+                context = await browsers.acquire(config)
                 context.set_default_timeout(config.default_timeout_ms)
-                context.tracing.start(screenshots=True, snapshots=True, sources=True)
-                page = context.pages[0] if context.pages else context.new_page()
+                await context.tracing.start(screenshots=True, snapshots=True, sources=True)
+                page = context.pages[0] if context.pages else await context.new_page()
                 bot = BookingBot(
                     page=page,
                     context=context,
@@ -123,66 +400,147 @@ def run_job(job_id: int) -> None:
                     twilio=twilio,
                     diagnostics=diagnostics,
                     interactive_manual=False,
+                    cancel_token=cancel_token,
                 )
+                await bot.start()
                 try:
-                    try:
-                        if job.command == "auth-check":
-                            exit_code = run_auth_check(bot)
-                        elif job.command == "dry-run":
-                            exit_code = run_dry_run(bot)
-                        elif job.command == "book":
-                            exit_code = run_book(bot)
-                        else:
-                            raise ValueError(f"Unknown job command: {job.command}")
-                    except BookingError as exc:
-                        logging.error("Booking error: %s", exc)
-                        bot.capture_failure("booking-error")
-                        exit_code = 5
-                    finally:
-                        trace_path = diagnostics.path_for("trace", "zip")
-                        try:
-                            context.tracing.stop(path=str(trace_path))
-                        except Exception as exc:
-                            logging.warning("Could not save trace: %s", exc)
+                    if job.command == "auth-check":
+                        exit_code = await run_auth_check(bot)
+                    elif job.command == "dry-run":
+                        exit_code = await run_dry_run(bot)
+                    elif job.command == "book":
+                        exit_code = await run_book(
+                            bot,
+                            enter_firing=lambda: enter_phase(job_id, admission, capacity.firing, "firing"),
+                        )
+                    else:
+                        raise ValueError(f"Unknown job command: {job.command}")
+                except BookingError as exc:
+                    logging.error("Booking error: %s", exc)
+                    await bot.capture_failure("booking-error")
+                    exit_code = 5
                 finally:
-                    context.close()
+                    await bot.close()
+                    metadata = {"timeline": bot.timeline.as_dict(), "clock": bot.clock.as_dict()}
+                    if bot.otp_deliveries:
+                        metadata["otp"] = bot.otp_deliveries
+                    db.append_job_metadata(job_id, metadata)
+                    trace_path = diagnostics.path_for("trace", "zip")
+                    try:
+                        await context.tracing.stop(path=str(trace_path))
+                    except Exception as exc:
+                        logging.warning("Could not save trace: %s", exc)
+                healthy = True
+            finally:
+                if context is not None:
+                    await browsers.release(config, healthy=healthy)
+                admission.leave()
+                if own_pool:
+                    await browsers.close_all()
 
             message = "Job completed." if exit_code == 0 else f"Job exited with code {exit_code}."
+    except (asyncio.CancelledError, JobCancelled):
+        if cancel_token is None or not cancel_token.cancelled:
+            raise
+        message = cancel_token.reason or "Job was cancelled."
+        exit_code = 124 if cancel_token.timed_out else 130
+        logger.warning("Job %s stopped: %s", job_id, message)
     except Exception as exc:
         logger.exception("Job %s failed", job_id)
         message = str(exc)
         exit_code = 1
+    finally:
+        if cancel_token is not None:
+            cancel_token.stop_budget()
 
-    db.update_job(
-        job_id,
-        status="succeeded" if exit_code == 0 else "failed",
-        message=message,
-        finished_at=db.utc_now(),
-        exit_code=exit_code,
-    )
+    status = "succeeded" if exit_code == 0 else "cancelled" if exit_code == 130 else "failed"
+    db.update_job(job_id, status=status, message=message, finished_at=db.utc_now(), exit_code=exit_code)
+    if job.command == "book" and status != "cancelled":
+        scheduler.notify(job.instance_id, delay_seconds=SCHEDULE_RETRY_SECONDS)
+
+
+async def park_until_prep(job_id: int, config) -> None:
+    """Wait for the prep window without holding a capacity slot or a browser."""
+    if not config.schedule or datetime.now(config.timezone) >= config.prep_at:
+        return
+    logging.info("Parking until prep window at %s", config.prep_at.isoformat())
+    db.update_job(job_id, status="parked", message=f"Parked until prep at {config.prep_at:%Y-%m-%d %H:%M %Z}.")
+    db.append_job_metadata(job_id, {"parked_until": config.prep_at.isoformat()})
+    await sleep_until(config.prep_at, config.timezone)
+
+
+async def enter_phase(job_id: int, admission: Admission, pool: PrioritySlots, phase: str) -> None:
+    started = time.monotonic()
+    if pool.locked() and admission.held is None:
+        db.update_job(job_id, status="queued", message=f"Waiting for a {pool.name} slot.")
+    await admission.enter(pool)
+    logging.info("Entered %s phase after %.1fs waiting for a slot.", phase, time.monotonic() - started)
+    db.update_job(job_id, status="running", message=f"{phase.capitalize()}.")
+    db.append_job_metadata(job_id, {f"{phase}_at": db.utc_now()})
+
+
+_JOB_LOGS_LOCK = threading.Lock()
+_JOB_LOGS = {"open": 0, "previous_level": logging.NOTSET}
+
+
+class JobLogFilter(logging.Filter):
+    """Keeps a job's log file to records emitted while that job is running."""
+
+    def __init__(self, job_id: int) -> None:
+        super().__init__()
+        self.job_id = job_id
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return CURRENT_JOB.get() == self.job_id
 
 
 @contextmanager
-def job_logging(path: Path):
+def job_logging(path: Path, job_id: int):
     path.parent.mkdir(parents=True, exist_ok=True)
     handler = logging.FileHandler(path, encoding="utf-8")
     handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    handler.addFilter(JobLogFilter(job_id))
     root = logging.getLogger()
-    previous_level = root.level
-    root.setLevel(logging.INFO)
+    with _JOB_LOGS_LOCK:
+        if not _JOB_LOGS["open"]:
+            _JOB_LOGS["previous_level"] = root.level
+            if root.level > logging.INFO or root.level == logging.NOTSET:
+                root.setLevel(logging.INFO)
+        _JOB_LOGS["open"] += 1
     root.addHandler(handler)
+    token = CURRENT_JOB.set(job_id)
     try:
         yield
     finally:
+        CURRENT_JOB.reset(token)
         root.removeHandler(handler)
-        root.setLevel(previous_level)
+        with _JOB_LOGS_LOCK:
+            _JOB_LOGS["open"] -= 1
+            # Jobs overlap, so the level is restored once the last one is done.
+            if not _JOB_LOGS["open"]:
+                root.setLevel(_JOB_LOGS["previous_level"])
         handler.close()
 
 
 class Scheduler:
+    """Queues scheduled bookings the moment their prep window opens.
+
+    Keeps a heap of each instance's next due time and sleeps until the
+    earliest one, so idle cost does not grow with the number of instances.
+    Instance edits and finished booking jobs call notify, which wakes the loop
+    to recompute just that instance.
+    """
+
     def __init__(self) -> None:
         self.thread: threading.Thread | None = None
         self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.lock = threading.Lock()
+        self.pending: dict[int, float] = {}
+        self.heap: list[tuple[float, int]] = []
+        self.due: dict[int, float] = {}
+        # (instance id, updated_at) of invalid instances already warned about.
+        self.reported: set[tuple[int, str]] = set()
 
     def start(self) -> None:
         worker_pool.start()
@@ -191,26 +549,82 @@ class Scheduler:
         self.thread = threading.Thread(target=self._loop, name="booking-scheduler", daemon=True)
         self.thread.start()
 
+    def notify(self, instance_id: int, delay_seconds: float = 0.0) -> None:
+        """Recompute an instance's schedule, no earlier than delay_seconds from now."""
+        with self.lock:
+            self.pending[instance_id] = time.time() + delay_seconds
+        self.wake_event.set()
+
     def _loop(self) -> None:
+        self.reload()
         while not self.stop_event.is_set():
-            self.check_once()
-            self.stop_event.wait(20)
+            self.wake_event.clear()
+            self.apply_pending()
+            self.check_due()
+            self.wake_event.wait(self.seconds_until_next())
 
-    def check_once(self) -> None:
+    def reload(self) -> None:
+        self.heap.clear()
+        self.due.clear()
         for instance in db.list_instances():
-            if not instance.enabled or not instance.schedule_enabled:
+            self._schedule(instance)
+
+    def apply_pending(self) -> None:
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for instance_id, not_before in pending.items():
+            self.due.pop(instance_id, None)
+            instance = db.get_instance(instance_id)
+            if instance is not None:
+                self._schedule(instance, not_before)
+
+    def check_due(self) -> None:
+        now = time.time()
+        while self.heap and self.heap[0][0] <= now:
+            due_at, instance_id = heapq.heappop(self.heap)
+            if self.due.get(instance_id) != due_at:
                 continue
-            try:
-                config = build_config(instance, command="book")
-            except Exception as exc:
-                logger.warning("Skipping invalid scheduled instance %s: %s", instance.name, exc)
+            del self.due[instance_id]
+            instance = db.get_instance(instance_id)
+            if instance is None:
                 continue
-            now = datetime.now(config.timezone)
-            release_window_end = config.release_at.timestamp() + config.poll_deadline_seconds + 300
-            if now >= config.prep_at and now.timestamp() <= release_window_end:
-                if not db.scheduled_job_exists(instance.id, instance.target_date):
-                    logger.info("Queueing scheduled booking for %s", instance.name)
-                    enqueue_job(instance.id, "book", run_mode=instance.run_mode)
+            window = self._window(instance)
+            if window is None or now > window[1]:
+                continue
+            if not db.scheduled_job_exists(instance.id, instance.target_date):
+                logger.info("Queueing scheduled booking for %s", instance.name)
+                enqueue_job(instance.id, "book", run_mode=instance.run_mode)
+
+    def seconds_until_next(self) -> float:
+        while self.heap and self.due.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return SCHEDULER_MAX_SLEEP_SECONDS
+        return min(max(self.heap[0][0] - time.time(), 0.0), SCHEDULER_MAX_SLEEP_SECONDS)
+
+    def _schedule(self, instance: db.Instance, not_before: float = 0.0) -> None:
+        window = self._window(instance)
+        if window is None:
+            return
+        prep_at, window_end = window
+        due_at = max(prep_at, not_before)
+        if due_at > window_end:
+            return
+        self.due[instance.id] = due_at
+        heapq.heappush(self.heap, (due_at, instance.id))
+
+    def _window(self, instance: db.Instance) -> tuple[float, float] | None:
+        if not instance.enabled or not instance.schedule_enabled:
+            return None
+        try:
+            config = build_config(instance, command="book")
+        except Exception as exc:
+            key = (instance.id, instance.updated_at)
+            if key not in self.reported:
+                logger.warning("Skipping invalid scheduled instance %s: %s", instance.name, exc)
+                self.reported.add(key)
+            return None
+        return config.prep_at.timestamp(), release_window_end(config)
 
 
 scheduler = Scheduler()
@@ -33,3 +33,42 @@ def max_concurrent_jobs() -> int:
     except ValueError:
         value = 2
     return max(1, min(value, 8))
+
+
+def browser_idle_seconds() -> int:
+    return _bounded_int("BROWSER_IDLE_SECONDS", default=900, minimum=0, maximum=24 * 3600)
+
+
+def browser_pool_size() -> int:
+    return _bounded_int("BROWSER_POOL_SIZE", default=1, minimum=0, maximum=8)
+
+
+def max_prepping_jobs() -> int:
+    return _bounded_int("MAX_PREPPING_JOBS", default=4, minimum=1, maximum=16)
+
+
+def max_firing_jobs() -> int:
+    return _bounded_int("MAX_FIRING_JOBS", default=4, minimum=1, maximum=16)
+
+
+def twilio_webhook_url() -> str | None:
+    """Public URL Twilio posts inbound SMS to, when a proxy changes the URL the app sees."""
+    return os.getenv("TWILIO_WEBHOOK_URL", "").strip() or None
+
+
+def _bounded_int(name: str, default: int, minimum: int, maximum: int) -> int:
+    try:
+        value = int(os.getenv(name, str(default)))
+    except ValueError:
+        value = default
+    return max(minimum, min(value, maximum))
+
+
+# Default time budgets per command, counted once the job is admitted. For
+# bookings the budget counts from release, since prep ends at release anyway.
+JOB_BUDGET_DEFAULTS = {"auth-check": 600, "dry-run": 900, "book": 900}
+
+
+def job_budget_seconds(command: str) -> int:
+    name = command.upper().replace("-", "_") + "_BUDGET_SECONDS"
+    return _bounded_int(name, default=JOB_BUDGET_DEFAULTS.get(command, 900), minimum=30, maximum=24 * 3600)
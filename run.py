@@ -4,11 +4,14 @@ CLI entry point for the fully unattended Buntzen Pass Bot.
 from __future__ import annotations
 
 import argparse
+import asyncio
+import json
 import logging
 import sys
-import time
 from dataclasses import replace
-from datetime import datetime
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable
 
 try:
     from dotenv import load_dotenv
@@ -16,12 +19,19 @@ except ImportError:
     def load_dotenv(*args, **kwargs):
         return False
 
+from src.alert_outbox import AlertOutbox
 from src.diagnostics import Diagnostics
 from src.env_utils import ConfigError, load_config
 from src.scheduler import sleep_until, wait_with_keepalive
 from src.twilio_utils import TwilioService
 
 
+STAGE_SECONDS_BEFORE_RELEASE = 60
+# How long the CLI waits at exit for queued alerts to go out; anything still
+# undelivered stays in the outbox for the next run.
+ALERT_FLUSH_SECONDS = 15
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Buntzen pass booking bot")
     parser.add_argument(
@@ -50,7 +60,7 @@ def configure_logging(level: str) -> None:
     )
 
 
-def open_persistent_context(playwright, config):
+async def open_persistent_context(playwright, config):
     launch_kwargs = {
         "user_data_dir": str(config.user_data_dir),
         "headless": config.headless,
@@ -64,80 +74,97 @@ def open_persistent_context(playwright, config):
     }
     if config.browser_channel:
         launch_kwargs["channel"] = config.browser_channel
-    return playwright.chromium.launch_persistent_context(**launch_kwargs)
+    return await playwright.chromium.launch_persistent_context(**launch_kwargs)
 
 
-def run_auth_check(bot: BookingBot) -> int:
-    ok = bot.ensure_authenticated()
+async def run_auth_check(bot: BookingBot) -> int:
+    ok = await bot.ensure_authenticated()
     if ok:
-        bot.alert("Buntzen bot auth-check passed. Yodel session is ready.")
+        await bot.alert("Buntzen bot auth-check passed. Yodel session is ready.")
         return 0
-    bot.alert("Buntzen bot auth-check failed. See diagnostics for details.", urgent=True)
+    await bot.alert("Buntzen bot auth-check failed. See diagnostics for details.", urgent=True)
     return 2
 
 
-def run_dry_run(bot: BookingBot) -> int:
-    if not bot.ensure_authenticated():
-        bot.alert("Buntzen bot dry-run failed before booking: not authenticated.", urgent=True)
+async def run_dry_run(bot: BookingBot) -> int:
+    if not await bot.ensure_authenticated():
+        await bot.alert("Buntzen bot dry-run failed before booking: not authenticated.", urgent=True)
         return 2
-    result = bot.try_booking_once(mode="dry-run")
+    result = await bot.try_booking_once(mode="dry-run")
     if result.success:
-        bot.alert(f"Buntzen bot dry-run passed: {result.message}")
+        await bot.alert(f"Buntzen bot dry-run passed: {result.message}")
         return 0
-    bot.alert(f"Buntzen bot dry-run failed: {result.message}", urgent=True)
+    await bot.alert(f"Buntzen bot dry-run failed: {result.message}", urgent=True)
     return 3
 
 
-def run_book(bot: BookingBot) -> int:
+async def run_book(bot: BookingBot, enter_firing: Callable[[], Awaitable[None]] | None = None) -> int:
+    """Prep, stage and fire a booking.
+
+    enter_firing, when given, is awaited just before the release-time work
+    (staging and polling) so a host can admit that phase separately.
+    """
     config = bot.config
     logger = logging.getLogger("buntzen_pass_bot.run")
 
     if not config.schedule:
-        bot.alert("Buntzen bot immediate booking run started because SCHEDULE=false.")
-        if not bot.ensure_authenticated():
-            bot.alert("Buntzen bot stopped: Yodel auth is not ready.", urgent=True)
+        await bot.alert("Buntzen bot immediate booking run started because SCHEDULE=false.")
+        if not await bot.ensure_authenticated():
+            await bot.alert("Buntzen bot stopped: Yodel auth is not ready.", urgent=True)
             return 2
-        result = bot.poll_for_booking(mode=config.run_mode)
+        if enter_firing is not None:
+            await enter_firing()
+        result = await bot.poll_for_booking(mode=config.run_mode)
         if result.success:
-            bot.alert(f"Buntzen bot success: {result.message}")
+            await bot.alert(f"Buntzen bot success: {result.message}")
             return 0
-        bot.alert(f"Buntzen bot failed: {result.message}", urgent=True)
+        await bot.alert(f"Buntzen bot failed: {result.message}", urgent=True)
         return 4
 
+    bot.timeline.anchor_at(config.release_at)
     now = datetime.now(config.timezone)
     if now < config.prep_at:
         logger.info("Waiting for prep window at %s", config.prep_at.isoformat())
-        sleep_until(config.prep_at, config.timezone)
+        await sleep_until(config.prep_at, config.timezone)
 
-    bot.alert(
+    await bot.alert(
         "Buntzen bot prep started. Browser is opening, auth will be checked before release."
     )
 
-    if not bot.ensure_authenticated(deadline=config.auth_deadline_at):
-        bot.alert(
+    if not await bot.ensure_authenticated(deadline=config.auth_deadline_at):
+        await bot.alert(
             "Buntzen bot stopped: Yodel auth was not ready before the release deadline.",
             urgent=True,
         )
         return 2
 
-    logger.info("Authenticated. Keeping session warm until %s", config.release_at.isoformat())
-    wait_with_keepalive(
-        until=config.release_at,
+    stage_at = config.release_at - timedelta(seconds=STAGE_SECONDS_BEFORE_RELEASE)
+    logger.info("Authenticated. Keeping session warm until %s", stage_at.isoformat())
+    await wait_with_keepalive(
+        until=stage_at,
         timezone=config.timezone,
-        keepalive=lambda: bot.keep_session_warm(),
+        keepalive=bot.keep_session_warm,
         min_interval_seconds=35,
         max_interval_seconds=95,
     )
 
-    sleep_until(config.release_at, config.timezone, final_poll_seconds=0.05)
-    bot.alert(f"Buntzen bot started booking at {config.release_at.strftime('%H:%M:%S')}.")
+    if enter_firing is not None:
+        await enter_firing()
+    if bot.clock.now(config.timezone) < config.release_at:
+        await bot.stage_passes()
 
-    result = bot.poll_for_booking(mode=config.run_mode)
+    logger.info(bot.clock.describe())
+    late_ns = await sleep_until(config.release_at, config.timezone, clock=bot.clock)
+    logger.info("Release timer fired %.3f ms after the deadline.", late_ns / 1e6)
+    bot.timeline.anchor_at(bot.clock.to_local(config.release_at))
+    await bot.alert(f"Buntzen bot started booking at {config.release_at.strftime('%H:%M:%S')}.")
+
+    result = await bot.poll_for_booking(mode=config.run_mode)
     if result.success:
-        bot.alert(f"Buntzen bot success: {result.message}")
+        await bot.alert(f"Buntzen bot success: {result.message}")
         return 0
 
-    bot.alert(f"Buntzen bot failed: {result.message}", urgent=True)
+    await bot.alert(f"Buntzen bot failed: {result.message}", urgent=True)
     return 4
 
 
@@ -161,57 +188,81 @@ def main(argv: list[str] | None = None) -> int:
     logger.info("Loaded config: %s", config.safe_summary())
     diagnostics = Diagnostics()
 
+    outbox = AlertOutbox(
+        client_factory=lambda account_sid: twilio.client if account_sid == config.twilio_account_sid else None
+    )
     try:
-        twilio = TwilioService.from_config(config)
+        twilio = TwilioService.from_config(config, outbox=outbox)
     except Exception as exc:
         logger.error("Twilio setup failed: %s", exc)
         return 1
+    outbox.start(Path(diagnostics.base_dir).parent / "alerts.db")
 
     try:
-        from playwright.sync_api import sync_playwright
-        from src.booking import BookingBot, BookingError
+        import playwright.async_api  # noqa: F401
     except ImportError as exc:
         logger.error("Missing browser dependency: %s", exc)
         logger.error("Install dependencies with: uv sync")
         return 1
 
-    with sync_playwright() as playwright:
-        context = open_persistent_context(playwright, config)
+    try:
+        return asyncio.run(run_cli(args.command, config, twilio, diagnostics))
+    except KeyboardInterrupt:
+        logger.warning("Interrupted by user.")
+        return 130
+    finally:
+        undelivered = outbox.flush(ALERT_FLUSH_SECONDS)
+        if undelivered:
+            logger.warning("%s alert(s) were not delivered; they will be retried on the next run.", undelivered)
+
+
+async def run_cli(command: str, config, twilio, diagnostics) -> int:
+    from playwright.async_api import async_playwright
+    from src.booking import BookingBot, BookingError
+
+    logger = logging.getLogger("buntzen_pass_bot.run")
+    async with async_playwright() as playwright:
+        context = await open_persistent_context(playwright, config)
         context.set_default_timeout(config.default_timeout_ms)
-        context.tracing.start(screenshots=True, snapshots=True, sources=True)
-        page = context.pages[0] if context.pages else context.new_page()
+        await context.tracing.start(screenshots=True, snapshots=True, sources=True)
+        page = context.pages[0] if context.pages else await context.new_page()
         bot = BookingBot(page=page, context=context, config=config, twilio=twilio, diagnostics=diagnostics)
+        await bot.start()
 
         exit_code = 1
         try:
-            if args.command == "auth-check":
-                exit_code = run_auth_check(bot)
-            elif args.command == "dry-run":
-                exit_code = run_dry_run(bot)
+            if command == "auth-check":
+                exit_code = await run_auth_check(bot)
+            elif command == "dry-run":
+                exit_code = await run_dry_run(bot)
             else:
-                exit_code = run_book(bot)
-        except KeyboardInterrupt:
+                exit_code = await run_book(bot)
+        except (KeyboardInterrupt, asyncio.CancelledError):
             logger.warning("Interrupted by user.")
             exit_code = 130
         except BookingError as exc:
             logger.error("Booking error: %s", exc)
-            bot.capture_failure("booking-error")
-            bot.alert(f"Buntzen bot stopped: {exc}", urgent=True)
+            await bot.capture_failure("booking-error")
+            await bot.alert(f"Buntzen bot stopped: {exc}", urgent=True)
             exit_code = 5
         except Exception as exc:
             logger.exception("Unexpected failure")
-            bot.capture_failure("unexpected-error")
-            bot.alert(f"Buntzen bot crashed: {exc}", urgent=True)
+            await bot.capture_failure("unexpected-error")
+            await bot.alert(f"Buntzen bot crashed: {exc}", urgent=True)
             exit_code = 6
         finally:
+            await bot.close()
+            timeline_path = diagnostics.path_for("timeline", "json")
+            timeline_path.write_text(json.dumps(bot.timeline.as_dict(), indent=2), encoding="utf-8")
+            logger.info("Saved step timeline: %s", timeline_path)
             trace_path = diagnostics.path_for("trace", "zip")
             try:
-                context.tracing.stop(path=str(trace_path))
+                await context.tracing.stop(path=str(trace_path))
                 logger.info("Saved Playwright trace: %s", trace_path)
             except Exception as exc:
                 logger.warning("Could not save Playwright trace: %s", exc)
-            time.sleep(1)
-            context.close()
+            await asyncio.sleep(1)
+            await context.close()
 
     return exit_code
 
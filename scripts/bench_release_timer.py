@@ -0,0 +1,101 @@
+"""
+Measure how accurately src.scheduler.sleep_until fires, idle and under CPU load.
+
+Run from the repository root:
+
+    python -m scripts.bench_release_timer --trials 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from src.scheduler import sleep_until
+
+
+TIMEZONE = ZoneInfo("America/Vancouver")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Release timer firing-accuracy benchmark")
+    parser.add_argument("--trials", type=int, default=200, help="Timer firings per scenario")
+    parser.add_argument("--lead-ms", type=float, default=250.0, help="Maximum delay before each target")
+    parser.add_argument(
+        "--load-procs",
+        type=int,
+        default=os.cpu_count() or 2,
+        help="CPU-burning processes for the loaded scenario",
+    )
+    parser.add_argument(
+        "--loop-load-ms",
+        type=float,
+        default=1.0,
+        help="Blocking work per callback of a busy task sharing the event loop, like another job",
+    )
+    return parser
+
+
+def burn_cpu(stop) -> None:
+    while not stop.is_set():
+        sum(index * index for index in range(10_000))
+
+
+async def busy_neighbour(block_ms: float) -> None:
+    while True:
+        end = time.perf_counter() + block_ms / 1000
+        while time.perf_counter() < end:
+            pass
+        await asyncio.sleep(0.005)
+
+
+async def measure(trials: int, lead_ms: float, loop_load_ms: float = 0.0) -> list[float]:
+    neighbour = asyncio.create_task(busy_neighbour(loop_load_ms)) if loop_load_ms > 0 else None
+    errors: list[float] = []
+    try:
+        for _ in range(trials):
+            target = datetime.now(TIMEZONE) + timedelta(milliseconds=random.uniform(lead_ms / 5, lead_ms))
+            await sleep_until(target, TIMEZONE)
+            errors.append((time.time() - target.timestamp()) * 1000)
+    finally:
+        if neighbour is not None:
+            neighbour.cancel()
+    return errors
+
+
+def report(name: str, errors: list[float]) -> None:
+    ordered = sorted(errors)
+    late = [abs(value) for value in ordered]
+    p50 = statistics.median(late)
+    p99 = sorted(late)[min(len(late) - 1, int(len(late) * 0.99))]
+    print(
+        f"{name:<8} n={len(ordered):<4} p50={p50:7.3f} ms  p99={p99:7.3f} ms  "
+        f"max={max(late):7.3f} ms  early={sum(value < 0 for value in ordered)}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    report("idle", asyncio.run(measure(args.trials, args.lead_ms)))
+
+    stop = multiprocessing.Event()
+    burners = [multiprocessing.Process(target=burn_cpu, args=(stop,), daemon=True) for _ in range(args.load_procs)]
+    for process in burners:
+        process.start()
+    try:
+        report("loaded", asyncio.run(measure(args.trials, args.lead_ms, args.loop_load_ms)))
+    finally:
+        stop.set()
+        for process in burners:
+            process.join(timeout=5)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
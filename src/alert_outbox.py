@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+
+logger = logging.getLogger("buntzen_pass_bot.alert_outbox")
+
+# Seconds to wait before each retry of a failed send; after the last one the
+# alert is given up as failed.
+RETRY_DELAYS = (5, 15, 60, 300, 900)
+# Alerts are about a booking in progress; older ones are dropped, not sent.
+MAX_AGE_SECONDS = 3600
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account_sid TEXT NOT NULL,
+    from_number TEXT NOT NULL,
+    to_number TEXT NOT NULL,
+    body TEXT NOT NULL,
+    repeats INTEGER NOT NULL DEFAULT 1,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    sent_at REAL,
+    last_error TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS alerts_pending ON alerts (status, next_attempt_at);
+"""
+
+
+@dataclass(frozen=True)
+class Alert:
+    account_sid: str
+    from_number: str
+    to_number: str
+    body: str
+    created_at: float
+
+
+class AlertOutbox:
+    """Sends SMS alerts from a background thread, off the booking path.
+
+    ``enqueue`` only appends to an in-memory list. The worker thread stores
+    alerts in SQLite, so undelivered ones survive a restart, then sends them
+    with retries. An alert that repeats one still waiting to go out is folded
+    into it as a repeat count instead of a second SMS.
+
+    ``client_factory`` returns a Twilio client for an account SID, for alerts
+    left over from a previous run; clients passed to ``enqueue`` are reused.
+    """
+
+    def __init__(self, client_factory: Callable[[str], Any | None] = lambda account_sid: None) -> None:
+        self.client_factory = client_factory
+        self.clients: dict[str, Any] = {}
+        self.incoming: deque[Alert] = deque()
+        self.wake = threading.Event()
+        # Set while no alert is waiting to be sent or retried.
+        self.idle = threading.Event()
+        # Alerts stored and still pending as of the worker's last pass.
+        self.pending = 0
+        self.stop_event = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.path: Path | None = None
+
+    def start(self, path: Path) -> None:
+        if self.thread and self.thread.is_alive():
+            return
+        self.path = Path(path)
+        self.thread = threading.Thread(target=self._loop, name="alert-outbox", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def enqueue(self, account_sid: str, client: Any, from_number: str, to_number: str, body: str) -> None:
+        self.clients[account_sid] = client
+        self.incoming.append(Alert(account_sid, from_number, to_number, body[:1500], time.time()))
+        self.idle.clear()
+        self.wake.set()
+
+    def flush(self, timeout: float) -> int:
+        """Wait up to ``timeout`` for every alert to go out; returns how many are still pending."""
+        self.wake.set()
+        self.idle.wait(timeout)
+        return self.pending + len(self.incoming)
+
+    def _loop(self) -> None:
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(SCHEMA)
+        try:
+            while not self.stop_event.is_set():
+                self.wake.clear()
+                try:
+                    self._store_incoming(conn)
+                    wait, self.pending = self._send_due(conn)
+                except Exception:
+                    logger.exception("Alert outbox pass failed.")
+                    wait = RETRY_DELAYS[0]
+                if self.pending:
+                    self.idle.clear()
+                else:
+                    self.idle.set()
+                    if self.incoming:
+                        self.idle.clear()
+                self.wake.wait(wait)
+        finally:
+            conn.close()
+
+    def _store_incoming(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            while self.incoming:
+                alert = self.incoming.popleft()
+                updated = conn.execute(
+                    """
+                    UPDATE alerts SET repeats = repeats + 1
+                    WHERE status = 'pending' AND account_sid = ? AND to_number = ? AND body = ?
+                    """,
+                    (alert.account_sid, alert.to_number, alert.body),
+                ).rowcount
+                if updated:
+                    logger.info("Coalesced repeated alert: %s", alert.body)
+                    continue
+                conn.execute(
+                    """
+                    INSERT INTO alerts (account_sid, from_number, to_number, body, created_at, next_attempt_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (alert.account_sid, alert.from_number, alert.to_number, alert.body, alert.created_at, alert.created_at),
+                )
+                self.pending += 1
+
+    def _send_due(self, conn: sqlite3.Connection) -> tuple[float, int]:
+        """Send every due alert; returns seconds until the next retry and how many are pending."""
+        now = time.time()
+        with conn:
+            expired = conn.execute(
+                "UPDATE alerts SET status = 'expired' WHERE status = 'pending' AND created_at < ?",
+                (now - MAX_AGE_SECONDS,),
+            ).rowcount
+        if expired:
+            logger.warning("Dropped %s alert(s) older than %ss.", expired, MAX_AGE_SECONDS)
+        rows = conn.execute(
+            "SELECT * FROM alerts WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id",
+            (now,),
+        ).fetchall()
+        for row in rows:
+            self._send(conn, row)
+        pending, upcoming = conn.execute(
+            "SELECT COUNT(*), MIN(next_attempt_at) FROM alerts WHERE status = 'pending'"
+        ).fetchone()
+        if upcoming is None:
+            return RETRY_DELAYS[-1], 0
+        return max(upcoming - time.time(), 0.0), pending
+
+    def _send(self, conn: sqlite3.Connection, row: sqlite3.Row) -> None:
+        body = row["body"] if row["repeats"] == 1 else f"{row['body']} (x{row['repeats']})"
+        attempts = row["attempts"] + 1
+        try:
+            client = self.clients.get(row["account_sid"]) or self.client_factory(row["account_sid"])
+            if client is None:
+                raise RuntimeError(f"No Twilio client for account {row['account_sid']}.")
+            self.clients[row["account_sid"]] = client
+            client.messages.create(from_=row["from_number"], to=row["to_number"], body=body[:1500])
+        except Exception as exc:
+            permanent = _is_permanent(exc) or attempts > len(RETRY_DELAYS)
+            status = "failed" if permanent else "pending"
+            delay = 0 if permanent else RETRY_DELAYS[attempts - 1]
+            logger.warning("Could not send Twilio alert (attempt %s, %s): %s", attempts, status, exc)
+            with conn:
+                conn.execute(
+                    "UPDATE alerts SET attempts = ?, status = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (attempts, status, time.time() + delay, str(exc)[:500], row["id"]),
+                )
+            return
+        with conn:
+            conn.execute(
+                "UPDATE alerts SET attempts = ?, status = 'sent', sent_at = ? WHERE id = ?",
+                (attempts, time.time(), row["id"]),
+            )
+
+
+def _is_permanent(exc: Exception) -> bool:
+    """Twilio rejected the request itself, so retrying cannot help."""
+    status = getattr(exc, "status", None)
+    return isinstance(status, int) and 400 <= status < 500 and status != 429
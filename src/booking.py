@@ -1,16 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import copy
 import logging
 import random
 import re
-import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Iterable
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Awaitable, Callable, Iterable
 
-from playwright.sync_api import Locator, Page, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import Locator, Page, TimeoutError as PlaywrightTimeoutError
 
+from .cancellation import CancelToken
+from .clock_sync import ServerClock
+from .inventory import InventoryWatcher
 from .pass_types import PassPreference, build_pass_order
+from .polling import PollingPolicy
+from .resource_blocking import ResourceBlocker
+from .timeline import Timeline, timed
 
 
 logger = logging.getLogger("buntzen_pass_bot.booking")
@@ -73,6 +82,13 @@ VEHICLE_SELECTOR_SELECTORS = (
     "text=Select Vehicle",
     "text=Vehicle",
 )
+VEHICLE_POPUP_SELECTORS = (
+    ".popup.smart-select-popup.modal-in",
+    ".smart-select-popup",
+    ".modal-in",
+    "[role='dialog']",
+)
+VEHICLE_LABEL_QUERY = "label.item-radio, label:has(.item-title), label"
 ADD_TO_CART_SELECTORS = (
     "a:has-text('Add To Cart')",
     "button:has-text('Add To Cart')",
@@ -100,6 +116,48 @@ DATE_BUTTON_SELECTORS = (
 )
 
 
+INVENTORY_WAIT_MS = 1500
+DATE_BUTTON_QUERY = ".datelist button.date, button.date"
+DATE_BUTTONS_SCRIPT = """
+(selector) => Array.from(document.querySelectorAll(selector)).map((button) => ({
+    text: (button.innerText || "").trim(),
+    attrs: ["aria-label", "title", "data-date", "datetime"]
+        .map((name) => button.getAttribute(name) || "")
+        .join(" "),
+}))
+"""
+PAGE_STATE_SCRIPT = """
+(groups) => {
+    const visible = (el) => {
+        const style = window.getComputedStyle(el);
+        return style.visibility !== "hidden" && el.getClientRects().length > 0;
+    };
+    const bodyText = () => ((document.body && document.body.innerText) || "").toLowerCase();
+    const matches = (group) => {
+        for (const selector of group.css) {
+            try {
+                for (const el of document.querySelectorAll(selector)) {
+                    if (visible(el)) return true;
+                }
+            } catch (error) {}
+        }
+        return group.text.length > 0 && group.text.some((token) => bodyText().includes(token));
+    };
+    for (const [state, group] of groups) {
+        if (matches(group)) return state;
+    }
+    return null;
+}
+"""
+
+
+class PageState(str, Enum):
+    AUTHENTICATED = "authenticated"
+    LOGIN_FORM = "login_form"
+    OTP_CHALLENGE = "otp_challenge"
+    UNKNOWN = "unknown"
+
+
 class BookingError(RuntimeError):
     pass
 
@@ -109,153 +167,548 @@ class BookingResult:
     success: bool
     message: str
     pass_key: str | None = None
+    sold_out: bool = False
+    # The pass was read as not available, without it being explicitly sold out.
+    unavailable: bool = False
+
+
+def selector_group(selectors: Iterable[str]) -> dict[str, list[str]]:
+    """Split Playwright selectors into in-page CSS selectors and text= tokens."""
+    css: list[str] = []
+    text: list[str] = []
+    for selector in selectors:
+        if selector.startswith("text="):
+            text.append(selector[len("text="):].strip("'\"").lower())
+        else:
+            css.append(selector)
+    return {"css": css, "text": text}
+
+
+PAGE_STATE_GROUPS = (
+    (PageState.OTP_CHALLENGE.value, selector_group(OTP_INPUT_SELECTORS)),
+    (PageState.LOGIN_FORM.value, selector_group(LOGIN_EMAIL_SELECTORS + LOGIN_PASSWORD_SELECTORS)),
+    (PageState.AUTHENTICATED.value, selector_group(AUTHENTICATED_SELECTORS)),
+)
+
+
+def date_tokens(target: date) -> set[str]:
+    return {
+        target.isoformat(),
+        target.strftime("%B %-d"),
+        target.strftime("%b %-d"),
+        target.strftime("%A, %B %-d"),
+    }
+
+
+def match_date_button(entries: Iterable[dict], target: date) -> tuple[int | None, bool]:
+    """Pick the date button for target from in-page text/attribute snapshots.
+
+    Returns (index, exact). Exact token matches win over the first button whose
+    text is only the day of the month.
+    """
+    day = str(target.day)
+    tokens = [token.lower() for token in date_tokens(target)]
+    fallback: int | None = None
+    for index, entry in enumerate(entries):
+        text = str(entry.get("text") or "").strip()
+        combined = f"{text} {entry.get('attrs') or ''}".lower()
+        if any(token in combined for token in tokens):
+            return index, True
+        if text == day and fallback is None:
+            fallback = index
+    return fallback, False
+
+
+def _clean_check(result: BookingResult | None) -> bool:
+    """Whether a pass check read the card, so the page can be soft refreshed."""
+    return result is None or result.sold_out or result.unavailable
+
+
+def _unavailable_result(preference: PassPreference, message: str, sold_out: bool) -> BookingResult:
+    return BookingResult(False, message, preference.key, sold_out=sold_out, unavailable=not sold_out)
+
+
+def _no_pass_result(sold_out: bool) -> BookingResult:
+    if sold_out:
+        return BookingResult(False, "Every selected pass is sold out.", sold_out=True)
+    return BookingResult(False, "No selected pass was available or actionable.")
+
+
+async def _stop_pages(pages: Iterable[Page]) -> None:
+    for page in pages:
+        try:
+            await page.evaluate("() => window.stop()")
+        except Exception:
+            pass
+
+
+async def _close_quietly(page: Page) -> None:
+    try:
+        await page.close()
+    except Exception:
+        pass
 
 
 class BookingBot:
-    def __init__(self, page: Page, context, config, twilio, diagnostics, interactive_manual: bool = True) -> None:
+    def __init__(
+        self,
+        page: Page,
+        context,
+        config,
+        twilio,
+        diagnostics,
+        interactive_manual: bool = True,
+        cancel_token: CancelToken | None = None,
+    ) -> None:
         self.page = page
         self.context = context
         self.config = config
         self.twilio = twilio
         self.diagnostics = diagnostics
         self.interactive_manual = interactive_manual
+        self.cancel_token = cancel_token
+        self.staged_pages: dict[str, Page] = {}
+        self.otp_deliveries: list[dict] = []
+        # Soft refreshes used per pass since its last full load; absent means reload next time.
+        self.soft_refreshes: dict[str, int] = {}
+        self.vehicle_label: str | None = None
+        self.inventory = InventoryWatcher(build_pass_order(config), config.target_date)
+        self.blocker = ResourceBlocker.from_config(config)
+        self.timeline = Timeline()
+        self.clock = ServerClock.from_config(config)
+
+    async def start(self) -> None:
+        """Attach response listeners and request blocking to the context."""
+        if self.context is None:
+            return
+        self.inventory.attach(self.context)
+        self.clock.attach(self.context)
+        await self.blocker.install(self.context)
 
-    def alert(self, message: str, urgent: bool = False) -> None:
+    async def close(self) -> None:
+        """Detach listeners and close staging tabs; the context stays open."""
+        self.inventory.detach()
+        self.clock.detach()
+        await self.blocker.uninstall()
+        for page in self.staged_pages.values():
+            await _close_quietly(page)
+        self.staged_pages.clear()
+
+    async def alert(self, message: str, urgent: bool = False) -> None:
         logger.info("ALERT: %s", message)
-        self.twilio.send_alert(message, urgent=urgent)
+        if self.twilio.outbox is not None:
+            self.twilio.send_alert(message, urgent=urgent)
+        else:
+            await asyncio.to_thread(self.twilio.send_alert, message, urgent=urgent)
 
-    def capture_failure(self, name: str) -> None:
-        screenshot = self.diagnostics.screenshot(self.page, name)
-        html = self.diagnostics.html(self.page, name)
+    async def capture_failure(self, name: str) -> None:
+        screenshot = await self.diagnostics.screenshot(self.page, name)
+        html = await self.diagnostics.html(self.page, name)
         logger.info("Saved diagnostics: screenshot=%s html=%s", screenshot, html)
 
-    def ensure_authenticated(self, deadline: datetime | None = None) -> bool:
+    async def ensure_authenticated(self, deadline: datetime | None = None) -> bool:
         logger.info("Checking Yodel authentication state.")
-        self.page.goto(self.config.login_probe_url, wait_until="domcontentloaded")
-        self._settle_page()
+        await self.page.goto(self.config.login_probe_url, wait_until="domcontentloaded")
+        await self._settle_page()
 
         otp_requested_at: datetime | None = None
         while True:
-            if self._is_authenticated():
+            state = await self._page_state()
+            if state is PageState.AUTHENTICATED:
                 logger.info("Yodel session appears authenticated.")
                 return True
 
             if deadline and datetime.now(self.config.timezone) >= deadline:
-                self.capture_failure("auth-deadline")
+                await self.capture_failure("auth-deadline")
                 return False
 
-            if self._has_otp_challenge():
+            if state is PageState.OTP_CHALLENGE:
                 logger.info("OTP challenge detected.")
                 otp_requested_at = otp_requested_at or datetime.now(timezone.utc)
-                self._complete_otp_challenge(otp_requested_at)
-                self._settle_page()
+                await self._complete_otp_challenge(otp_requested_at)
+                await self._settle_page()
                 continue
 
-            login_clicked_at = self._complete_login_form()
-            if login_clicked_at:
-                otp_requested_at = login_clicked_at
-                self._settle_page()
-                continue
+            if state is PageState.LOGIN_FORM:
+                login_clicked_at = await self._complete_login_form()
+                if login_clicked_at:
+                    otp_requested_at = login_clicked_at
+                    await self._settle_page()
+                    continue
 
-            request_clicked_at = self._request_otp_if_possible()
+            request_clicked_at = await self._request_otp_if_possible()
             if request_clicked_at:
                 otp_requested_at = request_clicked_at
-                self._settle_page()
+                await self._settle_page()
                 continue
 
             logger.warning("Could not identify authenticated state, login form, or OTP challenge.")
-            self.capture_failure("auth-unknown-state")
+            await self.capture_failure("auth-unknown-state")
             return False
 
-    def keep_session_warm(self) -> None:
+    async def keep_session_warm(self) -> None:
         try:
             logger.debug("Running session keepalive.")
-            self.page.evaluate("() => document.title")
+            await self.page.evaluate("() => document.title")
             if random.random() < 0.35:
-                self.page.reload(wait_until="domcontentloaded")
-                self._settle_page(timeout_ms=5000)
-            if not self._is_authenticated():
-                logger.warning("Session warm check no longer sees authenticated state; attempting re-auth.")
-                self.ensure_authenticated(deadline=self.config.auth_deadline_at)
+                await self.page.reload(wait_until="domcontentloaded")
+                await self._settle_page(timeout_ms=5000)
+            state = await self._page_state()
+            if state is not PageState.AUTHENTICATED:
+                logger.warning("Session warm check sees %s state; attempting re-auth.", state.value)
+                await self.ensure_authenticated(deadline=self.config.auth_deadline_at)
         except Exception as exc:
             logger.warning("Keepalive failed: %s", exc)
 
-    def try_booking_once(self, mode: str) -> BookingResult:
-        for preference in build_pass_order(self.config):
-            result = self._try_pass(preference, mode=mode)
+    async def try_booking_once(self, mode: str) -> BookingResult:
+        preferences = build_pass_order(self.config)
+        if self.config.parallel_preferences and len(preferences) > 1:
+            return await self._try_passes_in_parallel(preferences, mode=mode)
+        sold_out = True
+        for preference in preferences:
+            result = await self._try_pass(preference, mode=mode)
             if result.success:
                 return result
-        return BookingResult(False, "No selected pass was available or actionable.")
+            sold_out = sold_out and result.sold_out
+        return _no_pass_result(sold_out)
 
-    def poll_for_booking(self, mode: str) -> BookingResult:
-        deadline = time.monotonic() + self.config.poll_deadline_seconds
+    async def poll_for_booking(self, mode: str) -> BookingResult:
+        policy = PollingPolicy.from_config(self.config)
         attempt = 0
-        last_message = "No attempts made."
-        while time.monotonic() < deadline:
+        while True:
             attempt += 1
-            logger.info("Booking poll attempt %s", attempt)
-            result = self.try_booking_once(mode=mode)
-            last_message = result.message
+            self.timeline.start_attempt(attempt)
+            logger.info("Booking poll attempt %s (%s phase)", attempt, policy.phase())
+            result = await self.try_booking_once(mode=mode)
             if result.success:
                 return result
-            sleep_for = random.uniform(self.config.poll_min_seconds, self.config.poll_max_seconds)
-            logger.info("No pass booked yet (%s). Sleeping %.2fs", result.message, sleep_for)
-            time.sleep(sleep_for)
-        self.capture_failure("poll-deadline")
-        return BookingResult(False, f"Polling deadline reached. Last status: {last_message}")
+            decision = policy.next(result.sold_out)
+            if decision.stop:
+                break
+            logger.info("No pass booked yet (%s). %s; sleeping %.2fs", result.message, decision.reason, decision.delay)
+            await asyncio.sleep(decision.delay)
+        logger.info("Stopping after %s attempt(s): %s.", attempt, decision.reason)
+        await self.capture_failure("sold-out" if result.sold_out else "poll-deadline")
+        return BookingResult(False, f"{decision.reason}. Last status: {result.message}", sold_out=result.sold_out)
 
-    def _try_pass(self, preference: PassPreference, mode: str) -> BookingResult:
-        url = self._url_for(preference)
-        logger.info("Checking %s pass at %s", preference.label, url)
-        self.page.goto(url, wait_until="domcontentloaded")
-        self._settle_page(timeout_ms=10000)
+    async def stage_passes(self) -> int:
+        """Open one tab per preference on its pass page with the date selected.
 
-        if not self._select_target_date():
-            return BookingResult(False, f"Target date {self.config.target_date} was not selectable.", preference.key)
+        Runs shortly before release. A tab whose date is selected is re-checked
+        in place at release by re-clicking the date, like a soft refresh, so
+        the selection survives; other staged tabs are reloaded.
+        """
+        staged = 0
+        for preference in build_pass_order(self.config):
+            try:
+                page = await self.context.new_page()
+            except Exception as exc:
+                logger.warning("Could not open staging tab for %s: %s", preference.label, exc)
+                continue
+            with self._on_page(page), self.timeline.scope(preference.key):
+                try:
+                    await self._open_pass_page(preference)
+                except Exception as exc:
+                    logger.warning("Staging %s tab failed: %s", preference.label, exc)
+                    await _close_quietly(page)
+                    continue
+                self.staged_pages[preference.key] = page
+                staged += 1
+                try:
+                    if not await self._select_target_date():
+                        logger.info("Staged %s tab; target date is not selectable yet.", preference.label)
+                        continue
+                    self.soft_refreshes[preference.key] = 0
+                    container = await self._find_pass_container(preference)
+                    if container is not None:
+                        await self._stage_vehicle(container)
+                except Exception as exc:
+                    logger.warning("Could not pre-select %s pass details: %s", preference.label, exc)
+        logger.info("Staged %s pass tab(s) for release.", staged)
+        return staged
+
+    async def _stage_vehicle(self, container: Locator) -> None:
+        if not await self._open_vehicle_selector(container, timeout_ms=1000):
+            return
+        if await self._find_vehicle_label(await self._vehicle_popup_root()) is not None:
+            logger.info("Resolved vehicle choice before release: %s", self.vehicle_label)
+        await self._close_vehicle_popup_if_open()
+
+    async def _try_pass(self, preference: PassPreference, mode: str) -> BookingResult:
+        staged = self.staged_pages.get(preference.key)
+        if staged is not None and not staged.is_closed():
+            with self._on_page(staged):
+                return await self._attempt_pass(preference, mode, refresh=True)
+        return await self._attempt_pass(preference, mode)
+
+    async def _try_passes_in_parallel(self, preferences: list[PassPreference], mode: str) -> BookingResult:
+        """Load and check every preference in its own tab at once, then act in priority order.
+
+        Each preference is checked by a concurrent task on its own tab. Results
+        are consumed in priority order, so a lower priority pass is ready the
+        moment every higher priority one has been ruled out. Once a winner clicks
+        Add To Cart the remaining checks are cancelled and their tabs stopped.
+        """
+        views: dict[str, BookingBot] = {}
+        for preference in preferences:
+            page = await self._preference_page(preference)
+            if page is not None:
+                views[preference.key] = self._for_page(page)
+
+        since = self.inventory.mark()
+        checks = {
+            preference.key: asyncio.create_task(views[preference.key]._load_and_check(preference, since))
+            for preference in preferences
+            if preference.key in views
+        }
+
+        async def cancel_others(winner: str) -> None:
+            for key, task in checks.items():
+                if key != winner:
+                    task.cancel()
+            await _stop_pages(view.page for key, view in views.items() if key != winner)
+
+        last = None
+        sold_out = True
+        try:
+            for preference in preferences:
+                task = checks.get(preference.key)
+                if task is None:
+                    sold_out = False
+                    continue
+                result, container = await task
+                if result is not None:
+                    last = result
+                    sold_out = sold_out and result.sold_out
+                    continue
+                result = await views[preference.key]._complete_pass(
+                    preference,
+                    container,
+                    mode=mode,
+                    on_commit=lambda key=preference.key: cancel_others(key),
+                )
+                if result.success:
+                    return result
+                last = result
+                sold_out = False
+            return _no_pass_result(sold_out) if last is None or sold_out else last
+        finally:
+            for task in checks.values():
+                task.cancel()
+            await asyncio.gather(*checks.values(), return_exceptions=True)
+
+    async def _preference_page(self, preference: PassPreference) -> Page | None:
+        page = self.staged_pages.get(preference.key)
+        if page is not None and not page.is_closed():
+            return page
+        try:
+            page = await self.context.new_page()
+        except Exception as exc:
+            logger.warning("Could not open tab for %s: %s", preference.label, exc)
+            return None
+        self.staged_pages[preference.key] = page
+        return page
 
-        container = self._find_pass_container(preference)
+    async def _load_and_check(
+        self,
+        preference: PassPreference,
+        since: float,
+    ) -> tuple[BookingResult | None, Locator | None]:
+        with self.timeline.scope(preference.key):
+            checked = await self._soft_check(preference, since)
+            if checked is not None:
+                return checked
+            await self._start_pass_navigation(preference)
+            checked = await self._check_pass(preference, since)
+            self._note_full_check(preference, checked[0])
+            return checked
+
+    async def _attempt_pass(self, preference: PassPreference, mode: str, refresh: bool = False) -> BookingResult:
+        with self.timeline.scope(preference.key):
+            since = self.inventory.mark()
+            checked = await self._soft_check(preference, since)
+            if checked is None:
+                await self._open_pass_page(preference, refresh=refresh, settle=False)
+                checked = await self._check_pass(preference, since)
+                self._note_full_check(preference, checked[0])
+            result, container = checked
+            if result is not None:
+                return result
+            return await self._complete_pass(preference, container, mode=mode)
+
+    async def _soft_check(
+        self,
+        preference: PassPreference,
+        since: float,
+    ) -> tuple[BookingResult | None, Locator | None] | None:
+        """Re-check a pass on its already loaded page instead of navigating.
+
+        Clicking the target date again should make the page re-fetch that day's
+        passes. Returns None when the page needs a full load: it was never
+        checked cleanly, the refresh limit is used up, no fresh inventory
+        response arrived, or the soft check itself went wrong.
+        """
+        used = self.soft_refreshes.get(preference.key)
+        if used is None or used >= self.config.soft_refresh_limit:
+            return None
+        if self.page.is_closed() or self.page.url.split("#")[0] != self._url_for(preference).split("#")[0]:
+            return None
+        self.soft_refreshes[preference.key] = used + 1
+        try:
+            with self.timeline.span("soft_refresh"):
+                checked = await self._check_pass(preference, since, reselect=True)
+        except Exception as exc:
+            logger.info("Soft refresh of %s failed; reloading the page: %s", preference.label, exc)
+            checked = None
+        if checked is None:
+            logger.info("Soft refresh of %s brought no fresh inventory; reloading the page.", preference.label)
+        if checked is None or not _clean_check(checked[0]):
+            self.soft_refreshes.pop(preference.key, None)
+            return None
+        logger.info("Soft refresh %s/%s of %s pass.", used + 1, self.config.soft_refresh_limit, preference.label)
+        return checked
+
+    def _note_full_check(self, preference: PassPreference, result: BookingResult | None) -> None:
+        if _clean_check(result):
+            self.soft_refreshes[preference.key] = 0
+        else:
+            self.soft_refreshes.pop(preference.key, None)
+
+    async def _check_pass(
+        self,
+        preference: PassPreference,
+        since: float,
+        reselect: bool = False,
+    ) -> tuple[BookingResult | None, Locator | None] | None:
+        """Settle a loaded pass page and decide availability.
+
+        With ``reselect`` the page is already settled. Either way the target
+        date is clicked before inventory is read, so the page's default-day
+        fetch is never mistaken for the target day.
+        Returns a failed result, or (None, container) when the pass is available.
+        With ``reselect`` it returns None when no fresh inventory response came
+        back, since the card on the page may then be stale.
+        """
+        if not reselect:
+            await self._settle_page(timeout_ms=10000)
+        if not await self._select_target_date():
+            message = f"Target date {self.config.target_date} was not selectable."
+            return BookingResult(False, message, preference.key), None
+        available = None
+        if reselect or self.inventory.observations:
+            available = await self.inventory.wait_for(preference.key, since, timeout_ms=INVENTORY_WAIT_MS)
+            if reselect and available is None:
+                return None
+            if available is False:
+                message = f"{preference.label} pass is not available (inventory response)."
+                return _unavailable_result(preference, message, self.inventory.sold_out(preference.key, since)), None
+
+        container = await self._find_pass_container(preference)
         if container is None:
-            return BookingResult(False, f"{preference.label} pass card was not found.", preference.key)
+            return BookingResult(False, f"{preference.label} pass card was not found.", preference.key), None
 
-        if not self._pass_is_available(container):
-            return BookingResult(False, f"{preference.label} pass is not available.", preference.key)
+        if available is None:
+            available = self.inventory.availability(preference.key, since)
+        sold_out = self.inventory.sold_out(preference.key, since)
+        if available is None:
+            available, sold_out = await self._card_availability(container)
+        if not available:
+            return _unavailable_result(preference, f"{preference.label} pass is not available.", sold_out), None
+        return None, container
 
+    async def _complete_pass(
+        self,
+        preference: PassPreference,
+        container: Locator,
+        mode: str,
+        on_commit: Callable[[], Awaitable[None]] | None = None,
+    ) -> BookingResult:
+        # Checkout moves the page on, so the next check must load it again.
+        self.soft_refreshes.pop(preference.key, None)
+        with self.timeline.scope(preference.key):
+            return await self._checkout_pass(preference, container, mode, on_commit)
+
+    async def _checkout_pass(
+        self,
+        preference: PassPreference,
+        container: Locator,
+        mode: str,
+        on_commit: Callable[[], Awaitable[None]] | None,
+    ) -> BookingResult:
         logger.info("%s pass appears available.", preference.label)
-        if not self._select_vehicle(container):
-            self.capture_failure(f"{preference.key}-vehicle-not-found")
+        if not await self._select_vehicle(container):
+            await self.capture_failure(f"{preference.key}-vehicle-not-found")
             return BookingResult(False, f"{preference.label} pass available, but vehicle was not selected.", preference.key)
 
         if mode == "dry-run":
-            self.capture_failure(f"{preference.key}-dry-run-ready")
+            await self.capture_failure(f"{preference.key}-dry-run-ready")
             return BookingResult(True, f"{preference.label} pass and vehicle selection verified in dry-run.", preference.key)
 
-        if not self._click_first(container, ADD_TO_CART_SELECTORS, timeout_ms=5000):
-            if not self._click_first(self.page, ADD_TO_CART_SELECTORS, timeout_ms=5000):
-                self.capture_failure(f"{preference.key}-add-to-cart-failed")
-                return BookingResult(False, f"{preference.label} pass available, but Add To Cart was not clickable.", preference.key)
+        if not await self._click_step("add_to_cart", (container, self.page), ADD_TO_CART_SELECTORS, timeout_ms=5000):
+            await self.capture_failure(f"{preference.key}-add-to-cart-failed")
+            return BookingResult(False, f"{preference.label} pass available, but Add To Cart was not clickable.", preference.key)
+        if on_commit is not None:
+            await on_commit()
 
-        self._human_pause(0.4, 1.2)
-        if not self._click_first(self.page, CHECKOUT_SELECTORS, timeout_ms=15000):
-            self.capture_failure(f"{preference.key}-checkout-failed")
+        await self._human_pause(0.4, 1.2)
+        if not await self._click_step("checkout", (self.page,), CHECKOUT_SELECTORS, timeout_ms=15000):
+            await self.capture_failure(f"{preference.key}-checkout-failed")
             return BookingResult(False, f"{preference.label} added, but checkout was not clickable.", preference.key)
 
         if mode == "manual":
-            self.capture_failure(f"{preference.key}-manual-confirm-ready")
-            self.alert(f"{preference.label} pass is ready for final confirmation.", urgent=True)
+            await self.capture_failure(f"{preference.key}-manual-confirm-ready")
+            await self.alert(f"{preference.label} pass is ready for final confirmation.", urgent=True)
             if self.interactive_manual:
-                input("Final confirmation is ready in the browser. Press Enter after reviewing it...")
+                await asyncio.to_thread(input, "Final confirmation is ready in the browser. Press Enter after reviewing it...")
             return BookingResult(True, f"{preference.label} pass reached manual final confirmation.", preference.key)
 
         if mode != "auto":
             raise BookingError(f"Unsupported booking mode: {mode}")
 
-        if not self._click_first(self.page, FINAL_CONFIRM_SELECTORS, timeout_ms=30000):
-            self.capture_failure(f"{preference.key}-final-confirm-failed")
+        if not await self._click_step("final_confirm", (self.page,), FINAL_CONFIRM_SELECTORS, timeout_ms=30000):
+            await self.capture_failure(f"{preference.key}-final-confirm-failed")
             return BookingResult(False, f"{preference.label} checkout reached, but final confirmation was not clickable.", preference.key)
 
-        self.capture_failure(f"{preference.key}-confirmed")
+        await self.capture_failure(f"{preference.key}-confirmed")
         return BookingResult(True, f"{preference.label} pass checkout confirmed.", preference.key)
 
+    async def _open_pass_page(self, preference: PassPreference, refresh: bool = False, settle: bool = True) -> None:
+        with self.timeline.span("goto"):
+            if refresh:
+                logger.info("Refreshing staged %s tab", preference.label)
+                await self.page.reload(wait_until="domcontentloaded")
+            else:
+                url = self._url_for(preference)
+                logger.info("Checking %s pass at %s", preference.label, url)
+                await self.page.goto(url, wait_until="domcontentloaded")
+        if settle:
+            await self._settle_page(timeout_ms=10000)
+
+    async def _start_pass_navigation(self, preference: PassPreference) -> None:
+        url = self._url_for(preference)
+        with self.timeline.span("goto"):
+            if self.page.url.split("#")[0] == url.split("#")[0]:
+                logger.info("Refreshing %s tab", preference.label)
+                await self.page.reload(wait_until="commit")
+            else:
+                logger.info("Loading %s pass at %s", preference.label, url)
+                await self.page.goto(url, wait_until="commit")
+
+    @contextmanager
+    def _on_page(self, page: Page):
+        previous = self.page
+        self.page = page
+        try:
+            yield page
+        finally:
+            self.page = previous
+
+    def _for_page(self, page: Page) -> "BookingBot":
+        """Return a view of this bot bound to another tab, for concurrent work."""
+        view = copy.copy(self)
+        view.page = page
+        return view
+
     def _url_for(self, preference: PassPreference) -> str:
         if preference.url_kind == "all_day" and self.config.all_day_pass_url:
             return self.config.all_day_pass_url
@@ -263,73 +716,107 @@ class BookingBot:
             return self.config.half_day_pass_url
         raise BookingError(f"No URL configured for {preference.label}.")
 
-    def _is_authenticated(self) -> bool:
-        if self._visible_locator(LOGIN_EMAIL_SELECTORS, timeout_ms=250) is not None:
-            return False
-        if self._visible_locator(LOGIN_PASSWORD_SELECTORS, timeout_ms=250) is not None:
-            return False
-        if self._has_otp_challenge(timeout_ms=250):
-            return False
-        return self._visible_locator(AUTHENTICATED_SELECTORS, timeout_ms=1000) is not None
+    async def _is_authenticated(self) -> bool:
+        return await self._page_state() is PageState.AUTHENTICATED
 
-    def _complete_login_form(self) -> datetime | None:
-        email = self._visible_locator(LOGIN_EMAIL_SELECTORS, timeout_ms=500)
-        password = self._visible_locator(LOGIN_PASSWORD_SELECTORS, timeout_ms=500)
+    async def _page_state(self, timeout_ms: int = 1000) -> PageState:
+        """Classify the current page with a single in-page watcher.
+
+        OTP inputs take precedence over login fields, which take precedence over
+        authenticated markers, matching the order ensure_authenticated acts in.
+        In the page, text= selectors match as case-insensitive substrings of the
+        rendered body text, so they only ever decide the lowest-ranked state.
+        """
+        try:
+            handle = await self.page.wait_for_function(
+                PAGE_STATE_SCRIPT,
+                arg=[list(group) for group in PAGE_STATE_GROUPS],
+                timeout=timeout_ms,
+            )
+            return PageState(await handle.json_value())
+        except PlaywrightTimeoutError:
+            return PageState.UNKNOWN
+        except Exception as exc:
+            logger.debug("In-page state probe failed, checking selectors directly: %s", exc)
+        if await self._has_otp_challenge(timeout_ms=250):
+            return PageState.OTP_CHALLENGE
+        if await self._visible_locator(LOGIN_EMAIL_SELECTORS + LOGIN_PASSWORD_SELECTORS, timeout_ms=250) is not None:
+            return PageState.LOGIN_FORM
+        if await self._visible_locator(AUTHENTICATED_SELECTORS, timeout_ms=timeout_ms) is not None:
+            return PageState.AUTHENTICATED
+        return PageState.UNKNOWN
+
+    async def _complete_login_form(self) -> datetime | None:
+        email = await self._visible_locator(LOGIN_EMAIL_SELECTORS, timeout_ms=500)
+        password = await self._visible_locator(LOGIN_PASSWORD_SELECTORS, timeout_ms=500)
         if email is None and password is None:
             return None
         if not self.config.yodel_email or not self.config.yodel_password:
             raise BookingError("Yodel login form is visible, but YODEL_EMAIL/YODEL_PASSWORD are not configured.")
         if email is not None:
-            email.fill(self.config.yodel_email)
-            self._human_pause()
+            await email.fill(self.config.yodel_email)
+            await self._human_pause()
         if password is not None:
-            password.fill(self.config.yodel_password)
-            self._human_pause()
+            await password.fill(self.config.yodel_password)
+            await self._human_pause()
         clicked_at = datetime.now(timezone.utc)
-        if not self._click_first(self.page, LOGIN_SUBMIT_SELECTORS, timeout_ms=5000):
+        if not await self._click_first(self.page, LOGIN_SUBMIT_SELECTORS, timeout_ms=5000):
             raise BookingError("Yodel login form was visible, but no login/continue button was clickable.")
         logger.info("Submitted Yodel login form; waiting for OTP or authenticated state.")
         return clicked_at
 
-    def _request_otp_if_possible(self) -> datetime | None:
+    async def _request_otp_if_possible(self) -> datetime | None:
         clicked_at = datetime.now(timezone.utc)
-        if self._click_first(self.page, OTP_REQUEST_SELECTORS, timeout_ms=500):
+        if await self._click_first(self.page, OTP_REQUEST_SELECTORS, timeout_ms=500):
             logger.info("Requested OTP code.")
             return clicked_at
         return None
 
-    def _has_otp_challenge(self, timeout_ms: int = 500) -> bool:
-        return self._visible_locator(OTP_INPUT_SELECTORS, timeout_ms=timeout_ms) is not None
+    async def _has_otp_challenge(self, timeout_ms: int = 500) -> bool:
+        return await self._visible_locator(OTP_INPUT_SELECTORS, timeout_ms=timeout_ms) is not None
 
-    def _complete_otp_challenge(self, requested_after: datetime) -> None:
-        otp = self.twilio.wait_for_otp(requested_after=requested_after)
+    async def _complete_otp_challenge(self, requested_after: datetime) -> None:
+        with self.timeline.span("otp_wait"):
+            otp = await asyncio.to_thread(
+                self.twilio.wait_for_otp,
+                requested_after=requested_after,
+                cancel_token=self.cancel_token,
+            )
         logger.info("Received fresh OTP SMS from Twilio message %s.", otp.sid or "<unknown>")
+        delivery = {"number": self.twilio.otp_number, **otp.latency(requested_after)}
+        self.otp_deliveries.append(delivery)
+        logger.info(
+            "OTP reached Twilio after %ss and this job after %ss (%s).",
+            delivery["delivery_seconds"],
+            delivery["seen_seconds"],
+            delivery["source"],
+        )
 
-        inputs = self._otp_inputs()
+        inputs = await self._otp_inputs()
         if not inputs:
             raise BookingError("OTP challenge was detected, but no OTP input was fillable.")
-        if len(inputs) >= len(otp.code) and self._looks_like_split_otp(inputs):
+        if len(inputs) >= len(otp.code) and await self._looks_like_split_otp(inputs):
             for index, digit in enumerate(otp.code):
-                inputs[index].fill(digit)
-                self._human_pause(0.03, 0.12)
+                await inputs[index].fill(digit)
+                await self._human_pause(0.03, 0.12)
         else:
-            inputs[0].fill(otp.code)
-        self._human_pause(0.2, 0.8)
-        if not self._click_first(self.page, OTP_SUBMIT_SELECTORS, timeout_ms=5000):
-            self.page.keyboard.press("Enter")
+            await inputs[0].fill(otp.code)
+        await self._human_pause(0.2, 0.8)
+        if not await self._click_first(self.page, OTP_SUBMIT_SELECTORS, timeout_ms=5000):
+            await self.page.keyboard.press("Enter")
 
-    def _otp_inputs(self) -> list[Locator]:
+    async def _otp_inputs(self) -> list[Locator]:
         locators: list[Locator] = []
         for selector in OTP_INPUT_SELECTORS:
             locator = self.page.locator(selector)
             try:
-                count = min(locator.count(), 8)
+                count = min(await locator.count(), 8)
             except Exception:
                 continue
             for index in range(count):
                 item = locator.nth(index)
                 try:
-                    if item.is_visible(timeout=1000) and item.is_enabled(timeout=1000):
+                    if await item.is_visible(timeout=1000) and await item.is_enabled(timeout=1000):
                         locators.append(item)
                 except Exception:
                     continue
@@ -337,74 +824,51 @@ class BookingBot:
                 return locators
         return locators
 
-    def _looks_like_split_otp(self, inputs: list[Locator]) -> bool:
+    async def _looks_like_split_otp(self, inputs: list[Locator]) -> bool:
         if len(inputs) < 4:
             return False
         for item in inputs[:4]:
             try:
-                maxlength = item.get_attribute("maxlength")
-                size = item.get_attribute("size")
+                maxlength = await item.get_attribute("maxlength")
+                size = await item.get_attribute("size")
                 if maxlength == "1" or size == "1":
                     return True
             except Exception:
                 continue
         return False
 
-    def _select_target_date(self) -> bool:
+    @timed("date_select")
+    async def _select_target_date(self) -> bool:
         target = self.config.target_date
         day = str(target.day)
-        exact_tokens = {
-            target.isoformat(),
-            target.strftime("%B %-d"),
-            target.strftime("%b %-d"),
-            target.strftime("%A, %B %-d"),
-        }
-
-        buttons = self.page.locator(".datelist button.date, button.date")
+        buttons = self.page.locator(DATE_BUTTON_QUERY)
         try:
-            count = buttons.count()
-        except Exception:
-            count = 0
+            entries = await self.page.evaluate(DATE_BUTTONS_SCRIPT, DATE_BUTTON_QUERY)
+        except Exception as exc:
+            logger.debug("Could not read date buttons in one pass: %s", exc)
+            entries = []
 
-        fallback: Locator | None = None
-        for index in range(count):
-            button = buttons.nth(index)
+        index, exact = match_date_button(entries, target)
+        if index is not None:
+            if not exact:
+                logger.warning("Selecting date by day-of-month fallback: %s", day)
             try:
-                text = button.inner_text(timeout=500).strip()
-                attrs = " ".join(
-                    value or ""
-                    for value in (
-                        button.get_attribute("aria-label"),
-                        button.get_attribute("title"),
-                        button.get_attribute("data-date"),
-                        button.get_attribute("datetime"),
-                    )
-                )
-                combined = f"{text} {attrs}"
-                if any(token.lower() in combined.lower() for token in exact_tokens):
-                    button.click()
-                    self._human_pause(0.1, 0.5)
-                    return True
-                if text == day and fallback is None:
-                    fallback = button
-            except Exception:
-                continue
-
-        if fallback is not None:
-            logger.warning("Selecting date by day-of-month fallback: %s", day)
-            fallback.click()
-            self._human_pause(0.1, 0.5)
-            return True
+                await buttons.nth(index).click()
+                await self._human_pause(0.1, 0.5)
+                return True
+            except Exception as exc:
+                logger.debug("Date button %s was not clickable: %s", index, exc)
 
         for selector in DATE_BUTTON_SELECTORS:
-            locator = self._visible_locator((selector.format(day=day),), timeout_ms=1000)
+            locator = await self._visible_locator((selector.format(day=day),), timeout_ms=1000)
             if locator is not None:
-                locator.click()
-                self._human_pause(0.1, 0.5)
+                await locator.click()
+                await self._human_pause(0.1, 0.5)
                 return True
         return False
 
-    def _find_pass_container(self, preference: PassPreference) -> Locator | None:
+    @timed("card_lookup")
+    async def _find_pass_container(self, preference: PassPreference) -> Locator | None:
         quoted_patterns = ", ".join(preference.text_patterns)
         logger.debug("Looking for pass card containing: %s", quoted_patterns)
         for pattern in preference.text_patterns:
@@ -413,92 +877,116 @@ class BookingBot:
                 f".card:has-text('{pattern}')",
                 f"[class*='card' i]:has-text('{pattern}')",
             )
-            locator = self._visible_locator(selectors, timeout_ms=1000)
+            locator = await self._visible_locator(selectors, timeout_ms=1000)
             if locator is not None:
                 return locator
 
         regex = re.compile("|".join(re.escape(pattern) for pattern in preference.text_patterns), re.I)
         text_locator = self.page.get_by_text(regex).first
         try:
-            text_locator.wait_for(state="visible", timeout=1000)
+            await text_locator.wait_for(state="visible", timeout=1000)
             ancestor = text_locator.locator(
                 "xpath=ancestor::*[contains(concat(' ', normalize-space(@class), ' '), ' card ') or contains(@class, 'ImageCard')][1]"
             )
-            if ancestor.count() > 0:
+            if await ancestor.count() > 0:
                 return ancestor.first
         except Exception:
             return None
         return None
 
-    def _pass_is_available(self, container: Locator) -> bool:
+    async def _card_availability(self, container: Locator) -> tuple[bool, bool]:
+        """Read (available, sold_out) from a pass card.
+
+        Only an explicit "sold out" label counts as sold out: cards also read
+        "unavailable" before release, or lack Add To Cart while still rendering.
+        """
         try:
-            text = container.inner_text(timeout=2000).lower()
+            text = (await container.inner_text(timeout=2000)).lower()
         except Exception:
             text = ""
-        unavailable_tokens = ("sold out", "unavailable", "not available", "full")
+        if "sold out" in text:
+            return False, True
+        unavailable_tokens = ("unavailable", "not available", "full")
         if any(token in text for token in unavailable_tokens):
-            return False
-        if self._visible_locator(ADD_TO_CART_SELECTORS, root=container, timeout_ms=1000) is not None:
-            return True
-        return "available" in text
+            return False, False
+        if await self._visible_locator(ADD_TO_CART_SELECTORS, root=container, timeout_ms=1000) is not None:
+            return True, False
+        return "available" in text, False
 
-    def _select_vehicle(self, container: Locator) -> bool:
+    @timed("vehicle_select")
+    async def _select_vehicle(self, container: Locator) -> bool:
         keyword = self.config.vehicle_keyword.lower()
-        if not self._click_first(container, VEHICLE_SELECTOR_SELECTORS, timeout_ms=3000):
-            self._click_first(self.page, VEHICLE_SELECTOR_SELECTORS, timeout_ms=3000)
-        self._human_pause(0.3, 1.0)
-
-        popup = self._visible_locator(
-            (
-                ".popup.smart-select-popup.modal-in",
-                ".smart-select-popup",
-                ".modal-in",
-                "[role='dialog']",
-            ),
-            timeout_ms=5000,
-        )
-        root = popup if popup is not None else self.page
-
-        labels = root.locator("label.item-radio, label:has(.item-title), label")
-        try:
-            count = labels.count()
-        except Exception:
-            count = 0
-        for index in range(count):
-            label = labels.nth(index)
+        await self._open_vehicle_selector(container, timeout_ms=3000)
+        label = await self._find_vehicle_label(await self._vehicle_popup_root())
+        if label is not None:
             try:
-                text = label.inner_text(timeout=500).strip()
-                if keyword in text.lower():
-                    logger.info("Selecting vehicle matching keyword: %s", text)
-                    label.click()
-                    self._human_pause(0.2, 0.7)
-                    self._close_vehicle_popup_if_open()
-                    return True
-            except Exception:
-                continue
+                logger.info("Selecting vehicle matching keyword: %s", self.vehicle_label)
+                await label.click()
+                await self._human_pause(0.2, 0.7)
+                await self._close_vehicle_popup_if_open()
+                return True
+            except Exception as exc:
+                logger.debug("Vehicle label click failed: %s", exc)
 
         selects = self.page.locator("select")
         try:
-            select_count = selects.count()
+            select_count = await selects.count()
         except Exception:
             select_count = 0
         for index in range(select_count):
             select = selects.nth(index)
             try:
                 options = select.locator("option")
-                for option_index in range(options.count()):
+                for option_index in range(await options.count()):
                     option = options.nth(option_index)
-                    label = option.inner_text(timeout=500).strip()
-                    value = option.get_attribute("value") or label
+                    label = (await option.inner_text(timeout=500)).strip()
+                    value = await option.get_attribute("value") or label
                     if keyword in label.lower():
-                        select.select_option(value=value)
+                        await select.select_option(value=value)
                         return True
             except Exception:
                 continue
         return False
 
-    def _close_vehicle_popup_if_open(self) -> None:
-        self._click_first(
+    async def _open_vehicle_selector(self, container: Locator, timeout_ms: int) -> bool:
+        if not await self._click_first(container, VEHICLE_SELECTOR_SELECTORS, timeout_ms=timeout_ms):
+            if not await self._click_first(self.page, VEHICLE_SELECTOR_SELECTORS, timeout_ms=timeout_ms):
+                return False
+        await self._human_pause(0.3, 1.0)
+        return True
+
+    async def _vehicle_popup_root(self):
+        popup = await self._visible_locator(VEHICLE_POPUP_SELECTORS, timeout_ms=5000)
+        return popup if popup is not None else self.page
+
+    async def _find_vehicle_label(self, root) -> Locator | None:
+        labels = root.locator(VEHICLE_LABEL_QUERY)
+        if self.vehicle_label:
+            remembered = labels.filter(has_text=self.vehicle_label).first
+            try:
+                if await remembered.is_visible():
+                    return remembered
+            except Exception:
+                pass
+
+        keyword = self.config.vehicle_keyword.lower()
+        try:
+            count = await labels.count()
+        except Exception:
+            count = 0
+        for index in range(count):
+            label = labels.nth(index)
+            try:
+                text = (await label.inner_text(timeout=500)).strip()
+            except Exception:
+                continue
+            if keyword in text.lower():
+                self.vehicle_label = text
+                return label
+        return None
+
+    async def _close_vehicle_popup_if_open(self) -> None:
+        await self._click_first(
             self.page,
             (
                 ".link.popup-close",
@@ -509,29 +997,45 @@ class BookingBot:
             timeout_ms=1000,
         )
 
-    def _click_first(self, root, selectors: Iterable[str], timeout_ms: int) -> bool:
-        locator = self._visible_locator(selectors, root=root, timeout_ms=timeout_ms)
+    async def _click_first(self, root, selectors: Iterable[str], timeout_ms: int) -> bool:
+        locator = await self._visible_locator(selectors, root=root, timeout_ms=timeout_ms)
         if locator is None:
             return False
         try:
-            locator.click()
-            self._human_pause()
+            await locator.click()
+            await self._human_pause()
             return True
         except Exception as exc:
             logger.debug("Click failed for visible locator: %s", exc)
             return False
 
-    def _visible_locator(
+    async def _click_step(self, step: str, roots: tuple, selectors: Iterable[str], timeout_ms: int) -> bool:
+        with self.timeline.span(step) as span:
+            for root in roots:
+                if await self._click_first(root, selectors, timeout_ms=timeout_ms):
+                    return True
+            span.ok = False
+            return False
+
+    async def _visible_locator(
         self,
         selectors: Iterable[str],
         root=None,
         timeout_ms: int = 1000,
     ) -> Locator | None:
         search_root = root if root is not None else self.page
+        selectors = tuple(selectors)
+        if len(selectors) > 1:
+            try:
+                return await self._race_visible(search_root, selectors, timeout_ms)
+            except PlaywrightTimeoutError:
+                return None
+            except Exception as exc:
+                logger.debug("Selector race failed, trying selectors one at a time: %s", exc)
         for selector in selectors:
             try:
                 locator = search_root.locator(selector).first
-                locator.wait_for(state="visible", timeout=timeout_ms)
+                await locator.wait_for(state="visible", timeout=timeout_ms)
                 return locator
             except PlaywrightTimeoutError:
                 continue
@@ -540,13 +1044,35 @@ class BookingBot:
                 continue
         return None
 
-    def _settle_page(self, timeout_ms: int = 15000) -> None:
+    async def _race_visible(self, search_root, selectors: tuple[str, ...], timeout_ms: int) -> Locator:
+        """Wait for any selector to become visible under one shared deadline.
+
+        Once something is visible, the earliest selector in priority order that
+        currently matches a visible element wins.
+        """
+        candidates = [search_root.locator(f"{selector} >> visible=true") for selector in selectors]
+        combined = candidates[0]
+        for candidate in candidates[1:]:
+            combined = combined.or_(candidate)
+        await combined.first.wait_for(state="visible", timeout=timeout_ms)
+        for candidate in candidates:
+            try:
+                if await candidate.count() > 0:
+                    return candidate.first
+            except Exception:
+                continue
+        return combined.first
+
+    @timed("settle")
+    async def _settle_page(self, timeout_ms: int = 15000) -> bool:
         try:
-            self.page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
-            self.page.locator("body").wait_for(state="visible", timeout=min(timeout_ms, 5000))
-            self.page.wait_for_timeout(500)
+            await self.page.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+            await self.page.locator("body").wait_for(state="visible", timeout=min(timeout_ms, 5000))
+            await self.page.wait_for_timeout(500)
+            return True
         except PlaywrightTimeoutError:
             logger.debug("Page did not reach DOM/body readiness within %sms; continuing.", timeout_ms)
+            return False
 
-    def _human_pause(self, minimum: float = 0.15, maximum: float = 0.65) -> None:
-        time.sleep(random.uniform(minimum, maximum))
+    async def _human_pause(self, minimum: float = 0.15, maximum: float = 0.65) -> None:
+        await asyncio.sleep(random.uniform(minimum, maximum))
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+
+class JobCancelled(Exception):
+    """Raised by blocking helpers when their job's token is cancelled."""
+
+
+class CancelToken:
+    """Cancels one job from any thread.
+
+    Async code is interrupted at its next await by cancelling the bound task.
+    Blocking helpers that run in worker threads, like the Twilio OTP poll,
+    call ``wait`` between steps instead of ``time.sleep``.
+    """
+
+    def __init__(self) -> None:
+        self.reason: str | None = None
+        self.timed_out = False
+        self._event = threading.Event()
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._budget: asyncio.TimerHandle | None = None
+        self._linked: set[threading.Event] = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def bind(self, task: asyncio.Task) -> None:
+        self._task = task
+        self._loop = task.get_loop()
+
+    def cancel(self, reason: str) -> bool:
+        """Cancel the job; returns False if it was already cancelled."""
+        if self._event.is_set():
+            return False
+        self.reason = reason
+        self._event.set()
+        for event in list(self._linked):
+            event.set()
+        if self._task is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        return True
+
+    def start_budget(self, seconds: float) -> None:
+        """Cancel the job if it is still running after ``seconds``."""
+        self.stop_budget()
+        loop = asyncio.get_running_loop()
+        self._budget = loop.call_later(seconds, self._expire, seconds)
+
+    def stop_budget(self) -> None:
+        if self._budget is not None:
+            self._budget.cancel()
+            self._budget = None
+
+    def _expire(self, seconds: float) -> None:
+        if not self._event.is_set():
+            self.timed_out = True
+            self.cancel(f"Time budget of {seconds:.0f}s exceeded.")
+
+    def link(self, event: threading.Event) -> None:
+        """Also set ``event`` on cancel, for helpers that sleep on their own event."""
+        self._linked.add(event)
+        if self._event.is_set():
+            event.set()
+
+    def unlink(self, event: threading.Event) -> None:
+        self._linked.discard(event)
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds; returns True as soon as cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise JobCancelled(self.reason or "Job was cancelled.")
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Any, Iterable
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+
+logger = logging.getLogger("buntzen_pass_bot.clock_sync")
+
+
+class ServerClock:
+    """Estimates the booking server's clock offset from response Date headers.
+
+    A Date header is the server time, floored to the second, at some moment
+    between sending the request and receiving the response headers. Each
+    response therefore bounds the offset (server minus local) to an interval.
+    Intersecting those intervals narrows the bound as samples land at
+    different sub-second phases. The estimate is the interval midpoint and
+    the error is its half-width.
+    """
+
+    def __init__(self, hosts: Iterable[str] = ()) -> None:
+        self.hosts = frozenset(host.lower() for host in hosts if host)
+        self.lower: float | None = None
+        self.upper: float | None = None
+        self.samples = 0
+        self.source = None
+
+    @classmethod
+    def from_config(cls, config) -> "ServerClock":
+        urls = (config.all_day_pass_url, config.half_day_pass_url)
+        return cls(urlsplit(url).hostname or "" for url in urls if url)
+
+    @property
+    def offset(self) -> float:
+        """Seconds to add to the local clock to get server time."""
+        if self.lower is None:
+            return 0.0
+        return (self.lower + self.upper) / 2
+
+    @property
+    def error(self) -> float | None:
+        if self.lower is None:
+            return None
+        return (self.upper - self.lower) / 2
+
+    def now(self, timezone: ZoneInfo) -> datetime:
+        return datetime.now(timezone) + timedelta(seconds=self.offset)
+
+    def to_local(self, server_time: datetime) -> datetime:
+        return server_time - timedelta(seconds=self.offset)
+
+    def observe(self, date_header: str, sent_at: float, received_at: float) -> bool:
+        """Fold one response into the estimate; times are local epoch seconds."""
+        try:
+            server_second = parsedate_to_datetime(date_header).timestamp()
+        except (TypeError, ValueError):
+            return False
+        if received_at < sent_at:
+            return False
+        lower = server_second - received_at
+        upper = server_second + 1 - sent_at
+        if self.lower is None or lower > self.upper or upper < self.lower:
+            if self.lower is not None:
+                logger.info("Server clock sample disagrees with the estimate; restarting from it.")
+                self.samples = 0
+            self.lower, self.upper = lower, upper
+        else:
+            self.lower = max(self.lower, lower)
+            self.upper = min(self.upper, upper)
+        self.samples += 1
+        return True
+
+    def attach(self, source) -> None:
+        self.source = source
+        source.on("response", self._on_response)
+
+    def detach(self) -> None:
+        if self.source is None:
+            return
+        try:
+            self.source.remove_listener("response", self._on_response)
+        except Exception as exc:
+            logger.debug("Could not detach clock listener: %s", exc)
+        self.source = None
+
+    def describe(self) -> str:
+        if self.lower is None:
+            return "Server clock offset unknown; no Date headers seen. Using the local clock."
+        return f"Server clock offset {self.offset:+.3f}s (±{self.error:.3f}s) from {self.samples} response(s)."
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "offset_seconds": round(self.offset, 4),
+            "error_seconds": None if self.error is None else round(self.error, 4),
+            "samples": self.samples,
+        }
+
+    def _on_response(self, response) -> None:
+        try:
+            if self.hosts and (urlsplit(response.url).hostname or "").lower() not in self.hosts:
+                return
+            headers = response.headers or {}
+            if "date" not in headers or "age" in headers or response.status == 304:
+                return
+            window = _request_window(response.request)
+            if window is not None:
+                self.observe(headers["date"], *window)
+        except Exception as exc:
+            logger.debug("Ignoring response for clock sync: %s", exc)
+
+
+def _request_window(request) -> tuple[float, float] | None:
+    """Local epoch seconds bracketing when the server produced the response."""
+    timing = request.timing or {}
+    start = timing.get("startTime", -1)
+    response_start = timing.get("responseStart", -1)
+    if start is None or start < 0 or response_start is None or response_start < 0:
+        return None
+    sent_at = (start + max(timing.get("requestStart", -1), 0)) / 1000
+    return sent_at, (start + response_start) / 1000
@@ -15,18 +15,18 @@ class Diagnostics:
         safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "-", name).strip("-") or "artifact"
         return self.base_dir / f"{safe_name}.{suffix.lstrip('.')}"
 
-    def screenshot(self, page, name: str) -> Path | None:
+    async def screenshot(self, page, name: str) -> Path | None:
         path = self.path_for(name, "png")
         try:
-            page.screenshot(path=str(path), full_page=True)
+            await page.screenshot(path=str(path), full_page=True)
             return path
         except Exception:
             return None
 
-    def html(self, page, name: str) -> Path | None:
+    async def html(self, page, name: str) -> Path | None:
         path = self.path_for(name, "html")
         try:
-            path.write_text(page.content(), encoding="utf-8")
+            path.write_text(await page.content(), encoding="utf-8")
             return path
         except Exception:
             return None
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from functools import cached_property
 from datetime import date, datetime, time, timedelta
 from pathlib import Path
 from typing import Iterable
@@ -10,6 +11,18 @@ from zoneinfo import ZoneInfo
 
 
 RUN_MODES = {"dry-run", "manual", "auto"}
+BLOCKABLE_RESOURCE_TYPES = {
+    "stylesheet",
+    "image",
+    "media",
+    "font",
+    "script",
+    "texttrack",
+    "eventsource",
+    "websocket",
+    "manifest",
+    "other",
+}
 COMMANDS_REQUIRING_TWILIO = {"auth-check", "dry-run", "book"}
 
 
@@ -29,6 +42,11 @@ class BotConfig:
     poll_deadline_seconds: int
     poll_min_seconds: float
     poll_max_seconds: float
+    poll_dense_seconds: int
+    poll_dense_min_seconds: float
+    poll_dense_max_seconds: float
+    sold_out_stop_attempts: int
+    soft_refresh_limit: int
     run_mode: str
     headless: bool
     browser_channel: str | None
@@ -49,24 +67,32 @@ class BotConfig:
     twilio_alerts_enabled: bool
     otp_timeout_seconds: int
     otp_poll_interval_seconds: float
+    blocked_resource_types: tuple[str, ...]
+    blocked_url_patterns: tuple[str, ...]
+    allowed_url_patterns: tuple[str, ...]
+    parallel_preferences: bool
 
-    @property
+    @cached_property
     def timezone(self) -> ZoneInfo:
         return ZoneInfo(self.timezone_name)
 
-    @property
+    @cached_property
     def release_at(self) -> datetime:
         release_date = self.target_date - timedelta(days=1)
         return datetime.combine(release_date, self.start_time, tzinfo=self.timezone)
 
-    @property
+    @cached_property
     def prep_at(self) -> datetime:
         return self.release_at - timedelta(minutes=self.prep_minutes_before)
 
-    @property
+    @cached_property
     def auth_deadline_at(self) -> datetime:
         return self.release_at - timedelta(minutes=self.auth_deadline_minutes_before)
 
+    def resolve_times(self) -> tuple[datetime, datetime]:
+        """Compute the prep and auth deadline times now; later reads hit the cache."""
+        return self.prep_at, self.auth_deadline_at
+
     @property
     def login_probe_url(self) -> str:
         return self.all_day_pass_url or self.half_day_pass_url or "https://yodelportal.com/buntzen-lake"
@@ -88,6 +114,8 @@ class BotConfig:
             "twilio_alert_to_number": _mask_phone(self.twilio_alert_to_number),
             "has_yodel_email": bool(self.yodel_email),
             "has_yodel_password": bool(self.yodel_password),
+            "blocked_resource_types": list(self.blocked_resource_types),
+            "parallel_preferences": self.parallel_preferences,
         }
 
 
@@ -106,6 +134,11 @@ def load_config(command: str | None = None) -> BotConfig:
         poll_deadline_seconds=_int_env("POLL_DEADLINE_SECONDS", default=120, minimum=5),
         poll_min_seconds=_float_env("POLL_MIN_SECONDS", default=1.4, minimum=0.5),
         poll_max_seconds=_float_env("POLL_MAX_SECONDS", default=3.6, minimum=0.6),
+        poll_dense_seconds=_int_env("POLL_DENSE_SECONDS", default=30, minimum=0),
+        poll_dense_min_seconds=_float_env("POLL_DENSE_MIN_SECONDS", default=0.5, minimum=0.2),
+        poll_dense_max_seconds=_float_env("POLL_DENSE_MAX_SECONDS", default=1.2, minimum=0.2),
+        sold_out_stop_attempts=_int_env("SOLD_OUT_STOP_ATTEMPTS", default=0, minimum=0),
+        soft_refresh_limit=_int_env("SOFT_REFRESH_LIMIT", default=5, minimum=0),
         run_mode=_choice_env("RUN_MODE", RUN_MODES, default="manual"),
         headless=_bool_env("HEADLESS", default=False),
         browser_channel=_optional_env("BROWSER_CHANNEL", default="chrome"),
@@ -126,6 +159,10 @@ def load_config(command: str | None = None) -> BotConfig:
         twilio_alerts_enabled=_bool_env("TWILIO_ALERTS_ENABLED", default=True),
         otp_timeout_seconds=_int_env("OTP_TIMEOUT_SECONDS", default=120, minimum=10),
         otp_poll_interval_seconds=_float_env("OTP_POLL_INTERVAL_SECONDS", default=3.0, minimum=1.0),
+        blocked_resource_types=parse_list(_optional_env("BLOCK_RESOURCE_TYPES")),
+        blocked_url_patterns=parse_list(_optional_env("BLOCK_URL_PATTERNS")),
+        allowed_url_patterns=parse_list(_optional_env("ALLOW_URL_PATTERNS")),
+        parallel_preferences=_bool_env("PARALLEL_PREFERENCES", default=False),
     )
 
     _validate(config, command=command)
@@ -137,6 +174,8 @@ def _validate(config: BotConfig, command: str | None) -> None:
     _validate_timezone(config.timezone_name)
     if config.poll_min_seconds > config.poll_max_seconds:
         raise ConfigError("POLL_MIN_SECONDS cannot be greater than POLL_MAX_SECONDS.")
+    if config.poll_dense_min_seconds > config.poll_dense_max_seconds:
+        raise ConfigError("POLL_DENSE_MIN_SECONDS cannot be greater than POLL_DENSE_MAX_SECONDS.")
     if not (config.check_all_day or config.check_morning or config.check_afternoon):
         raise ConfigError("Enable at least one pass type: CHECK_ALL_DAY, CHECK_MORNING, or CHECK_AFTERNOON.")
     if config.check_all_day:
@@ -156,12 +195,23 @@ def _validate(config: BotConfig, command: str | None) -> None:
             if not value:
                 raise ConfigError(f"{name} is required for unattended OTP handling.")
         _validate_phone("TWILIO_OTP_NUMBER", config.twilio_otp_number)
+    unknown_types = set(config.blocked_resource_types) - BLOCKABLE_RESOURCE_TYPES
+    if unknown_types:
+        valid = ", ".join(sorted(BLOCKABLE_RESOURCE_TYPES))
+        raise ConfigError(f"BLOCK_RESOURCE_TYPES has unsupported types {', '.join(sorted(unknown_types))}; use: {valid}.")
     if config.twilio_alerts_enabled:
         if not config.twilio_alert_to_number:
             raise ConfigError("TWILIO_ALERT_TO_NUMBER is required when TWILIO_ALERTS_ENABLED=true.")
         _validate_phone("TWILIO_ALERT_TO_NUMBER", config.twilio_alert_to_number)
 
 
+def parse_list(value: str | None) -> tuple[str, ...]:
+    if not value:
+        return ()
+    items = (item.strip().lower() for item in value.replace("\n", ",").split(","))
+    return tuple(item for item in items if item)
+
+
 def _required_env(name: str) -> str:
     value = _optional_env(name)
     if value is None:
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Iterable
+
+from .pass_types import PassPreference
+
+
+logger = logging.getLogger("buntzen_pass_bot.inventory")
+
+LABEL_KEYS = ("name", "title", "label", "description", "productName", "product_name", "passName", "pass_name")
+DATE_KEYS = ("date", "eventDate", "event_date", "day", "startDate", "start_date", "validDate", "valid_date")
+AVAILABLE_FLAG_KEYS = ("available", "isAvailable", "is_available", "inStock", "in_stock", "bookable")
+SOLD_OUT_FLAG_KEYS = ("soldOut", "sold_out", "isSoldOut", "is_sold_out")
+QUANTITY_KEYS = (
+    "remaining",
+    "available_quantity",
+    "availableQuantity",
+    "quantityAvailable",
+    "quantity_available",
+    "inventory",
+    "spotsLeft",
+    "spots_left",
+    "stock",
+)
+STATUS_KEYS = ("status", "availability", "state")
+UNAVAILABLE_WORDS = ("sold", "unavailable", "not available", "full", "closed")
+AVAILABLE_WORDS = ("available", "open", "on sale")
+AVAILABLE = "available"
+SOLD_OUT = "sold_out"
+UNAVAILABLE = "unavailable"
+
+
+@dataclass(frozen=True)
+class Observation:
+    available: bool
+    seen_at: float
+    sold_out: bool = False
+
+
+def parse_availability(
+    payload: Any,
+    preferences: Iterable[PassPreference],
+    target_date: date,
+) -> dict[str, bool]:
+    """Map pass keys to availability from an inventory-like JSON payload."""
+    return {key: state == AVAILABLE for key, state in parse_inventory(payload, preferences, target_date).items()}
+
+
+def parse_inventory(
+    payload: Any,
+    preferences: Iterable[PassPreference],
+    target_date: date,
+) -> dict[str, str]:
+    """Map pass keys to available, sold_out, or unavailable from a JSON payload.
+
+    Any object whose label matches a preference's text patterns and carries an
+    availability flag, count, or status is counted. An object takes its date
+    from its own date field or the nearest enclosing object's; objects dated
+    for another day, or not dated at all, are skipped, since the page also
+    fetches its default day. A pass is available if any matching entry says so,
+    and sold out only if every matching entry is explicitly sold out: a sold-out
+    flag, a zero count, or a "sold" status. Other "no" answers, which the page
+    also gives before release, are just unavailable.
+    """
+    preferences = tuple(preferences)
+    found: dict[str, str] = {}
+    target = target_date.isoformat()
+    for item, day in _walk(payload):
+        label = " ".join(str(item[key]) for key in LABEL_KEYS if isinstance(item.get(key), str)).lower()
+        if not label or day != target:
+            continue
+        state = _item_state(item)
+        if state is None:
+            continue
+        for preference in preferences:
+            if any(pattern.lower() in label for pattern in preference.text_patterns):
+                found[preference.key] = _combine(found.get(preference.key), state)
+    return found
+
+
+class InventoryWatcher:
+    """Collects per-pass availability from JSON responses seen by a context."""
+
+    def __init__(self, preferences: Iterable[PassPreference], target_date: date) -> None:
+        self.preferences = tuple(preferences)
+        self.target_date = target_date
+        self.observations: dict[str, Observation] = {}
+        self.source = None
+
+    def attach(self, source) -> None:
+        self.source = source
+        source.on("response", self._on_response)
+
+    def detach(self) -> None:
+        if self.source is None:
+            return
+        try:
+            self.source.remove_listener("response", self._on_response)
+        except Exception as exc:
+            logger.debug("Could not detach inventory listener: %s", exc)
+        self.source = None
+
+    def mark(self) -> float:
+        return time.monotonic()
+
+    def availability(self, key: str, since: float) -> bool | None:
+        observation = self.observations.get(key)
+        if observation is None or observation.seen_at < since:
+            return None
+        return observation.available
+
+    def sold_out(self, key: str, since: float) -> bool:
+        observation = self.observations.get(key)
+        return observation is not None and observation.seen_at >= since and observation.sold_out
+
+    async def wait_for(self, key: str, since: float, timeout_ms: int) -> bool | None:
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            available = self.availability(key, since)
+            if available is not None or time.monotonic() >= deadline:
+                return available
+            await asyncio.sleep(0.05)
+
+    def record(self, payload: Any) -> dict[str, str]:
+        found = parse_inventory(payload, self.preferences, self.target_date)
+        seen_at = time.monotonic()
+        for key, state in found.items():
+            self.observations[key] = Observation(available=state == AVAILABLE, seen_at=seen_at, sold_out=state == SOLD_OUT)
+        if found:
+            logger.info("Inventory response availability: %s", found)
+        return found
+
+    async def _on_response(self, response) -> None:
+        try:
+            if response.request.resource_type not in {"xhr", "fetch"}:
+                return
+            content_type = (response.headers or {}).get("content-type", "")
+            if "json" not in content_type.lower():
+                return
+            self.record(await response.json())
+        except Exception as exc:
+            logger.debug("Ignoring unreadable response for inventory: %s", exc)
+
+
+def _walk(payload: Any):
+    """Yield every object in a payload with the date it falls under, if any."""
+    stack = [(payload, None)]
+    while stack:
+        item, day = stack.pop()
+        if isinstance(item, dict):
+            day = _item_date(item) or day
+            yield item, day
+            stack.extend((value, day) for value in item.values())
+        elif isinstance(item, list):
+            stack.extend((value, day) for value in item)
+
+
+def _item_date(item: dict) -> str | None:
+    for key in DATE_KEYS:
+        value = item.get(key)
+        if isinstance(value, str) and len(value) >= 10 and value[4] == "-":
+            return value[:10]
+    return None
+
+
+def _item_state(item: dict) -> str | None:
+    for key in SOLD_OUT_FLAG_KEYS:
+        if isinstance(item.get(key), bool):
+            return SOLD_OUT if item[key] else AVAILABLE
+    for key in AVAILABLE_FLAG_KEYS:
+        if isinstance(item.get(key), bool):
+            return AVAILABLE if item[key] else UNAVAILABLE
+    for key in QUANTITY_KEYS:
+        value = item.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return AVAILABLE if value > 0 else SOLD_OUT
+    for key in STATUS_KEYS:
+        value = item.get(key)
+        if isinstance(value, str):
+            lowered = value.lower()
+            if "sold" in lowered:
+                return SOLD_OUT
+            if any(word in lowered for word in UNAVAILABLE_WORDS):
+                return UNAVAILABLE
+            if any(word in lowered for word in AVAILABLE_WORDS):
+                return AVAILABLE
+    return None
+
+
+def _combine(current: str | None, state: str) -> str:
+    if current is None:
+        return state
+    if AVAILABLE in (current, state):
+        return AVAILABLE
+    return SOLD_OUT if current == state == SOLD_OUT else UNAVAILABLE
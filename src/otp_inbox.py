@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
+from typing import Callable, Iterable
+
+
+logger = logging.getLogger("buntzen_pass_bot.otp_inbox")
+
+OTP_RE = re.compile(r"(?<!\d)(\d{4,8})(?!\d)")
+# Messages kept per number, so a code that lands just before a waiter
+# registers is still found.
+RECENT_LIMIT = 20
+RECENT_SECONDS = 600
+# Polls ask Twilio only for messages sent after this much before the oldest
+# pending request, which allows for skew between our clock and Twilio's.
+CLOCK_SKEW_SECONDS = 60
+# Re-list this much before the newest polled message; date_sent has
+# one-second resolution and the sid check drops the repeats.
+WATERMARK_OVERLAP_SECONDS = 2
+
+
+@dataclass(frozen=True)
+class InboundSms:
+    sid: str | None
+    to: str
+    from_: str | None
+    body: str
+    date_sent: datetime
+    direction: str = "inbound"
+    source: str = "poll"
+    received_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @property
+    def key(self) -> str:
+        return self.sid or f"{self.date_sent.isoformat()}|{self.from_}|{self.body}"
+
+    @cached_property
+    def code(self) -> str | None:
+        return extract_otp(self.body)
+
+
+@dataclass
+class _Feed:
+    """Everything known about one destination number."""
+
+    messages: deque = field(default_factory=lambda: deque(maxlen=RECENT_LIMIT))
+    claimed: set[str] = field(default_factory=set)
+    waiters: list["OtpWaiter"] = field(default_factory=list)
+    polling: bool = False
+    last_poll: float = float("-inf")
+    polled_through: datetime | None = None
+
+
+class OtpWaiter:
+    def __init__(self, inbox: "OtpInbox", number: str, requested_after: datetime) -> None:
+        self.inbox = inbox
+        self.number = number
+        self.requested_after = requested_after
+        self.event = threading.Event()
+        self.claimed: InboundSms | None = None
+
+    def claim(self) -> InboundSms | None:
+        return self.inbox.claim(self)
+
+    def wait(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds; returns True as soon as a message arrives."""
+        fired = self.event.wait(max(timeout, 0.0))
+        self.event.clear()
+        return fired
+
+    def close(self) -> None:
+        self.inbox.unregister(self)
+
+
+class OtpInbox:
+    """Shared OTP message feed per Twilio number.
+
+    Every job waiting on a number registers here. Messages arrive from the
+    inbound SMS webhook or from one shared poll of the Twilio message list per
+    interval, whichever waiter's turn it is, and wake every waiter on the
+    number. Each code is claimed by exactly one waiter: waiters are served in
+    the order they requested a code, each taking the oldest unclaimed code
+    sent after its request.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.feeds: dict[str, _Feed] = {}
+
+    def register(self, number: str, requested_after: datetime) -> OtpWaiter:
+        waiter = OtpWaiter(self, _normalize(number), requested_after)
+        with self.lock:
+            self.feeds.setdefault(waiter.number, _Feed()).waiters.append(waiter)
+        return waiter
+
+    def unregister(self, waiter: OtpWaiter) -> None:
+        with self.lock:
+            feed = self.feeds.get(waiter.number)
+            if feed is not None and waiter in feed.waiters:
+                feed.waiters.remove(waiter)
+
+    def deliver(self, message: InboundSms) -> int:
+        """Store an inbound SMS and wake its number's waiters; returns how many were woken."""
+        number = _normalize(message.to)
+        with self.lock:
+            feed = self.feeds.setdefault(number, _Feed())
+            if any(seen.key == message.key for seen in feed.messages):
+                return 0
+            feed.messages.append(message)
+            feed.claimed &= {seen.key for seen in feed.messages}
+            waiters = list(feed.waiters)
+        for waiter in waiters:
+            waiter.event.set()
+        logger.info("Inbound SMS %s delivered to %s OTP waiter(s).", message.sid or "<unknown>", len(waiters))
+        return len(waiters)
+
+    def poll_if_due(
+        self,
+        number: str,
+        fetch: Callable[[datetime | None], Iterable[InboundSms]],
+        interval: float,
+    ) -> bool:
+        """Run ``fetch`` for the number unless any waiter polled it within ``interval``.
+
+        ``fetch`` gets the lower bound for date_sent: just before the newest
+        message an earlier poll saw, but never earlier than the oldest pending
+        request allows. The interval runs from the start of a poll; waiters on
+        the number are woken when it finishes.
+        """
+        number = _normalize(number)
+        with self.lock:
+            feed = self.feeds.setdefault(number, _Feed())
+            if feed.polling or time.monotonic() - feed.last_poll < interval:
+                return False
+            feed.polling = True
+            feed.last_poll = time.monotonic()
+            since = self._lower_bound(feed)
+        try:
+            messages = list(fetch(since))
+        finally:
+            with self.lock:
+                feed.polling = False
+                waiters = list(feed.waiters)
+            for waiter in waiters:
+                waiter.event.set()
+        for message in messages:
+            self.deliver(message)
+        if messages:
+            newest = max(message.date_sent for message in messages)
+            with self.lock:
+                if feed.polled_through is None or newest > feed.polled_through:
+                    feed.polled_through = newest
+        return True
+
+    def known(self, number: str) -> frozenset[str]:
+        """Sids already in the number's feed, which a poll can skip."""
+        with self.lock:
+            feed = self.feeds.get(_normalize(number))
+            return frozenset() if feed is None else frozenset(message.sid for message in feed.messages if message.sid)
+
+    def seconds_until_poll(self, number: str, interval: float) -> float:
+        """Seconds until the number is due a poll; a full interval while one is running."""
+        with self.lock:
+            feed = self.feeds.get(_normalize(number))
+            if feed is None:
+                return 0.0
+            if feed.polling:
+                return interval
+            return max(feed.last_poll + interval - time.monotonic(), 0.0)
+
+    def claim(self, waiter: OtpWaiter) -> InboundSms | None:
+        """Hand ``waiter`` its code, if the codes sent so far reach it in request order."""
+        if waiter.claimed is not None:
+            return waiter.claimed
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=RECENT_SECONDS)
+        with self.lock:
+            feed = self.feeds.get(waiter.number)
+            if feed is None:
+                return None
+            available = sorted(
+                (
+                    message
+                    for message in feed.messages
+                    if message.key not in feed.claimed and message.date_sent >= cutoff and message.code
+                ),
+                key=lambda message: message.date_sent,
+            )
+            pending = sorted((item for item in feed.waiters if item.claimed is None), key=lambda item: item.requested_after)
+            for candidate in pending:
+                match = next((message for message in available if message.date_sent >= candidate.requested_after), None)
+                if match is None:
+                    continue
+                available.remove(match)
+                if candidate is waiter:
+                    feed.claimed.add(match.key)
+                    waiter.claimed = match
+                    return match
+        return None
+
+    @staticmethod
+    def _lower_bound(feed: _Feed) -> datetime | None:
+        pending = [waiter.requested_after for waiter in feed.waiters if waiter.claimed is None]
+        if not pending:
+            return None
+        since = min(pending) - timedelta(seconds=CLOCK_SKEW_SECONDS)
+        if feed.polled_through is not None:
+            since = max(since, feed.polled_through - timedelta(seconds=WATERMARK_OVERLAP_SECONDS))
+        return since
+
+
+def extract_otp(body: str) -> str | None:
+    matches = OTP_RE.findall(body or "")
+    if not matches:
+        return None
+    return matches[0]
+
+
+def _normalize(number: str) -> str:
+    return "".join(ch for ch in number if ch.isdigit())
+
+
+inbox = OtpInbox()
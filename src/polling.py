@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class PollDecision:
+    stop: bool
+    phase: str
+    delay: float
+    reason: str
+
+
+class PollingPolicy:
+    """Paces booking attempts after release and decides when to give up.
+
+    Attempts are dense for the first ``dense_seconds``, while released passes
+    are most likely to still be in stock or return from abandoned carts, then
+    fall back to the sparser poll range. Polling stops at the deadline, or
+    early once every selected pass was seen sold out on
+    ``sold_out_stop_attempts`` consecutive sparse-phase attempts (0, the
+    default, disables the early stop). Dense-phase attempts never count, since
+    passes can still return from abandoned carts right after release.
+    """
+
+    def __init__(
+        self,
+        deadline_seconds: float,
+        dense_seconds: float,
+        dense_range: tuple[float, float],
+        sparse_range: tuple[float, float],
+        sold_out_stop_attempts: int,
+        clock: Callable[[], float] = time.monotonic,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.deadline_seconds = deadline_seconds
+        self.dense_seconds = dense_seconds
+        self.dense_range = dense_range
+        self.sparse_range = sparse_range
+        self.sold_out_stop_attempts = sold_out_stop_attempts
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.started_at = clock()
+        self.sold_out_streak = 0
+
+    @classmethod
+    def from_config(cls, config) -> "PollingPolicy":
+        return cls(
+            deadline_seconds=config.poll_deadline_seconds,
+            dense_seconds=config.poll_dense_seconds,
+            dense_range=(config.poll_dense_min_seconds, config.poll_dense_max_seconds),
+            sparse_range=(config.poll_min_seconds, config.poll_max_seconds),
+            sold_out_stop_attempts=config.sold_out_stop_attempts,
+        )
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started_at
+
+    def phase(self) -> str:
+        return "dense" if self.elapsed() < self.dense_seconds else "sparse"
+
+    def next(self, sold_out: bool) -> PollDecision:
+        """Decide what follows a failed attempt."""
+        phase = self.phase()
+        if not sold_out:
+            self.sold_out_streak = 0
+        elif phase == "sparse":
+            self.sold_out_streak += 1
+        if self.sold_out_stop_attempts and self.sold_out_streak >= self.sold_out_stop_attempts:
+            reason = f"Every selected pass was sold out on {self.sold_out_streak} consecutive attempts"
+            return PollDecision(True, phase, 0.0, reason)
+        delay = self.rng.uniform(*(self.dense_range if phase == "dense" else self.sparse_range))
+        if self.elapsed() + delay >= self.deadline_seconds:
+            return PollDecision(True, phase, 0.0, "Polling deadline reached")
+        streak = f", sold-out streak {self.sold_out_streak}" if self.sold_out_streak else ""
+        return PollDecision(False, phase, delay, f"{phase} phase at {self.elapsed():.1f}s{streak}")
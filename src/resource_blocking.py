@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+from collections import Counter
+
+
+logger = logging.getLogger("buntzen_pass_bot.resource_blocking")
+
+ROUTE_PATTERN = "**/*"
+# Rough transfer sizes used to estimate what aborted requests would have cost.
+# Aborted requests never download, so their real size cannot be measured.
+ESTIMATED_BYTES = {
+    "image": 60_000,
+    "media": 250_000,
+    "font": 40_000,
+    "stylesheet": 30_000,
+    "script": 80_000,
+    "other": 10_000,
+}
+
+
+class ResourceBlocker:
+    """Aborts request classes that are not needed to book a pass."""
+
+    def __init__(
+        self,
+        blocked_types: tuple[str, ...],
+        blocked_patterns: tuple[str, ...],
+        allowed_patterns: tuple[str, ...],
+    ) -> None:
+        self.blocked_types = frozenset(blocked_types)
+        self.blocked_patterns = tuple(blocked_patterns)
+        self.allowed_patterns = tuple(allowed_patterns)
+        self.blocked = Counter()
+        self.context = None
+
+    @classmethod
+    def from_config(cls, config) -> "ResourceBlocker":
+        return cls(
+            blocked_types=config.blocked_resource_types,
+            blocked_patterns=config.blocked_url_patterns,
+            allowed_patterns=config.allowed_url_patterns,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.blocked_types or self.blocked_patterns)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        lowered = url.lower()
+        if resource_type == "document":
+            return False
+        if any(pattern in lowered for pattern in self.allowed_patterns):
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        return any(pattern in lowered for pattern in self.blocked_patterns)
+
+    async def install(self, context) -> None:
+        if not self.enabled:
+            return
+        await context.route(ROUTE_PATTERN, self._handle)
+        self.context = context
+        logger.info(
+            "Blocking request types [%s] and URL patterns [%s].",
+            ", ".join(sorted(self.blocked_types)),
+            ", ".join(self.blocked_patterns),
+        )
+
+    async def uninstall(self) -> None:
+        if self.context is None:
+            return
+        try:
+            await self.context.unroute(ROUTE_PATTERN, self._handle)
+        except Exception as exc:
+            logger.debug("Could not remove request blocking route: %s", exc)
+        self.context = None
+        self.log_report()
+
+    def estimated_bytes_saved(self) -> int:
+        return sum(ESTIMATED_BYTES.get(kind, ESTIMATED_BYTES["other"]) * count for kind, count in self.blocked.items())
+
+    def log_report(self) -> None:
+        total = sum(self.blocked.values())
+        if not total:
+            logger.info("Request blocking saved no requests.")
+            return
+        by_type = ", ".join(f"{kind}={count}" for kind, count in self.blocked.most_common())
+        logger.info(
+            "Request blocking aborted %s requests (%s), roughly %.1f KB saved.",
+            total,
+            by_type,
+            self.estimated_bytes_saved() / 1024,
+        )
+
+    async def _handle(self, route) -> None:
+        request = route.request
+        try:
+            block = self.should_block(request.resource_type, request.url)
+        except Exception as exc:
+            logger.debug("Request blocking check failed for %s: %s", request.url, exc)
+            block = False
+        if not block:
+            await route.fallback()
+            return
+        try:
+            await route.abort()
+        except Exception as exc:
+            # The route is settled either way; falling back would fail too.
+            logger.debug("Could not abort %s: %s", request.url, exc)
+            return
+        self.blocked[request.resource_type] += 1
@@ -1,36 +1,65 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import random
 import time
 from datetime import datetime
-from typing import Callable
+from typing import Awaitable, Callable
 from zoneinfo import ZoneInfo
 
+from .clock_sync import ServerClock
+
 
 logger = logging.getLogger("buntzen_pass_bot.scheduler")
 
+# Below this many seconds to go the monotonic deadline stops being re-anchored.
+ANCHOR_SECONDS = 2.0
+# Final stretch that is busy-waited instead of slept, to absorb timer slack.
+SPIN_SECONDS = 0.002
+
 
-def sleep_until(target: datetime, timezone: ZoneInfo, final_poll_seconds: float = 0.25) -> None:
-    """Sleep until an aware datetime, using coarse sleeps until the final seconds."""
+async def sleep_until(
+    target: datetime,
+    timezone: ZoneInfo,
+    clock: ServerClock | None = None,
+    spin_seconds: float = SPIN_SECONDS,
+) -> int:
+    """Sleep until an aware datetime and return how late it fired, in nanoseconds.
+
+    The target is converted to a time.monotonic_ns deadline, so wall-clock
+    steps cannot move it. That conversion is redone on each coarse pass until
+    the last ANCHOR_SECONDS, which picks up server clock estimates that improve
+    while waiting. After that the deadline is fixed. The loop then sleeps
+    until the last spin_seconds and busy-waits the rest.
+    """
     while True:
-        now = datetime.now(timezone)
+        now = clock.now(timezone) if clock is not None else datetime.now(timezone)
         remaining = (target - now).total_seconds()
-        if remaining <= 0:
-            return
+        deadline = time.monotonic_ns() + int(remaining * 1e9)
+        if remaining <= ANCHOR_SECONDS:
+            break
         if remaining > 60:
             sleep_for = min(remaining - 30, 60)
-        elif remaining > 5:
-            sleep_for = min(remaining - 2, 5)
         else:
-            sleep_for = min(remaining, final_poll_seconds)
-        time.sleep(max(0.01, sleep_for))
+            sleep_for = min(remaining - ANCHOR_SECONDS, 5)
+        await asyncio.sleep(max(0.01, sleep_for))
+
+    spin_ns = int(spin_seconds * 1e9)
+    while True:
+        remaining_ns = deadline - time.monotonic_ns()
+        if remaining_ns <= spin_ns:
+            break
+        await asyncio.sleep((remaining_ns - spin_ns) / 1e9)
+    while time.monotonic_ns() < deadline:
+        pass
+    return time.monotonic_ns() - deadline
 
 
-def wait_with_keepalive(
+async def wait_with_keepalive(
     until: datetime,
     timezone: ZoneInfo,
-    keepalive: Callable[[], None],
+    keepalive: Callable[[], Awaitable[None]],
     min_interval_seconds: int,
     max_interval_seconds: int,
 ) -> None:
@@ -41,12 +70,12 @@ def wait_with_keepalive(
         if remaining <= 0:
             return
         if remaining <= 20:
-            time.sleep(min(remaining, 1.0))
+            await asyncio.sleep(min(remaining, 1.0))
             continue
 
         sleep_for = random.uniform(min_interval_seconds, max_interval_seconds)
         sleep_for = min(sleep_for, max(1.0, remaining - 10))
         logger.debug("Session keepalive sleeping for %.1fs", sleep_for)
-        time.sleep(sleep_for)
+        await asyncio.sleep(sleep_for)
         if datetime.now(timezone) < until:
-            keepalive()
+            await keepalive()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+
+logger = logging.getLogger("buntzen_pass_bot.timeline")
+
+_SCOPE: ContextVar[str] = ContextVar("timeline_scope", default="")
+# Poll attempts whose spans are kept one by one; later attempts are only
+# summarized per step, so a long poll window stays small in job metadata.
+DETAILED_ATTEMPTS = 5
+# Hard cap on individually kept spans, whatever the attempt.
+MAX_SPANS = 400
+
+
+@dataclass
+class StepSummary:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    failed: int = 0
+
+
+@dataclass
+class Span:
+    step: str
+    scope: str
+    started_at: float
+    duration_ms: float = 0.0
+    ok: bool = True
+
+
+class Timeline:
+    """Timed booking steps, with start offsets relative to an anchor time.
+
+    The anchor is release_at for scheduled bookings, so a span at +850 ms
+    started 850 ms after release. Spans opened inside ``scope`` are tagged with
+    the pass they worked on, which keeps concurrent tabs apart.
+
+    Spans from the first ``DETAILED_ATTEMPTS`` poll attempts are kept as is;
+    after that, or past ``MAX_SPANS``, each step only adds to its summary.
+    """
+
+    def __init__(self, anchor: datetime | None = None) -> None:
+        self.anchor = anchor.timestamp() if anchor is not None else time.time()
+        self.spans: list[Span] = []
+        self.attempt = 0
+        self.summaries: dict[tuple[str, str], StepSummary] = {}
+
+    def anchor_at(self, anchor: datetime) -> None:
+        self.anchor = anchor.timestamp()
+
+    def start_attempt(self, attempt: int) -> None:
+        self.attempt = attempt
+
+    @contextmanager
+    def scope(self, name: str):
+        token = _SCOPE.set(name)
+        try:
+            yield
+        finally:
+            _SCOPE.reset(token)
+
+    @contextmanager
+    def span(self, step: str):
+        span = Span(step=step, scope=_SCOPE.get(), started_at=time.time())
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.ok = False
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - started) * 1000
+            self._record(span)
+            logger.debug("%s%s took %.0f ms", step, f" [{span.scope}]" if span.scope else "", span.duration_ms)
+
+    def _record(self, span: Span) -> None:
+        if self.attempt <= DETAILED_ATTEMPTS and len(self.spans) < MAX_SPANS:
+            self.spans.append(span)
+            return
+        summary = self.summaries.setdefault((span.step, span.scope), StepSummary())
+        summary.count += 1
+        summary.total_ms += span.duration_ms
+        summary.max_ms = max(summary.max_ms, span.duration_ms)
+        summary.failed += not span.ok
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "anchor": datetime.fromtimestamp(self.anchor).astimezone().isoformat(),
+            "attempts": self.attempt,
+            "spans": [
+                {
+                    "step": span.step,
+                    "scope": span.scope,
+                    "start_ms": round((span.started_at - self.anchor) * 1000, 1),
+                    "duration_ms": round(span.duration_ms, 1),
+                    "ok": span.ok,
+                }
+                for span in self.spans
+            ],
+            "summary": [
+                {
+                    "step": step,
+                    "scope": scope,
+                    "count": summary.count,
+                    "avg_ms": round(summary.total_ms / summary.count, 1),
+                    "max_ms": round(summary.max_ms, 1),
+                    "failed": summary.failed,
+                }
+                for (step, scope), summary in self.summaries.items()
+            ],
+        }
+
+
+def timed(step: str):
+    """Record each call of an async BookingBot method as a span.
+
+    A call that returns False or None is marked as not ok.
+    """
+
+    def decorate(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            with self.timeline.span(step) as span:
+                result = await method(self, *args, **kwargs)
+                span.ok = result is not None and result is not False
+                return result
+
+        return wrapper
+
+    return decorate
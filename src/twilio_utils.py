@@ -1,15 +1,23 @@
 from __future__ import annotations
 
 import logging
-import re
 import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any, Iterable
 
+from .alert_outbox import AlertOutbox
+from .cancellation import CancelToken
+from .otp_inbox import InboundSms, OtpInbox, extract_otp, inbox as shared_inbox
+
 
 logger = logging.getLogger("buntzen_pass_bot.twilio")
-OTP_RE = re.compile(r"(?<!\d)(\d{4,8})(?!\d)")
+# SMS codes usually land within seconds of the request but can take a
+# minute, so polling is dense at first and backs off later.
+OTP_DENSE_SECONDS = 15
+OTP_DENSE_INTERVAL_SECONDS = 1.0
+OTP_BACKOFF_AFTER_SECONDS = 60
+OTP_MAX_INTERVAL_SECONDS = 10.0
 
 
 @dataclass(frozen=True)
@@ -19,6 +27,29 @@ class OtpMessage:
     from_number: str | None
     date_sent: datetime | None
     sid: str | None
+    received_at: datetime | None = None
+    source: str = "poll"
+
+    def latency(self, requested_after: datetime) -> dict[str, Any]:
+        """How long the code took to reach Twilio and then this job."""
+        requested_after = _ensure_aware_utc(requested_after)
+        delivered = None if self.date_sent is None else (self.date_sent - requested_after).total_seconds()
+        seen = None if self.received_at is None else (self.received_at - requested_after).total_seconds()
+        return {
+            "requested_at": requested_after.isoformat(),
+            "delivery_seconds": None if delivered is None else round(max(delivered, 0.0), 2),
+            "seen_seconds": None if seen is None else round(max(seen, 0.0), 2),
+            "source": self.source,
+        }
+
+
+def otp_poll_interval(elapsed: float, configured: float) -> float:
+    """Seconds between message-list polls, given seconds since the code was requested."""
+    if elapsed < OTP_DENSE_SECONDS:
+        return min(OTP_DENSE_INTERVAL_SECONDS, configured)
+    if elapsed < OTP_BACKOFF_AFTER_SECONDS:
+        return configured
+    return max(configured, min(configured * 2, OTP_MAX_INTERVAL_SECONDS))
 
 
 class TwilioService:
@@ -30,6 +61,9 @@ class TwilioService:
         alerts_enabled: bool,
         otp_timeout_seconds: int,
         otp_poll_interval_seconds: float,
+        inbox: OtpInbox | None = None,
+        outbox: AlertOutbox | None = None,
+        account_sid: str = "",
     ) -> None:
         self.client = client
         self.otp_number = otp_number
@@ -37,9 +71,12 @@ class TwilioService:
         self.alerts_enabled = alerts_enabled
         self.otp_timeout_seconds = otp_timeout_seconds
         self.otp_poll_interval_seconds = otp_poll_interval_seconds
+        self.inbox = inbox or OtpInbox()
+        self.outbox = outbox
+        self.account_sid = account_sid
 
     @classmethod
-    def from_config(cls, config) -> "TwilioService":
+    def from_config(cls, config, outbox: AlertOutbox | None = None) -> "TwilioService":
         try:
             from twilio.rest import Client
         except ImportError as exc:
@@ -52,13 +89,20 @@ class TwilioService:
             alerts_enabled=config.twilio_alerts_enabled,
             otp_timeout_seconds=config.otp_timeout_seconds,
             otp_poll_interval_seconds=config.otp_poll_interval_seconds,
+            inbox=shared_inbox,
+            outbox=outbox,
+            account_sid=config.twilio_account_sid,
         )
 
     def send_alert(self, message: str, urgent: bool = False) -> None:
+        """Hand the alert to the outbox if there is one, else send it inline."""
         if not self.alerts_enabled or not self.alert_to_number:
             return
         prefix = "URGENT: " if urgent else ""
         body = f"{prefix}{message}"
+        if self.outbox is not None:
+            self.outbox.enqueue(self.account_sid, self.client, self.otp_number, self.alert_to_number, body)
+            return
         try:
             self.client.messages.create(
                 from_=self.otp_number,
@@ -68,32 +112,103 @@ class TwilioService:
         except Exception as exc:
             logger.warning("Could not send Twilio alert: %s", exc)
 
-    def wait_for_otp(self, requested_after: datetime, timeout_seconds: int | None = None) -> OtpMessage:
+    def wait_for_otp(
+        self,
+        requested_after: datetime,
+        timeout_seconds: int | None = None,
+        cancel_token: CancelToken | None = None,
+    ) -> OtpMessage:
+        """Wait for a fresh OTP addressed to this job.
+
+        Jobs sharing the OTP number share one feed: the inbound webhook and a
+        single poll of the message list per interval, taken by whichever
+        waiting job is due. The interval follows otp_poll_interval: dense right
+        after the request, backing off later. Each code is claimed by exactly
+        one job.
+        """
         deadline = time.monotonic() + (timeout_seconds or self.otp_timeout_seconds)
-        while time.monotonic() < deadline:
-            match = self.latest_fresh_otp(requested_after=requested_after)
-            if match:
-                return match
-            time.sleep(self.otp_poll_interval_seconds)
+        requested_after = _ensure_aware_utc(requested_after)
+        waiter = self.inbox.register(self.otp_number, requested_after)
+        if cancel_token is not None:
+            cancel_token.link(waiter.event)
+        try:
+            while time.monotonic() < deadline:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                elapsed = (datetime.now(timezone.utc) - requested_after).total_seconds()
+                interval = otp_poll_interval(elapsed, self.otp_poll_interval_seconds)
+                self.inbox.poll_if_due(self.otp_number, self._fetch_inbound, interval)
+                message = waiter.claim()
+                if message is not None:
+                    return OtpMessage(
+                        code=message.code,
+                        body=message.body,
+                        from_number=message.from_,
+                        date_sent=message.date_sent,
+                        sid=message.sid,
+                        received_at=max(message.received_at, requested_after),
+                        source=message.source,
+                    )
+                waiter.wait(min(self.inbox.seconds_until_poll(self.otp_number, interval), deadline - time.monotonic()))
+        finally:
+            waiter.close()
+            if cancel_token is not None:
+                cancel_token.unlink(waiter.event)
         raise TimeoutError("Timed out waiting for Twilio OTP SMS.")
 
+    def _fetch_inbound(self, since: datetime | None) -> list[InboundSms]:
+        """List only messages newer than the feed's watermark, skipping sids it already has."""
+        known = self.inbox.known(self.otp_number)
+        messages = (
+            message
+            for message in self._list_recent_inbound_messages(since)
+            if getattr(message, "sid", None) not in known
+        )
+        return inbound_messages(messages, to_number=self.otp_number)
+
     def latest_fresh_otp(self, requested_after: datetime) -> OtpMessage | None:
         messages = self._list_recent_inbound_messages()
         return latest_fresh_otp(messages, requested_after=requested_after, to_number=self.otp_number)
 
-    def _list_recent_inbound_messages(self) -> Iterable[Any]:
+    def _list_recent_inbound_messages(self, since: datetime | None = None) -> Iterable[Any]:
+        filters = {} if since is None else {"date_sent_after": since}
         try:
-            return self.client.messages.list(to=self.otp_number, limit=20)
+            return self.client.messages.list(to=self.otp_number, limit=20, **filters)
         except Exception as exc:
             logger.warning("Could not read Twilio messages: %s", exc)
             return []
 
 
-def extract_otp(body: str) -> str | None:
-    matches = OTP_RE.findall(body or "")
-    if not matches:
-        return None
-    return matches[0]
+def valid_webhook_signature(auth_token: str, url: str, params: dict[str, str], signature: str) -> bool:
+    """Check an X-Twilio-Signature header against one account's auth token."""
+    try:
+        from twilio.request_validator import RequestValidator
+    except ImportError as exc:
+        raise RuntimeError("Install dependencies first: uv sync") from exc
+    return bool(signature) and RequestValidator(auth_token).validate(url, params, signature)
+
+
+def inbound_messages(messages: Iterable[Any], to_number: str) -> list[InboundSms]:
+    """Convert listed Twilio messages sent to ``to_number`` for the OTP inbox."""
+    received = datetime.now(timezone.utc)
+    inbound = []
+    for message in messages:
+        direction = str(getattr(message, "direction", "") or "").lower()
+        message_to = str(getattr(message, "to", "") or "")
+        if direction and "inbound" not in direction:
+            continue
+        if message_to and _normalize_phone(message_to) != _normalize_phone(to_number):
+            continue
+        inbound.append(
+            InboundSms(
+                sid=getattr(message, "sid", None),
+                to=message_to or to_number,
+                from_=getattr(message, "from_", None) or getattr(message, "from_number", None),
+                body=str(getattr(message, "body", "") or ""),
+                date_sent=_coerce_datetime(getattr(message, "date_sent", None)) or received,
+            )
+        )
+    return inbound
 
 
 def latest_fresh_otp(
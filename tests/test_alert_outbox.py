@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import alert_outbox
+from src.alert_outbox import AlertOutbox
+from src.twilio_utils import TwilioService
+
+
+class Messages:
+    def __init__(self, failures: int = 0, gate: threading.Event | None = None) -> None:
+        self.failures = failures
+        self.gate = gate
+        self.sent: list[str] = []
+
+    def create(self, from_, to, body):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Twilio unavailable")
+        self.sent.append(body)
+
+
+class Client:
+    def __init__(self, messages: Messages) -> None:
+        self.messages = messages
+
+
+class AlertOutboxTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "alerts.db"
+        self.outboxes: list[AlertOutbox] = []
+
+    def tearDown(self) -> None:
+        for outbox in self.outboxes:
+            outbox.stop()
+        self.tmp.cleanup()
+
+    def outbox(self, **kwargs) -> AlertOutbox:
+        outbox = AlertOutbox(**kwargs)
+        self.outboxes.append(outbox)
+        return outbox
+
+    def statuses(self) -> list[tuple[str, int]]:
+        with sqlite3.connect(self.path) as conn:
+            return conn.execute("SELECT status, repeats FROM alerts ORDER BY id").fetchall()
+
+    def test_enqueue_does_not_wait_on_delivery(self) -> None:
+        gate = threading.Event()
+        messages = Messages(gate=gate)
+        outbox = self.outbox()
+        outbox.start(self.path)
+        service = TwilioService(
+            client=Client(messages),
+            otp_number="+16045551212",
+            alert_to_number="+16045559876",
+            alerts_enabled=True,
+            otp_timeout_seconds=30,
+            otp_poll_interval_seconds=5,
+            outbox=outbox,
+            account_sid="AC1",
+        )
+        started = time.monotonic()
+        service.send_alert("Booked.", urgent=True)
+        self.assertLess(time.monotonic() - started, 0.5)
+        gate.set()
+        self.assertEqual(outbox.flush(5), 0)
+        self.assertEqual(messages.sent, ["URGENT: Booked."])
+
+    def test_repeats_of_a_pending_alert_are_coalesced(self) -> None:
+        messages = Messages()
+        outbox = self.outbox()
+        for _ in range(3):
+            outbox.enqueue("AC1", Client(messages), "+1", "+2", "Still sold out.")
+        outbox.start(self.path)
+        self.assertEqual(outbox.flush(5), 0)
+        self.assertEqual(messages.sent, ["Still sold out. (x3)"])
+        self.assertEqual(self.statuses(), [("sent", 3)])
+
+    def test_failed_send_is_retried(self) -> None:
+        messages = Messages(failures=1)
+        outbox = self.outbox()
+        with mock.patch.object(alert_outbox, "RETRY_DELAYS", (0.05, 0.05)):
+            outbox.enqueue("AC1", Client(messages), "+1", "+2", "Booked.")
+            outbox.start(self.path)
+            deadline = time.monotonic() + 5
+            while not messages.sent and time.monotonic() < deadline:
+                time.sleep(0.02)
+        self.assertEqual(messages.sent, ["Booked."])
+        self.assertEqual(self.statuses(), [("sent", 1)])
+
+    def test_undelivered_alert_is_sent_after_restart(self) -> None:
+        first = self.outbox()
+        first.enqueue("AC1", Client(Messages(failures=10)), "+1", "+2", "Booked.")
+        first.start(self.path)
+        self.assertEqual(first.flush(0.5), 1)
+        first.stop()
+        self.assertEqual(self.statuses(), [("pending", 1)])
+
+        messages = Messages()
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("UPDATE alerts SET next_attempt_at = 0")
+        second = self.outbox(client_factory=lambda account_sid: Client(messages) if account_sid == "AC1" else None)
+        second.start(self.path)
+        self.assertEqual(second.flush(5), 0)
+        self.assertEqual(messages.sent, ["Booked."])
+
+    def test_client_errors_are_not_retried(self) -> None:
+        class Rejected(Exception):
+            status = 400
+
+        class Rejecting:
+            def create(self, from_, to, body):
+                raise Rejected("Invalid 'To' number")
+
+        outbox = self.outbox()
+        outbox.enqueue("AC1", Client(Rejecting()), "+1", "bad", "Booked.")
+        outbox.start(self.path)
+        self.assertEqual(outbox.flush(5), 0)
+        self.assertEqual(self.statuses(), [("failed", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import subprocess
+import unittest
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from src import booking
+from src.booking import (
+    AUTHENTICATED_SELECTORS,
+    PAGE_STATE_GROUPS,
+    PAGE_STATE_SCRIPT,
+    BookingBot,
+    BookingResult,
+    PageState,
+    match_date_button,
+    selector_group,
+)
+from src.inventory import InventoryWatcher
+from src.pass_types import AFTERNOON, ALL_DAY, MORNING, PassPreference
+from src.timeline import Timeline
+
+
+class DateMatchTests(unittest.TestCase):
+    def test_exact_token_in_attributes_wins(self) -> None:
+        entries = [
+            {"text": "17", "attrs": "June 17"},
+            {"text": "18", "attrs": "2026-06-18"},
+        ]
+        self.assertEqual(match_date_button(entries, date(2026, 6, 18)), (1, True))
+
+    def test_exact_token_beats_earlier_day_fallback(self) -> None:
+        entries = [
+            {"text": "18", "attrs": ""},
+            {"text": "Thu\nJun 18", "attrs": ""},
+        ]
+        self.assertEqual(match_date_button(entries, date(2026, 6, 18)), (1, True))
+
+    def test_day_of_month_fallback(self) -> None:
+        entries = [{"text": "17", "attrs": ""}, {"text": "18", "attrs": ""}, {"text": "18", "attrs": ""}]
+        self.assertEqual(match_date_button(entries, date(2026, 6, 18)), (1, False))
+
+    def test_no_match(self) -> None:
+        self.assertEqual(match_date_button([{"text": "19"}], date(2026, 6, 18)), (None, False))
+
+
+class PageStateGroupTests(unittest.TestCase):
+    def test_splits_text_selectors_from_css(self) -> None:
+        group = selector_group(AUTHENTICATED_SELECTORS)
+        self.assertIn("#checkOutButton", group["css"])
+        self.assertIn("logout", group["text"])
+        self.assertNotIn("text=Logout", group["css"])
+
+
+class CardAvailabilityTests(unittest.IsolatedAsyncioTestCase):
+    async def card(self, text: str) -> tuple[bool, bool]:
+        class Card:
+            async def inner_text(self, timeout):
+                return text
+
+        bot = object.__new__(BookingBot)
+        return await bot._card_availability(Card())
+
+    async def test_only_sold_out_label_is_sold_out(self) -> None:
+        self.assertEqual(await self.card("All Day Pass\nSOLD OUT"), (False, True))
+        self.assertEqual(await self.card("All Day Pass\nUnavailable"), (False, False))
+
+
+NODE = shutil.which("node")
+# A minimal DOM for running PAGE_STATE_SCRIPT outside a browser. Elements are
+# listed per selector; each may set visibility or an empty rect list.
+PAGE_STATE_HARNESS = """
+const [elements, bodyText, groups] = JSON.parse(process.argv[1]);
+global.window = { getComputedStyle: (el) => ({ visibility: el.visibility || "visible" }) };
+global.document = {
+    body: { innerText: bodyText },
+    querySelectorAll: (selector) =>
+        (elements[selector] || []).map((el) => ({ ...el, getClientRects: () => new Array(el.rects ?? 1) })),
+};
+const probe = SCRIPT;
+process.stdout.write(JSON.stringify(probe(groups)));
+"""
+
+
+@unittest.skipUnless(NODE, "node is not installed")
+class PageStateScriptTests(unittest.TestCase):
+    def state(self, elements: dict[str, list[dict]], body_text: str = "") -> str | None:
+        program = PAGE_STATE_HARNESS.replace("SCRIPT", PAGE_STATE_SCRIPT.strip())
+        groups = [list(group) for group in PAGE_STATE_GROUPS]
+        completed = subprocess.run(
+            [NODE, "-e", program, json.dumps([elements, body_text, groups])],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=10,
+        )
+        return json.loads(completed.stdout)
+
+    def test_otp_beats_login_beats_authenticated(self) -> None:
+        otp = {"input[autocomplete='one-time-code']": [{}]}
+        login = {"input[type='password']": [{}]}
+        authenticated = {"#checkOutButton": [{}]}
+        self.assertEqual(self.state({**otp, **login, **authenticated}), "otp_challenge")
+        self.assertEqual(self.state({**login, **authenticated}), "login_form")
+        self.assertEqual(self.state(authenticated), "authenticated")
+        self.assertIsNone(self.state({}))
+
+    def test_hidden_elements_do_not_count(self) -> None:
+        elements = {
+            "input[autocomplete='one-time-code']": [{"visibility": "hidden"}],
+            "input[type='password']": [{"rects": 0}],
+            "button.date": [{}],
+        }
+        self.assertEqual(self.state(elements), "authenticated")
+
+    def test_text_selectors_match_page_text_case_insensitively(self) -> None:
+        self.assertEqual(self.state({}, "Welcome back\nMY ACCOUNT"), "authenticated")
+        self.assertEqual(self.state({}, "Manage your vehicles"), "authenticated")
+        self.assertIsNone(self.state({}, "Log in to continue"))
+
+    def test_text_never_outranks_login_fields(self) -> None:
+        self.assertEqual(self.state({"input[type='email']": [{}]}, "Logout"), "login_form")
+
+
+class PageStateFallbackTests(unittest.IsolatedAsyncioTestCase):
+    async def state(self, visible: set[str]) -> PageState:
+        class Page:
+            async def wait_for_function(self, *args, **kwargs):
+                raise RuntimeError("evaluate is blocked")
+
+        async def visible_locator(selectors, root=None, timeout_ms=1000):
+            return object() if visible.intersection(selectors) else None
+
+        bot = object.__new__(BookingBot)
+        bot.page = Page()
+        bot._visible_locator = visible_locator
+        return await bot._page_state()
+
+    async def test_probes_in_the_same_order_without_the_script(self) -> None:
+        self.assertIs(
+            await self.state({"input[inputmode='numeric']", "input[type='password']", "#checkOutButton"}),
+            PageState.OTP_CHALLENGE,
+        )
+        self.assertIs(await self.state({"input[type='password']", "#checkOutButton"}), PageState.LOGIN_FORM)
+        self.assertIs(await self.state({"#checkOutButton"}), PageState.AUTHENTICATED)
+        self.assertIs(await self.state(set()), PageState.UNKNOWN)
+
+
+class FakeLocator:
+    def __init__(self, names: list[str], visible: set[str]) -> None:
+        self.names = names
+        self.visible = visible
+
+    @property
+    def first(self) -> "FakeLocator":
+        return self
+
+    def or_(self, other: "FakeLocator") -> "FakeLocator":
+        return FakeLocator(self.names + other.names, self.visible)
+
+    async def wait_for(self, state, timeout):
+        if not self.visible.intersection(self.names):
+            raise PlaywrightTimeoutError(f"Timeout {timeout}ms exceeded.")
+
+    async def count(self) -> int:
+        return len(self.visible.intersection(self.names))
+
+
+class FakeRoot:
+    def __init__(self, visible: set[str]) -> None:
+        self.visible = visible
+
+    def locator(self, selector: str) -> FakeLocator:
+        return FakeLocator([selector.removesuffix(" >> visible=true")], self.visible)
+
+
+class SelectorRaceTests(unittest.IsolatedAsyncioTestCase):
+    async def test_first_visible_selector_in_priority_order_wins(self) -> None:
+        bot = object.__new__(BookingBot)
+        winner = await bot._race_visible(FakeRoot({"#b", "#c"}), ("#a", "#b", "#c"), timeout_ms=100)
+        self.assertEqual(winner.names, ["#b"])
+
+    async def test_times_out_when_nothing_is_visible(self) -> None:
+        bot = object.__new__(BookingBot)
+        with self.assertRaises(PlaywrightTimeoutError):
+            await bot._race_visible(FakeRoot(set()), ("#a", "#b"), timeout_ms=100)
+        self.assertIsNone(await bot._visible_locator(("#a", "#b"), root=FakeRoot(set()), timeout_ms=100))
+
+
+class FakePage:
+    url = "https://example.test/pass#top"
+
+    def is_closed(self) -> bool:
+        return False
+
+
+class SoftRefreshTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.bot = object.__new__(BookingBot)
+        self.bot.page = FakePage()
+        self.bot.config = SimpleNamespace(soft_refresh_limit=2, all_day_pass_url="https://example.test/pass")
+        self.bot.timeline = Timeline()
+        self.bot.soft_refreshes = {}
+        self.preference = PassPreference("all_day", "All Day", "all_day", ("all day",))
+        self.checks = []
+
+        async def check_pass(preference, since, reselect=False):
+            self.checks.append(reselect)
+            return BookingResult(False, "sold out", preference.key, sold_out=True), None
+
+        self.bot._check_pass = check_pass
+
+    async def test_needs_a_clean_full_check_first(self) -> None:
+        self.assertIsNone(await self.bot._soft_check(self.preference, since=0))
+        self.bot._note_full_check(self.preference, BookingResult(False, "card missing", "all_day"))
+        self.assertIsNone(await self.bot._soft_check(self.preference, since=0))
+        self.assertEqual(self.checks, [])
+
+    async def test_reloads_after_the_soft_refresh_limit(self) -> None:
+        self.bot._note_full_check(self.preference, BookingResult(False, "sold out", "all_day", sold_out=True))
+        self.assertIsNotNone(await self.bot._soft_check(self.preference, since=0))
+        self.assertIsNotNone(await self.bot._soft_check(self.preference, since=0))
+        self.assertIsNone(await self.bot._soft_check(self.preference, since=0))
+        self.assertEqual(self.checks, [True, True])
+
+    async def test_failed_soft_check_forces_a_reload(self) -> None:
+        self.bot._note_full_check(self.preference, None)
+
+        async def broken(preference, since, reselect=False):
+            raise RuntimeError("detached")
+
+        self.bot._check_pass = broken
+        self.assertIsNone(await self.bot._soft_check(self.preference, since=0))
+        self.assertNotIn("all_day", self.bot.soft_refreshes)
+
+
+class SoftRefreshInventoryTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.bot = object.__new__(BookingBot)
+        self.bot.page = FakePage()
+        self.bot.config = SimpleNamespace(
+            soft_refresh_limit=5,
+            all_day_pass_url="https://example.test/pass",
+            target_date=date(2026, 6, 18),
+        )
+        self.bot.timeline = Timeline()
+        self.bot.soft_refreshes = {"all_day": 0}
+        self.bot.inventory = InventoryWatcher((ALL_DAY,), date(2026, 6, 18))
+        self.payload = None
+
+        async def select_target_date():
+            if self.payload is not None:
+                self.bot.inventory.record(self.payload)
+            return True
+
+        async def find_pass_container(preference):
+            return object()
+
+        self.bot._select_target_date = select_target_date
+        self.bot._find_pass_container = find_pass_container
+
+    async def test_no_refetch_falls_back_to_a_full_load(self) -> None:
+        self.bot.inventory.record({"name": "All Day", "date": "2026-06-18", "soldOut": True})
+        since = self.bot.inventory.mark() + 0.001
+        with mock.patch.object(booking, "INVENTORY_WAIT_MS", 50):
+            self.assertIsNone(await self.bot._soft_check(ALL_DAY, since))
+        self.assertNotIn("all_day", self.bot.soft_refreshes)
+
+    async def test_fresh_inventory_counts_as_a_soft_check(self) -> None:
+        self.payload = {"name": "All Day", "date": "2026-06-18", "soldOut": True}
+        result, container = await self.bot._soft_check(ALL_DAY, self.bot.inventory.mark())
+        self.assertTrue(result.sold_out)
+        self.assertEqual(self.bot.soft_refreshes["all_day"], 1)
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.pages: list[FakePage] = []
+
+    async def new_page(self) -> FakePage:
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+class StagingTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.bot = object.__new__(BookingBot)
+        self.bot.page = None
+        self.bot.context = FakeContext()
+        self.bot.config = SimpleNamespace(
+            check_all_day=True,
+            check_afternoon=False,
+            check_morning=False,
+            soft_refresh_limit=5,
+            all_day_pass_url="https://example.test/pass",
+            target_date=date(2026, 6, 18),
+        )
+        self.bot.timeline = Timeline()
+        self.bot.staged_pages = {}
+        self.bot.soft_refreshes = {}
+        self.bot.inventory = InventoryWatcher((ALL_DAY,), date(2026, 6, 18))
+        self.selectable = True
+        self.selected_on: list[FakePage] = []
+        self.loads: list[bool] = []
+        self.payload = None
+
+        async def open_pass_page(preference, refresh=False, settle=True):
+            self.loads.append(refresh)
+
+        async def select_target_date():
+            self.selected_on.append(self.bot.page)
+            if self.payload is not None:
+                self.bot.inventory.record(self.payload)
+            return self.selectable
+
+        async def find_pass_container(preference):
+            return object()
+
+        async def stage_vehicle(container):
+            pass
+
+        async def settle_page(timeout_ms=15000):
+            return True
+
+        self.bot._open_pass_page = open_pass_page
+        self.bot._select_target_date = select_target_date
+        self.bot._find_pass_container = find_pass_container
+        self.bot._stage_vehicle = stage_vehicle
+        self.bot._settle_page = settle_page
+
+    async def test_release_rechecks_the_staged_tab_in_place(self) -> None:
+        self.assertEqual(await self.bot.stage_passes(), 1)
+        self.assertEqual(self.loads, [False])
+        staged = self.bot.staged_pages["all_day"]
+
+        self.payload = {"name": "All Day", "date": "2026-06-18", "soldOut": True}
+        result = await self.bot._try_pass(ALL_DAY, mode="auto")
+        self.assertTrue(result.sold_out)
+        self.assertEqual(self.loads, [False])
+        self.assertEqual(self.selected_on, [staged, staged])
+
+    async def test_tab_without_a_selected_date_is_reloaded(self) -> None:
+        self.selectable = False
+        await self.bot.stage_passes()
+        self.assertNotIn("all_day", self.bot.soft_refreshes)
+        await self.bot._try_pass(ALL_DAY, mode="auto")
+        self.assertEqual(self.loads, [False, True])
+
+
+class TabPage(FakePage):
+    def __init__(self) -> None:
+        self.stopped = False
+
+    async def evaluate(self, script):
+        self.stopped = True
+
+
+class ParallelPassTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.bot = object.__new__(BookingBot)
+        self.bot.page = None
+        self.bot.context = None
+        self.bot.staged_pages = {key: TabPage() for key in ("all_day", "afternoon", "morning")}
+        self.bot.inventory = InventoryWatcher((), date(2026, 6, 18))
+        self.delays = {"all_day": 0.0, "afternoon": 0.0, "morning": 0.0}
+        self.available = {"all_day": True, "afternoon": True, "morning": True}
+        self.events: list[str] = []
+
+        async def load_and_check(preference, since):
+            try:
+                await asyncio.sleep(self.delays[preference.key])
+            except asyncio.CancelledError:
+                self.events.append(f"cancelled {preference.key}")
+                raise
+            self.events.append(f"checked {preference.key}")
+            if not self.available[preference.key]:
+                return BookingResult(False, "sold out", preference.key, sold_out=True), None
+            return None, object()
+
+        async def complete_pass(preference, container, mode, on_commit=None):
+            self.events.append(f"commit {preference.key}")
+            await on_commit()
+            return BookingResult(True, "booked", preference.key)
+
+        self.bot._load_and_check = load_and_check
+        self.bot._complete_pass = complete_pass
+
+    async def test_lower_priority_tab_waits_for_higher_priority_check(self) -> None:
+        self.delays["all_day"] = 0.05
+        result = await self.bot._try_passes_in_parallel([ALL_DAY, AFTERNOON], mode="auto")
+        self.assertEqual(result.pass_key, "all_day")
+        self.assertEqual(self.events, ["checked afternoon", "checked all_day", "commit all_day"])
+
+    async def test_commit_cancels_and_stops_the_losing_tabs(self) -> None:
+        self.delays.update(afternoon=5, morning=5)
+        result = await self.bot._try_passes_in_parallel([ALL_DAY, AFTERNOON, MORNING], mode="auto")
+        self.assertEqual(result.pass_key, "all_day")
+        self.assertIn("cancelled afternoon", self.events)
+        self.assertIn("cancelled morning", self.events)
+        self.assertFalse(self.bot.staged_pages["all_day"].stopped)
+        self.assertTrue(self.bot.staged_pages["afternoon"].stopped)
+        self.assertTrue(self.bot.staged_pages["morning"].stopped)
+
+    async def test_next_priority_wins_when_higher_is_sold_out(self) -> None:
+        self.available["all_day"] = False
+        result = await self.bot._try_passes_in_parallel([ALL_DAY, AFTERNOON], mode="auto")
+        self.assertEqual(result.pass_key, "afternoon")
+        self.assertNotIn("commit all_day", self.events)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.browser_pool import BrowserPool
+
+
+class FakePage:
+    def __init__(self, context=None) -> None:
+        self.context = context
+        self.closed = False
+
+    async def evaluate(self, script):
+        if self.closed:
+            raise RuntimeError("page closed")
+        return "complete"
+
+    async def close(self) -> None:
+        self.closed = True
+        if self.context is not None:
+            self.context.pages.remove(self)
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.pages = [FakePage(self)]
+        self.closed = False
+
+    def on(self, event, handler) -> None:
+        pass
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeDriver:
+    async def start(self):
+        return self
+
+    async def stop(self) -> None:
+        pass
+
+
+def make_config(profile: str = "alice", headless: bool = True):
+    return SimpleNamespace(
+        user_data_dir=Path("/tmp/profiles") / profile,
+        headless=headless,
+        browser_channel=None,
+        timezone_name="America/Vancouver",
+    )
+
+
+class BrowserPoolTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.launched: list[FakeContext] = []
+
+        async def launcher(playwright, config):
+            context = FakeContext()
+            self.launched.append(context)
+            return context
+
+        self.pool = BrowserPool(
+            idle_seconds=60,
+            max_idle=2,
+            playwright_factory=FakeDriver,
+            launcher=launcher,
+        )
+
+    async def test_reuses_warm_context_for_same_profile(self) -> None:
+        config = make_config()
+        first = await self.pool.acquire(config)
+        await first.new_page()
+        await self.pool.release(config)
+        second = await self.pool.acquire(config)
+        self.assertIs(first, second)
+        self.assertEqual(len(self.launched), 1)
+        self.assertEqual(len(second.pages), 1)
+
+    async def test_relaunches_after_failed_health_check(self) -> None:
+        config = make_config()
+        first = await self.pool.acquire(config)
+        await self.pool.release(config)
+        first.pages[0].closed = True
+        first.pages[0].context = None
+        second = await self.pool.acquire(config)
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+
+    async def test_relaunches_when_launch_options_change(self) -> None:
+        await self.pool.acquire(make_config(headless=True))
+        await self.pool.release(make_config(headless=True))
+        await self.pool.acquire(make_config(headless=False))
+        self.assertEqual(len(self.launched), 2)
+        self.assertTrue(self.launched[0].closed)
+
+    async def test_unhealthy_release_closes_context(self) -> None:
+        config = make_config()
+        context = await self.pool.acquire(config)
+        await self.pool.release(config, healthy=False)
+        self.assertTrue(context.closed)
+        self.assertNotIn(str(config.user_data_dir), self.pool.contexts)
+
+    async def test_same_profile_waits_for_release(self) -> None:
+        config = make_config()
+        await self.pool.acquire(config)
+        waiter = asyncio.create_task(self.pool.acquire(config))
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+        await self.pool.release(config)
+        self.assertIs(await waiter, self.launched[0])
+        with self.assertRaises(RuntimeError):
+            await self.pool.acquire(config, claim_timeout_seconds=0.01)
+
+    async def test_idle_eviction(self) -> None:
+        config = make_config()
+        context = await self.pool.acquire(config)
+        await self.pool.release(config)
+        self.pool.idle_seconds = 0
+        await self.pool.maintain()
+        self.assertTrue(context.closed)
+
+    async def test_keeps_at_most_max_idle_contexts(self) -> None:
+        for profile in ("a", "b", "c"):
+            config = make_config(profile)
+            await self.pool.acquire(config)
+            await self.pool.release(config)
+        self.assertEqual(len(self.pool.contexts), 2)
+        self.assertTrue(self.launched[0].closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
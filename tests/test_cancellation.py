@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+
+from src.cancellation import CancelToken, JobCancelled
+from src.twilio_utils import TwilioService
+
+
+class CancelTokenTests(unittest.IsolatedAsyncioTestCase):
+    async def test_cancel_interrupts_bound_task(self) -> None:
+        token = CancelToken()
+        task = asyncio.create_task(asyncio.sleep(30))
+        token.bind(task)
+        self.assertTrue(token.cancel("Stop."))
+        self.assertFalse(token.cancel("Again."))
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(token.reason, "Stop.")
+        self.assertFalse(token.timed_out)
+
+    async def test_budget_expiry_cancels_and_marks_timed_out(self) -> None:
+        token = CancelToken()
+        task = asyncio.create_task(asyncio.sleep(30))
+        token.bind(task)
+        token.start_budget(0.01)
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(token.timed_out)
+        self.assertIn("budget", token.reason)
+
+    async def test_stopped_budget_does_not_fire(self) -> None:
+        token = CancelToken()
+        token.start_budget(0.01)
+        token.stop_budget()
+        await asyncio.sleep(0.03)
+        self.assertFalse(token.cancelled)
+
+
+class BlockingWaitTests(unittest.TestCase):
+    def test_wait_returns_as_soon_as_cancelled(self) -> None:
+        token = CancelToken()
+        threading.Timer(0.02, token.cancel, args=("Stop.",)).start()
+        started = time.monotonic()
+        self.assertTrue(token.wait(5))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_otp_wait_stops_when_cancelled(self) -> None:
+        class Messages:
+            def list(self, to, limit, date_sent_after=None):
+                return []
+
+        class Client:
+            messages = Messages()
+
+        service = TwilioService(
+            client=Client(),
+            otp_number="+16045551212",
+            alert_to_number=None,
+            alerts_enabled=False,
+            otp_timeout_seconds=30,
+            otp_poll_interval_seconds=5,
+        )
+        token = CancelToken()
+        threading.Timer(0.02, token.cancel, args=("Stop.",)).start()
+        started = time.monotonic()
+        with self.assertRaises(JobCancelled):
+            service.wait_for_otp(datetime.now(timezone.utc), cancel_token=token)
+        self.assertLess(time.monotonic() - started, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import unittest
+from email.utils import formatdate
+
+from src.clock_sync import ServerClock
+
+
+def header(server_second: float) -> str:
+    return formatdate(server_second, usegmt=True)
+
+
+class ServerClockTests(unittest.TestCase):
+    def test_unknown_offset_uses_local_clock(self) -> None:
+        clock = ServerClock()
+        self.assertEqual(clock.offset, 0.0)
+        self.assertIsNone(clock.error)
+
+    def test_samples_at_different_phases_narrow_the_bound(self) -> None:
+        clock = ServerClock()
+        true_offset = 1.3
+        for local in (1000.05, 1000.45, 1000.85, 1001.25):
+            server_now = local + true_offset
+            clock.observe(header(int(server_now)), sent_at=local - 0.02, received_at=local + 0.02)
+        self.assertAlmostEqual(clock.offset, true_offset, delta=clock.error)
+        self.assertLess(clock.error, 0.25)
+        self.assertEqual(clock.samples, 4)
+
+    def test_disagreeing_sample_restarts_estimate(self) -> None:
+        clock = ServerClock()
+        clock.observe(header(2000), sent_at=2000.1, received_at=2000.2)
+        clock.observe(header(2010), sent_at=2000.3, received_at=2000.4)
+        self.assertEqual(clock.samples, 1)
+        self.assertGreater(clock.offset, 9)
+
+    def test_rejects_bad_headers(self) -> None:
+        self.assertFalse(ServerClock().observe("not a date", 1.0, 2.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
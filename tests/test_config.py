@@ -56,6 +56,15 @@ class ConfigTests(unittest.TestCase):
         with self.assertRaises(ConfigError):
             self.load_with({"YODEL_EMAIL": "me@example.com", "YODEL_PASSWORD": None})
 
+    def test_parses_blocking_lists(self) -> None:
+        config = self.load_with({"BLOCK_RESOURCE_TYPES": "Image, font", "BLOCK_URL_PATTERNS": "hotjar.com\nads.example"})
+        self.assertEqual(config.blocked_resource_types, ("image", "font"))
+        self.assertEqual(config.blocked_url_patterns, ("hotjar.com", "ads.example"))
+
+    def test_rejects_unknown_blocked_resource_type(self) -> None:
+        with self.assertRaises(ConfigError):
+            self.load_with({"BLOCK_RESOURCE_TYPES": "document"})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from dataclasses import replace
+from unittest.mock import patch
+
+from app import config_builder, db
+from src.env_utils import ConfigError
+
+
+def make_instance(**updates) -> db.Instance:
+    values = {
+        **db.DEFAULT_INSTANCE,
+        "id": 1,
+        "name": "Alice",
+        "profile_name": "alice",
+        "vehicle_keyword": "Tesla",
+        "twilio_account_sid": "AC123",
+        "twilio_auth_token": "secret",
+        "twilio_otp_number": "+16045551212",
+        "twilio_alert_to_number": "+16045559876",
+        "created_at": "2026-01-01T00:00:00+00:00",
+        "updated_at": "2026-01-01T00:00:00+00:00",
+    }
+    values.update(updates)
+    return db.Instance(**{field: values[field] for field in db.INSTANCE_FIELDS})
+
+
+class ConfigCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        env = patch.dict(os.environ, {"APPDATA_DIR": tmpdir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(config_builder.invalidate_config, 1)
+
+    def test_reuses_config_until_instance_is_saved(self) -> None:
+        instance = make_instance()
+        first = config_builder.build_config(instance, command="book")
+        self.assertIs(config_builder.build_config(instance, command="book"), first)
+
+        saved = replace(instance, updated_at="2026-01-02T00:00:00+00:00", start_time="08:00")
+        second = config_builder.build_config(saved, command="book")
+        self.assertIsNot(second, first)
+        self.assertEqual(second.release_at.hour, 8)
+
+    def test_remembers_validation_errors(self) -> None:
+        instance = make_instance(vehicle_keyword=" ")
+        with patch.object(config_builder, "_validate", wraps=config_builder._validate) as validate:
+            with self.assertRaises(ConfigError) as first:
+                config_builder.build_config(instance, command="book")
+            with self.assertRaises(ConfigError) as second:
+                config_builder.build_config(instance, command="book")
+        self.assertIsNot(first.exception, second.exception)
+        self.assertEqual(str(first.exception), str(second.exception))
+        self.assertEqual(validate.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
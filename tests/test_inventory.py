@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import unittest
+from datetime import date
+
+from src.inventory import SOLD_OUT, UNAVAILABLE, InventoryWatcher, parse_availability, parse_inventory
+from src.pass_types import AFTERNOON, ALL_DAY, MORNING
+
+
+TARGET = date(2026, 6, 18)
+PREFERENCES = (ALL_DAY, AFTERNOON, MORNING)
+
+
+class InventoryParseTests(unittest.TestCase):
+    def test_reads_flags_counts_and_status(self) -> None:
+        payload = {
+            "date": "2026-06-18",
+            "products": [
+                {"name": "All-day Parking Pass", "soldOut": True},
+                {"title": "Afternoon Pass", "remaining": 4},
+                {"label": "Morning Pass", "status": "Available"},
+            ]
+        }
+        self.assertEqual(
+            parse_availability(payload, PREFERENCES, TARGET),
+            {"all_day": False, "afternoon": True, "morning": True},
+        )
+
+    def test_skips_other_dates(self) -> None:
+        payload = [
+            {"name": "All Day", "date": "2026-06-17", "available": True},
+            {"name": "All Day", "date": "2026-06-18T00:00:00", "available": False},
+        ]
+        self.assertEqual(parse_availability(payload, PREFERENCES, TARGET), {"all_day": False})
+
+    def test_only_explicit_sold_out_counts_as_sold_out(self) -> None:
+        payload = {
+            "date": "2026-06-18",
+            "products": [
+                {"name": "All Day", "remaining": 0},
+                {"name": "Afternoon", "available": False},
+                {"name": "Morning", "status": "Not available yet"},
+            ],
+        }
+        self.assertEqual(
+            parse_inventory(payload, PREFERENCES, TARGET),
+            {"all_day": SOLD_OUT, "afternoon": UNAVAILABLE, "morning": UNAVAILABLE},
+        )
+
+    def test_skips_entries_not_tied_to_a_date(self) -> None:
+        payload = {"products": [{"name": "All Day", "soldOut": True}]}
+        self.assertEqual(parse_availability(payload, PREFERENCES, TARGET), {})
+
+    def test_nearest_date_wins(self) -> None:
+        payload = {
+            "date": "2026-06-18",
+            "days": [{"date": "2026-06-17", "passes": [{"name": "All Day", "soldOut": True}]}],
+        }
+        self.assertEqual(parse_availability(payload, PREFERENCES, TARGET), {})
+
+    def test_ignores_entries_without_availability(self) -> None:
+        payload = {"name": "Afternoon", "date": "2026-06-18", "price": 12}
+        self.assertEqual(parse_availability(payload, PREFERENCES, TARGET), {})
+
+    def test_watcher_only_reports_fresh_observations(self) -> None:
+        watcher = InventoryWatcher(PREFERENCES, TARGET)
+        watcher.record({"name": "Afternoon", "date": "2026-06-18", "available": True})
+        since = watcher.mark() + 1
+        self.assertIsNone(watcher.availability("afternoon", since))
+        self.assertTrue(watcher.availability("afternoon", 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
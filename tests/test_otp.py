@@ -4,7 +4,8 @@ import unittest
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
-from src.twilio_utils import TwilioService, extract_otp, latest_fresh_otp
+from app.main import otp_latency_stats
+from src.twilio_utils import OtpMessage, TwilioService, extract_otp, latest_fresh_otp, otp_poll_interval
 
 
 @dataclass
@@ -50,7 +51,7 @@ class OtpTests(unittest.TestCase):
         calls = []
 
         class Messages:
-            def list(self, to, limit):
+            def list(self, to, limit, date_sent_after=None):
                 calls.append((to, limit))
                 return [Message("Your Yodel code is 333333", requested + timedelta(seconds=1))]
 
@@ -70,5 +71,35 @@ class OtpTests(unittest.TestCase):
         self.assertEqual(calls, [("+16045551212", 20)])
 
 
+class OtpLatencyTests(unittest.TestCase):
+    def test_poll_interval_is_dense_then_backs_off(self) -> None:
+        self.assertEqual(otp_poll_interval(2, configured=3.0), 1.0)
+        self.assertEqual(otp_poll_interval(20, configured=3.0), 3.0)
+        self.assertEqual(otp_poll_interval(90, configured=3.0), 6.0)
+        self.assertEqual(otp_poll_interval(90, configured=8.0), 10.0)
+
+    def test_latency_from_request(self) -> None:
+        requested = datetime(2026, 6, 17, 13, 55, tzinfo=timezone.utc)
+        otp = OtpMessage(
+            code="123456",
+            body="Code 123456",
+            from_number=None,
+            date_sent=requested + timedelta(seconds=4),
+            sid="SM1",
+            received_at=requested + timedelta(seconds=5.5),
+            source="webhook",
+        )
+        latency = otp.latency(requested)
+        self.assertEqual((latency["delivery_seconds"], latency["seen_seconds"], latency["source"]), (4.0, 5.5, "webhook"))
+
+    def test_histogram_per_number(self) -> None:
+        deliveries = [{"number": "+16045551212", "delivery_seconds": value, "seen_seconds": value + 1} for value in (1, 3, 4, 45)]
+        deliveries.append({"number": "+16045559999", "delivery_seconds": None})
+        (stats,) = otp_latency_stats(deliveries)
+        self.assertEqual((stats["count"], stats["p50"], stats["p90"], stats["max"]), (4, 3, 45, 45))
+        counts = {bucket["label"]: bucket["count"] for bucket in stats["buckets"]}
+        self.assertEqual((counts["< 2s"], counts["< 5s"], counts["< 60s"]), (1, 2, 1))
+
+
 if __name__ == "__main__":
     unittest.main()
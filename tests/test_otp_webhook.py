@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from fastapi.testclient import TestClient
+from twilio.request_validator import RequestValidator
+
+from app import db
+from app.main import app
+from src.otp_inbox import InboundSms, OtpInbox, inbox
+from src.twilio_utils import TwilioService
+
+from test_scheduler_queue import instance_values
+
+
+OTP_NUMBER = "+16045551212"
+
+
+def sms(body: str, sid: str = "SM1") -> InboundSms:
+    return InboundSms(sid=sid, to=OTP_NUMBER, from_="+15550001111", body=body, date_sent=datetime.now(timezone.utc))
+
+
+class OtpInboxTests(unittest.TestCase):
+    def test_webhook_delivery_wakes_otp_wait_before_next_poll(self) -> None:
+        class Messages:
+            def list(self, to, limit, date_sent_after=None):
+                return []
+
+        class Client:
+            messages = Messages()
+
+        otp_inbox = OtpInbox()
+        service = TwilioService(
+            client=Client(),
+            otp_number=OTP_NUMBER,
+            alert_to_number=None,
+            alerts_enabled=False,
+            otp_timeout_seconds=30,
+            otp_poll_interval_seconds=10,
+            inbox=otp_inbox,
+        )
+        requested = datetime.now(timezone.utc) - timedelta(seconds=1)
+        threading.Timer(0.05, otp_inbox.deliver, args=(sms("Your code is 424242"),)).start()
+        started = time.monotonic()
+        match = service.wait_for_otp(requested_after=requested)
+        self.assertEqual(match.code, "424242")
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(otp_inbox.feeds["16045551212"].waiters, [])
+
+    def test_code_sent_before_waiting_is_still_claimed(self) -> None:
+        otp_inbox = OtpInbox()
+        requested = datetime.now(timezone.utc) - timedelta(seconds=5)
+        self.assertEqual(otp_inbox.deliver(sms("Code 111111")), 0)
+        waiter = otp_inbox.register("+1 604 555 1212", requested)
+        self.assertEqual(waiter.claim().body, "Code 111111")
+
+    def test_each_code_is_claimed_once_in_request_order(self) -> None:
+        otp_inbox = OtpInbox()
+        now = datetime.now(timezone.utc)
+        first = otp_inbox.register(OTP_NUMBER, now - timedelta(seconds=10))
+        second = otp_inbox.register(OTP_NUMBER, now - timedelta(seconds=5))
+        otp_inbox.deliver(sms("Code 111111", sid="SM1"))
+        otp_inbox.deliver(sms("Code 111111", sid="SM1"))
+        self.assertIsNone(second.claim())
+        self.assertEqual(first.claim().sid, "SM1")
+        self.assertIsNone(second.claim())
+        otp_inbox.deliver(sms("Code 222222", sid="SM2"))
+        self.assertEqual(second.claim().sid, "SM2")
+        self.assertEqual(first.claim().sid, "SM1")
+
+    def test_one_poll_per_interval_per_number(self) -> None:
+        otp_inbox = OtpInbox()
+        calls = []
+
+        def fetch(since):
+            calls.append(since)
+            return []
+
+        self.assertTrue(otp_inbox.poll_if_due(OTP_NUMBER, fetch, interval=60))
+        self.assertFalse(otp_inbox.poll_if_due("+1 (604) 555-1212", fetch, interval=60))
+        self.assertEqual(len(calls), 1)
+        self.assertGreater(otp_inbox.seconds_until_poll(OTP_NUMBER, 60), 50)
+        self.assertTrue(otp_inbox.poll_if_due(OTP_NUMBER, fetch, interval=0))
+
+    def test_waiters_do_not_spin_during_a_slow_poll(self) -> None:
+        class Messages:
+            def list(self, to, limit, date_sent_after=None):
+                time.sleep(0.5)
+                return []
+
+        class Client:
+            messages = Messages()
+
+        otp_inbox = OtpInbox()
+        claims = []
+        claim = otp_inbox.claim
+
+        def counting_claim(waiter):
+            claims.append(waiter)
+            return claim(waiter)
+
+        otp_inbox.claim = counting_claim
+        service = TwilioService(
+            client=Client(),
+            otp_number=OTP_NUMBER,
+            alert_to_number=None,
+            alerts_enabled=False,
+            otp_timeout_seconds=30,
+            otp_poll_interval_seconds=1,
+            inbox=otp_inbox,
+        )
+        requested = datetime.now(timezone.utc)
+        errors = []
+
+        def wait() -> None:
+            try:
+                service.wait_for_otp(requested_after=requested, timeout_seconds=1.5)
+            except TimeoutError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=wait) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(errors), 2)
+        self.assertLess(len(claims), 20)
+
+    def test_polls_from_watermark_and_skips_known_sids(self) -> None:
+        requested = datetime.now(timezone.utc) - timedelta(seconds=5)
+        sent = requested + timedelta(seconds=2)
+        listed = []
+
+        class Messages:
+            def list(self, to, limit, date_sent_after=None):
+                listed.append(date_sent_after)
+                return [SimpleNamespace(sid="SM1", to=OTP_NUMBER, direction="inbound", body="Code 5555", date_sent=sent)]
+
+        class Client:
+            messages = Messages()
+
+        otp_inbox = OtpInbox()
+        service = TwilioService(
+            client=Client(),
+            otp_number=OTP_NUMBER,
+            alert_to_number=None,
+            alerts_enabled=False,
+            otp_timeout_seconds=30,
+            otp_poll_interval_seconds=0,
+            inbox=otp_inbox,
+        )
+        otp_inbox.register(OTP_NUMBER, requested)
+        self.assertEqual(len(service._fetch_inbound(requested)), 1)
+        otp_inbox.poll_if_due(OTP_NUMBER, service._fetch_inbound, interval=0)
+        otp_inbox.poll_if_due(OTP_NUMBER, service._fetch_inbound, interval=0)
+        self.assertEqual(service._fetch_inbound(None), [])
+        self.assertEqual(listed[1], requested - timedelta(seconds=60))
+        self.assertEqual(listed[2], sent - timedelta(seconds=2))
+
+
+class WebhookRouteTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        env = patch.dict(os.environ, {"APPDATA_DIR": tmpdir.name, "TWILIO_WEBHOOK_URL": "https://bot.example/twilio/sms"})
+        env.start()
+        self.addCleanup(env.stop)
+        db.init_db()
+        release_at = datetime.now(ZoneInfo("America/Vancouver")) + timedelta(hours=3)
+        db.save_instance(instance_values(release_at))
+        self.client = TestClient(app)
+        self.params = {"AccountSid": "AC123", "MessageSid": "SM9", "To": OTP_NUMBER, "From": "+15550001111", "Body": "Code 987654"}
+
+    def post(self, signature: str):
+        return self.client.post("/twilio/sms", data=self.params, headers={"X-Twilio-Signature": signature})
+
+    def test_rejects_bad_signature(self) -> None:
+        with patch.object(inbox, "deliver") as deliver:
+            response = self.post("bogus")
+        self.assertEqual(response.status_code, 403)
+        deliver.assert_not_called()
+
+    def test_signed_message_is_delivered(self) -> None:
+        signature = RequestValidator("secret").compute_signature("https://bot.example/twilio/sms", self.params)
+        with patch.object(inbox, "deliver") as deliver:
+            response = self.post(signature)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("<Response>", response.text)
+        self.assertEqual(deliver.call_args.args[0].body, "Code 987654")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import random
+import unittest
+
+from src.polling import PollingPolicy
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_policy(clock: FakeClock, sold_out_stop_attempts: int = 3) -> PollingPolicy:
+    return PollingPolicy(
+        deadline_seconds=120,
+        dense_seconds=30,
+        dense_range=(0.5, 1.2),
+        sparse_range=(1.4, 3.6),
+        sold_out_stop_attempts=sold_out_stop_attempts,
+        clock=clock,
+        rng=random.Random(7),
+    )
+
+
+class PollingPolicyTests(unittest.TestCase):
+    def test_dense_then_sparse_delays(self) -> None:
+        clock = FakeClock()
+        policy = make_policy(clock)
+        dense = policy.next(sold_out=False)
+        self.assertEqual(dense.phase, "dense")
+        self.assertTrue(0.5 <= dense.delay <= 1.2)
+        clock.now += 31
+        sparse = policy.next(sold_out=False)
+        self.assertEqual(sparse.phase, "sparse")
+        self.assertTrue(1.4 <= sparse.delay <= 3.6)
+
+    def test_stops_after_consecutive_sold_out_attempts(self) -> None:
+        clock = FakeClock()
+        policy = make_policy(clock)
+        clock.now += 31
+        self.assertFalse(policy.next(sold_out=True).stop)
+        self.assertFalse(policy.next(sold_out=False).stop)
+        self.assertFalse(policy.next(sold_out=True).stop)
+        self.assertFalse(policy.next(sold_out=True).stop)
+        decision = policy.next(sold_out=True)
+        self.assertTrue(decision.stop)
+        self.assertIn("3 consecutive", decision.reason)
+
+    def test_dense_phase_does_not_count_toward_sold_out_stop(self) -> None:
+        clock = FakeClock()
+        policy = make_policy(clock)
+        for _ in range(5):
+            self.assertFalse(policy.next(sold_out=True).stop)
+        clock.now += 31
+        self.assertFalse(policy.next(sold_out=True).stop)
+        self.assertEqual(policy.sold_out_streak, 1)
+
+    def test_zero_disables_sold_out_stop(self) -> None:
+        policy = make_policy(FakeClock(), sold_out_stop_attempts=0)
+        for _ in range(10):
+            self.assertFalse(policy.next(sold_out=True).stop)
+
+    def test_stops_when_next_attempt_would_pass_deadline(self) -> None:
+        clock = FakeClock()
+        policy = make_policy(clock)
+        clock.now += 119
+        decision = policy.next(sold_out=False)
+        self.assertTrue(decision.stop)
+        self.assertEqual(decision.reason, "Polling deadline reached")
+
+
+if __name__ == "__main__":
+    unittest.main()
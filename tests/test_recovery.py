@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from app import db, runner
+
+from test_scheduler_queue import instance_values
+
+
+TIMEZONE = ZoneInfo("America/Vancouver")
+
+
+class RecoveryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        env = patch.dict(os.environ, {"APPDATA_DIR": tmpdir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        db.init_db()
+        self.enqueued: list[int] = []
+        enqueue = patch.object(runner.worker_pool, "enqueue", side_effect=self.enqueued.append)
+        enqueue.start()
+        self.addCleanup(enqueue.stop)
+
+    def make_job(self, release_at: datetime, status: str, command: str = "book", name: str = "Alice") -> int:
+        values = {**instance_values(release_at), "name": name, "profile_name": name.lower()}
+        instance_id = db.save_instance(values)
+        job_id = db.create_job(instance_id, command, "manual", values["target_date"])
+        db.update_job(job_id, status=status)
+        return job_id
+
+    def test_interrupts_running_and_requeues_in_release_order(self) -> None:
+        now = datetime.now(TIMEZONE).replace(second=0, microsecond=0)
+        running = self.make_job(now + timedelta(minutes=20), "running", name="Running")
+        late = self.make_job(now + timedelta(hours=2), "queued", name="Late")
+        early = self.make_job(now + timedelta(minutes=40), "parked", name="Early")
+        check = self.make_job(now + timedelta(hours=1), "queued", command="auth-check", name="Check")
+
+        runner.recover_jobs()
+
+        self.assertEqual(self.enqueued, [early, late, check])
+        self.assertEqual(db.get_job(running).status, "interrupted")
+        self.assertFalse(db.active_job_exists(db.get_job(running).instance_id))
+
+    def test_expired_booking_is_not_requeued(self) -> None:
+        release_at = (datetime.now(TIMEZONE) - timedelta(hours=1)).replace(second=0, microsecond=0)
+        job_id = self.make_job(release_at, "queued")
+
+        runner.recover_jobs()
+
+        self.assertEqual(self.enqueued, [])
+        self.assertEqual(db.get_job(job_id).status, "interrupted")
+
+
+if __name__ == "__main__":
+    unittest.main()
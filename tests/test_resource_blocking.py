@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from src.resource_blocking import ResourceBlocker
+
+
+class ResourceBlockerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.blocker = ResourceBlocker(
+            blocked_types=("image", "font"),
+            blocked_patterns=("google-analytics.com",),
+            allowed_patterns=("yodelportal.com/vehicle-icons",),
+        )
+
+    def test_blocks_types_and_patterns(self) -> None:
+        self.assertTrue(self.blocker.should_block("image", "https://yodelportal.com/hero.jpg"))
+        self.assertTrue(self.blocker.should_block("script", "https://www.google-analytics.com/analytics.js"))
+        self.assertFalse(self.blocker.should_block("script", "https://yodelportal.com/app.js"))
+
+    def test_allowlist_and_documents_are_never_blocked(self) -> None:
+        self.assertFalse(self.blocker.should_block("image", "https://yodelportal.com/vehicle-icons/car.png"))
+        self.assertFalse(self.blocker.should_block("document", "https://www.google-analytics.com/"))
+
+    def test_disabled_without_rules(self) -> None:
+        self.assertFalse(ResourceBlocker((), (), ()).enabled)
+
+
+class FakeRoute:
+    def __init__(self, resource_type: str, url: str, abort_error: Exception | None = None) -> None:
+        self.request = SimpleNamespace(resource_type=resource_type, url=url)
+        self.abort_error = abort_error
+        self.calls: list[str] = []
+
+    async def abort(self) -> None:
+        self.calls.append("abort")
+        if self.abort_error is not None:
+            raise self.abort_error
+
+    async def fallback(self) -> None:
+        self.calls.append("fallback")
+
+
+class RouteHandlingTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.blocker = ResourceBlocker(("image",), (), ())
+
+    async def test_counts_only_successful_aborts(self) -> None:
+        route = FakeRoute("image", "https://yodelportal.com/hero.jpg")
+        await self.blocker._handle(route)
+        self.assertEqual(route.calls, ["abort"])
+        self.assertEqual(self.blocker.blocked["image"], 1)
+
+    async def test_failed_abort_is_not_counted_or_continued(self) -> None:
+        route = FakeRoute("image", "https://yodelportal.com/hero.jpg", abort_error=RuntimeError("Route is already handled!"))
+        await self.blocker._handle(route)
+        self.assertEqual(route.calls, ["abort"])
+        self.assertEqual(sum(self.blocker.blocked.values()), 0)
+
+    async def test_other_requests_fall_back(self) -> None:
+        route = FakeRoute("script", "https://yodelportal.com/app.js")
+        await self.blocker._handle(route)
+        self.assertEqual(route.calls, ["fallback"])
+
+
+class InstanceSaveTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        env = patch.dict(os.environ, {"APPDATA_DIR": tmpdir.name})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_rejects_unknown_blocked_types_on_save(self) -> None:
+        response = TestClient(app).post(
+            "/instances",
+            content="name=Alice&blocked_resource_types=image,videos",
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("videos", response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app import main
+from app.runner import LANES, Admission, Capacity, PrioritySlots, job_logging
+
+
+class AdmissionTests(unittest.IsolatedAsyncioTestCase):
+    async def test_moving_to_firing_frees_the_prepping_slot(self) -> None:
+        capacity = Capacity(work=1, prepping=1, firing=1)
+        first, second = Admission(), Admission()
+        await first.enter(capacity.prepping)
+        waiting = asyncio.create_task(second.enter(capacity.prepping))
+        await asyncio.sleep(0)
+        self.assertFalse(waiting.done())
+
+        await first.enter(capacity.firing)
+        await waiting
+        self.assertIs(second.held, capacity.prepping)
+        self.assertTrue(capacity.firing.locked())
+
+        first.leave()
+        second.leave()
+        self.assertFalse(capacity.firing.locked())
+        self.assertFalse(capacity.prepping.locked())
+
+    async def test_work_pool_is_separate_from_booking_pools(self) -> None:
+        capacity = Capacity(work=1, prepping=1, firing=1)
+        booking, check = Admission(), Admission()
+        await booking.enter(capacity.prepping)
+        await asyncio.wait_for(check.enter(capacity.work), timeout=1)
+        self.assertIs(check.held, capacity.work)
+
+
+class PrioritySlotsTests(unittest.IsolatedAsyncioTestCase):
+    async def test_admits_bookings_before_earlier_dry_runs(self) -> None:
+        slots = PrioritySlots("work", 1)
+        await slots.acquire()
+        order: list[int] = []
+
+        async def wait(job_id: int, command: str, release: float = 0.0) -> None:
+            await slots.acquire((LANES[command], release, job_id), job_id)
+            order.append(job_id)
+            slots.release()
+
+        tasks = [
+            asyncio.create_task(wait(1, "dry-run")),
+            asyncio.create_task(wait(2, "auth-check")),
+            asyncio.create_task(wait(3, "book", release=200.0)),
+            asyncio.create_task(wait(4, "book", release=100.0)),
+        ]
+        await asyncio.sleep(0)
+        self.assertEqual(slots.queue(), [4, 3, 2, 1])
+        slots.release()
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, [4, 3, 2, 1])
+        self.assertEqual(slots.in_use, 0)
+
+    async def test_cancelled_waiter_gives_up_its_place(self) -> None:
+        slots = PrioritySlots("work", 1)
+        await slots.acquire()
+        waiter = asyncio.create_task(slots.acquire((0,), 7))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        self.assertEqual(slots.queue(), [])
+        slots.release()
+        self.assertFalse(slots.locked())
+
+    async def test_tracks_which_jobs_hold_slots(self) -> None:
+        slots = PrioritySlots("work", 1)
+        await slots.acquire((), 1)
+        waiter = asyncio.create_task(slots.acquire((), 2))
+        await asyncio.sleep(0)
+        self.assertEqual(list(slots.holders), [1])
+        slots.release(1)
+        await waiter
+        self.assertEqual(list(slots.holders), [2])
+
+
+class QueueEstimateTests(unittest.TestCase):
+    def test_waits_for_the_first_slot_to_free(self) -> None:
+        self.assertEqual(main.estimate_wait([300.0], [200.0], size=1), 500.0)
+        self.assertEqual(main.estimate_wait([300.0, 60.0], [200.0, 50.0], size=2), 260.0)
+        self.assertEqual(main.estimate_wait([], [], size=2), 0.0)
+        self.assertIsNone(main.estimate_wait([None], [], size=1))
+
+    def test_uses_the_commands_of_the_jobs_ahead(self) -> None:
+        medians = {"dry-run": 300.0, "auth-check": 30.0}
+        jobs = [
+            SimpleNamespace(id=1, command="dry-run", status="running", metadata={}),
+            SimpleNamespace(id=2, command="dry-run", status="queued", metadata={}),
+            SimpleNamespace(id=3, command="auth-check", status="queued", metadata={}),
+        ]
+        with (
+            patch.object(main.worker_pool, "queue_positions", return_value={2: ("work", 1, 1), 3: ("work", 2, 1)}),
+            patch.object(main.worker_pool, "slot_holders", return_value={"work": {1: time.time() - 100}}),
+            patch.object(main.db, "typical_job_seconds", side_effect=medians.get),
+        ):
+            info = main.queue_info(jobs)
+        expected = datetime.fromisoformat(info[3]["expected"])
+        wait = (expected - datetime.now(timezone.utc)).total_seconds()
+        self.assertAlmostEqual(wait, 500, delta=3)
+        self.assertEqual(info[3]["position"], "#2 for a work slot")
+
+
+class JobLoggingTests(unittest.TestCase):
+    def test_root_level_is_restored_after_the_last_job(self) -> None:
+        root = logging.getLogger()
+        previous = root.level
+        root.setLevel(logging.WARNING)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                with job_logging(Path(tmp) / "1.log", 1):
+                    with job_logging(Path(tmp) / "2.log", 2):
+                        self.assertEqual(root.level, logging.INFO)
+                    self.assertEqual(root.level, logging.INFO)
+                self.assertEqual(root.level, logging.WARNING)
+        finally:
+            root.setLevel(previous)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+import unittest
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from src.scheduler import sleep_until
+
+
+TIMEZONE = ZoneInfo("America/Vancouver")
+
+
+class FixedOffsetClock:
+    def __init__(self, offset: float) -> None:
+        self.offset = offset
+
+    def now(self, timezone):
+        return datetime.now(timezone) + timedelta(seconds=self.offset)
+
+
+class SleepUntilTests(unittest.IsolatedAsyncioTestCase):
+    async def test_fires_at_not_before_target(self) -> None:
+        target = datetime.now(TIMEZONE) + timedelta(milliseconds=80)
+        late_ns = await sleep_until(target, TIMEZONE)
+        self.assertGreaterEqual(time.time(), target.timestamp())
+        self.assertGreaterEqual(late_ns, 0)
+        self.assertLess(late_ns, 50_000_000)
+
+    async def test_targets_server_time_when_clock_given(self) -> None:
+        target = datetime.now(TIMEZONE) + timedelta(seconds=1)
+        started = time.monotonic()
+        await sleep_until(target, TIMEZONE, clock=FixedOffsetClock(0.9))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    async def test_past_target_returns_immediately(self) -> None:
+        late_ns = await sleep_until(datetime.now(TIMEZONE) - timedelta(seconds=1), TIMEZONE)
+        self.assertGreater(late_ns, 900_000_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import unittest
+from dataclasses import replace
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from app import db, runner
+
+
+TIMEZONE = ZoneInfo("America/Vancouver")
+
+
+def instance_values(release_at: datetime) -> dict:
+    return {
+        **db.DEFAULT_INSTANCE,
+        "name": "Alice",
+        "profile_name": "alice",
+        "schedule_enabled": 1,
+        "vehicle_keyword": "Tesla",
+        "target_date": (release_at + timedelta(days=1)).date().isoformat(),
+        "start_time": release_at.strftime("%H:%M"),
+        "twilio_account_sid": "AC123",
+        "twilio_auth_token": "secret",
+        "twilio_otp_number": "+16045551212",
+        "twilio_alert_to_number": "+16045559876",
+    }
+
+
+class SchedulerQueueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        env = patch.dict(os.environ, {"APPDATA_DIR": tmpdir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        db.init_db()
+        self.scheduler = runner.Scheduler()
+        self.queued: list[int] = []
+        enqueue = patch.object(runner, "enqueue_job", side_effect=lambda instance_id, *args, **kwargs: self.queued.append(instance_id))
+        enqueue.start()
+        self.addCleanup(enqueue.stop)
+
+    def test_sleeps_until_next_prep_window(self) -> None:
+        release_at = (datetime.now(TIMEZONE) + timedelta(hours=3)).replace(second=0, microsecond=0)
+        instance_id = db.save_instance(instance_values(release_at))
+        self.scheduler.reload()
+        prep_at = release_at - timedelta(minutes=db.DEFAULT_INSTANCE["prep_minutes_before"])
+        self.assertEqual(self.scheduler.due[instance_id], prep_at.timestamp())
+        self.assertAlmostEqual(self.scheduler.seconds_until_next(), runner.SCHEDULER_MAX_SLEEP_SECONDS)
+        self.scheduler.check_due()
+        self.assertEqual(self.queued, [])
+
+    def test_notify_queues_instance_inside_window(self) -> None:
+        release_at = (datetime.now(TIMEZONE) + timedelta(minutes=2)).replace(second=0, microsecond=0)
+        instance_id = db.save_instance(instance_values(release_at))
+        self.scheduler.reload()
+        self.assertEqual(self.scheduler.seconds_until_next(), 0.0)
+        self.scheduler.check_due()
+        self.assertEqual(self.queued, [instance_id])
+
+        self.scheduler.notify(instance_id, delay_seconds=60)
+        self.scheduler.apply_pending()
+        self.assertGreater(self.scheduler.due[instance_id], time.time() + 50)
+
+    def test_disabled_instance_is_dropped_on_notify(self) -> None:
+        release_at = (datetime.now(TIMEZONE) + timedelta(hours=3)).replace(second=0, microsecond=0)
+        values = instance_values(release_at)
+        instance_id = db.save_instance(values)
+        self.scheduler.reload()
+        db.save_instance({**values, "enabled": 0}, instance_id=instance_id)
+        self.scheduler.notify(instance_id)
+        self.scheduler.apply_pending()
+        self.assertNotIn(instance_id, self.scheduler.due)
+        self.assertEqual(self.scheduler.seconds_until_next(), runner.SCHEDULER_MAX_SLEEP_SECONDS)
+
+    def test_invalid_instance_is_reported_once_per_save(self) -> None:
+        release_at = (datetime.now(TIMEZONE) + timedelta(hours=3)).replace(second=0, microsecond=0)
+        instance = db.get_instance(db.save_instance({**instance_values(release_at), "vehicle_keyword": " "}))
+        with self.assertLogs(runner.logger, "WARNING") as logs:
+            self.assertIsNone(self.scheduler._window(instance))
+            self.assertIsNone(self.scheduler._window(instance))
+            self.assertIsNone(self.scheduler._window(replace(instance, updated_at="2099-01-01T00:00:00+00:00")))
+        self.assertEqual(len(logs.records), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timedelta
+
+from src.timeline import DETAILED_ATTEMPTS, Timeline, timed
+
+
+class Stepper:
+    def __init__(self) -> None:
+        self.timeline = Timeline()
+
+    @timed("card_lookup")
+    async def find(self, found: bool):
+        return "card" if found else None
+
+
+class TimelineTests(unittest.IsolatedAsyncioTestCase):
+    def test_offsets_are_relative_to_anchor(self) -> None:
+        timeline = Timeline(anchor=datetime.now().astimezone() + timedelta(seconds=10))
+        with timeline.scope("afternoon"), timeline.span("goto"):
+            pass
+        span = timeline.as_dict()["spans"][0]
+        self.assertEqual((span["step"], span["scope"], span["ok"]), ("goto", "afternoon", True))
+        self.assertLess(span["start_ms"], -9000)
+
+    def test_exception_marks_span_failed(self) -> None:
+        timeline = Timeline()
+        with self.assertRaises(RuntimeError), timeline.span("checkout"):
+            raise RuntimeError("boom")
+        self.assertFalse(timeline.spans[0].ok)
+
+    def test_later_attempts_are_summarized(self) -> None:
+        timeline = Timeline()
+        for attempt in range(1, DETAILED_ATTEMPTS + 101):
+            timeline.start_attempt(attempt)
+            with timeline.scope("all_day"), timeline.span("goto"):
+                pass
+        data = timeline.as_dict()
+        self.assertEqual(len(data["spans"]), DETAILED_ATTEMPTS)
+        self.assertEqual(data["attempts"], DETAILED_ATTEMPTS + 100)
+        [summary] = data["summary"]
+        self.assertEqual((summary["step"], summary["scope"], summary["count"]), ("goto", "all_day", 100))
+
+    async def test_timed_marks_empty_results_failed(self) -> None:
+        stepper = Stepper()
+        self.assertEqual(await stepper.find(True), "card")
+        self.assertIsNone(await stepper.find(False))
+        self.assertEqual([span.ok for span in stepper.timeline.spans], [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()